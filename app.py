@@ -0,0 +1,1252 @@
+# app.py - Interface Moderne CustomTkinter pour Leila
+#
+# Seuls les modules nécessaires pour afficher la fenêtre sont importés ici ;
+# requests, asyncio, sqlite3 (client, pipeline, index) le sont après le
+# premier affichage, dans start_services.
+import customtkinter as ctk
+from PIL import Image
+from pathlib import Path
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import (
+    CONFIG_FILE, load_config, save_config, client_options, metrics_exporter, rate_limiter, result_cache, retention_policy
+)
+from journal import JobJournal
+from metrics import Metrics
+from gallery import VirtualGallery, post_items
+from ui_queue import UiQueue
+from thumbnails import LRUCache, PreviewPyramid, ThumbnailStore, file_key, load_scaled, make_previews, make_thumbnail
+from watcher import FolderWatcher
+
+# Configuration du thème Dark/Gothique
+ctk.set_appearance_mode("dark")
+ctk.set_default_color_theme("dark-blue")
+
+GALLERY_PAGE = 250      # dossiers envoyés à la galerie par lot pendant la recherche
+PREVIEW_MARGIN = 20     # marge (pixels) entre l'image et le bord de la zone de prévisualisation
+SHUTDOWN_TIMEOUT = 5    # attente max (s) de chaque fermeture sur la boucle asyncio à l'arrêt
+
+class ModernWaveSpeedApp:
+    def __init__(self):
+        # Fenêtre principale
+        self.window = ctk.CTk()
+        self.window.title("WaveSpeed Generator - Leila")
+        self.window.geometry("1400x900")
+        self.window.minsize(1200, 700)
+        
+        # Configuration
+        self.config_file = CONFIG_FILE
+        self.load_config()
+        
+        # Mesures de performance ; les autres threads passent par self.ui pour toucher à Tk
+        self.metrics = Metrics()
+        self.ui = UiQueue(self.window, metrics=self.metrics).start()
+        self.exporter = metrics_exporter(self.config, self.metrics)
+        if self.exporter is not None:
+            self.exporter.start()
+        
+        # Variables
+        self.current_images = []
+        self.selected_image = None
+        self.thumbnail_cache = LRUCache(max_entries=300)    # CTkImage prêtes, par (chemin, mtime, taille)
+        self.thumbnail_futures = {}
+        self.thumbnail_pool = None
+        self.gallery_generation = 0
+        self.gallery_filter = ""
+        self.search_after = None
+        self.job_rows = {}
+        
+        # Miniatures sur disque (<output_folder>/.thumbs)
+        self.thumbnail_store = ThumbnailStore(self.config.get("output_folder", Path.home() / "WaveSpeed_Images"))
+        
+        # Prévisualisation : niveaux précalculés (<output_folder>/.previews), images prêtes
+        # pour la sélection et ses voisines, décodées sur un petit pool de threads
+        self.previews = PreviewPyramid(self.thumbnail_store.root.parent)
+        self.preview_cache = LRUCache(max_entries=16)      # CTkImage prêtes, par (clé, zone)
+        self.preview_futures = {}
+        self.preview_jobs = set()      # clés des niveaux en cours de calcul dans le pool de processus
+        self.preview_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="preview")
+        self.preview_shown = None
+        self.resize_after = None
+        
+        # Services (client HTTP, pipeline, index, file des posts) : construits après le
+        # premier affichage de la fenêtre par start_services, leurs modules sont lourds
+        self.http = None
+        self.poller = None
+        self.loop = None
+        self.client = None
+        self.post_index = None
+        self.results = None
+        self.journal = None
+        self.pipeline = None
+        self.jobs = None
+        self.storage = None
+        self.watcher = None
+        self.timings = {"created": time.perf_counter()}
+        
+        # Couleurs du thème Dark/Gothique
+        self.colors = {
+            "bg_primary": "#1a1a1a",      # Noir profond
+            "bg_secondary": "#242424",     # Gris très foncé
+            "bg_tertiary": "#2d2d2d",      # Gris foncé
+            "accent": "#8b5cf6",           # Violet gothique
+            "accent_hover": "#7c3aed",     # Violet foncé
+            "text_primary": "#ffffff",     # Blanc
+            "text_secondary": "#a1a1aa",   # Gris clair
+            "border": "#3f3f46",           # Bordure
+            "success": "#10b981",          # Vert succès
+            "error": "#ef4444",            # Rouge erreur
+        }
+        
+        self.setup_ui()
+        self.window.bind("<Map>", self.on_map, add="+")
+    
+    def on_map(self, event):
+        """Fenêtre affichée : la laisser se dessiner (tâches idle de Tk) avant de charger le reste"""
+        if event.widget is self.window and "first_paint" not in self.timings:
+            self.window.after_idle(self.on_first_paint)
+    
+    def on_first_paint(self):
+        if "first_paint" in self.timings:
+            return
+        self.timings["first_paint"] = time.perf_counter()
+        threading.Thread(target=self.import_services, name="startup-imports", daemon=True).start()
+    
+    def import_services(self):
+        """Importe les modules lourds hors du thread Tk, puis demande la création des services"""
+        try:
+            import pipeline  # noqa: F401
+            import post_index  # noqa: F401
+            import wavespeed_async  # noqa: F401
+            Image.preinit()         # plugins JPEG/PNG de Pillow, avant la première miniature
+        finally:
+            self.ui.post(self.start_services)
+    
+    def start_services(self):
+        """Crée client HTTP, pipeline, index et file des posts, puis charge la galerie (thread Tk)"""
+        if self.pipeline is not None:
+            return
+        from jobs import JobQueue
+        from pipeline import Pipeline
+        from post_index import PostIndex
+        from storage import ARCHIVE_QUALITY, StorageManager
+        from wavespeed_async import AsyncWaveSpeedClient, LoopThread
+        from wavespeed_client import HttpClient, PollScheduler
+        
+        # Session HTTP partagée (keep-alive) pour tous les appels API
+        # (débit et concurrence réglés par le limiteur, selon les quotas de l'API)
+        self.http = HttpClient(
+            pool_size=self.config.get("max_workers", 3) * 2 + 2,
+            limiter=rate_limiter(self.config),
+            metrics=self.metrics
+        )
+        
+        # Suivi des tâches distantes (un seul ordonnanceur pour tous les jobs)
+        output_folder = Path(self.config.get("output_folder", Path.home() / "WaveSpeed_Images"))
+        self.poller = PollScheduler(
+            self.http,
+            deadline=self.config.get("poll_deadline", 120),
+            stats_path=output_folder / "poll_stats.jsonl"
+        )
+        
+        # Client async sur sa propre boucle ; les résultats reviennent à Tk via window.after
+        self.loop = LoopThread()
+        self.client = AsyncWaveSpeedClient(
+            self.config.get("api_key", ""),
+            http=self.http,
+            poller=self.poller,
+            io_workers=self.config.get("max_workers", 3) * 2 + 2,
+            **client_options(self.config)
+        )
+        
+        # Index SQLite des posts (galerie, historique), tenu à jour par le pipeline
+        self.post_index = PostIndex(output_folder)
+        
+        # Pipeline par étapes : les posts en vol se chevauchent (B du post N pendant A du post N+1)
+        self.results = result_cache(self.config)
+        self.journal = JobJournal(output_folder)
+        self.pipeline = Pipeline(
+            max_in_flight=self.config.get("max_workers", 3),
+            index=self.post_index,
+            cache=self.results,
+            journal=self.journal,
+            on_image=lambda path: self.ui.post(self.schedule_previews, path),
+            metrics=self.metrics
+        )
+        
+        # File d'attente des posts
+        self.jobs = JobQueue(
+            self.run_job,
+            self.loop,
+            max_workers=self.config.get("max_workers", 3),
+            on_change=lambda job: self.ui.post(self.on_job_change, job)
+        )
+        
+        # Rétention, archives mensuelles et nettoyage du dossier de sortie (hors du thread Tk)
+        self.storage = StorageManager(
+            self.post_index, self.journal, self.thumbnail_store, self.previews,
+            archive_quality=self.config.get("archive_quality", ARCHIVE_QUALITY)
+        )
+        
+        self.timings["services"] = time.perf_counter()
+        
+        # Charger les images existantes, puis suivre les posts créés ailleurs (batch, autre instance)
+        self.refresh_gallery()
+        self.watcher = FolderWatcher(
+            self.config.get("output_folder", Path.home() / "WaveSpeed_Images"),
+            self.on_output_change
+        ).start()
+        self.resume_interrupted_jobs()
+        threading.Thread(target=self.thumbnail_store.prune, daemon=True).start()
+        threading.Thread(target=self.previews.prune, daemon=True).start()
+        policy = retention_policy(self.config)
+        if policy["days"] or policy["max_posts"] or policy["max_gb"]:
+            self.run_storage(lambda: self.storage.apply(**policy))
+    
+    def load_config(self):
+        """Charge la configuration"""
+        self.config = load_config(self.config_file)
+    
+    def save_config(self):
+        """Sauvegarde la configuration"""
+        save_config(self.config, self.config_file)
+    
+    def setup_ui(self):
+        """Configure l'interface utilisateur moderne"""
+        # Frame principal avec padding
+        self.main_frame = ctk.CTkFrame(self.window, fg_color=self.colors["bg_primary"])
+        self.main_frame.pack(fill="both", expand=True, padx=20, pady=20)
+        
+        # Layout en 3 colonnes : Sidebar (25%) | Preview (45%) | Gallery (30%)
+        self.main_frame.grid_columnconfigure(0, weight=0, minsize=350)  # Sidebar
+        self.main_frame.grid_columnconfigure(1, weight=1)               # Preview
+        self.main_frame.grid_columnconfigure(2, weight=0, minsize=400)  # Gallery
+        self.main_frame.grid_rowconfigure(0, weight=1)
+        
+        # === SIDEBAR (Gauche) ===
+        self.create_sidebar()
+        
+        # === PREVIEW (Centre) ===
+        self.create_preview_panel()
+        
+        # === GALLERY (Droite) ===
+        self.create_gallery_panel()
+        
+        # === STATUS BAR (Bas) ===
+        self.create_status_bar()
+    
+    def create_sidebar(self):
+        """Crée la barre latérale avec les contrôles"""
+        sidebar = ctk.CTkFrame(
+            self.main_frame,
+            fg_color=self.colors["bg_secondary"],
+            corner_radius=15,
+            border_width=1,
+            border_color=self.colors["border"]
+        )
+        sidebar.grid(row=0, column=0, sticky="nsew", padx=(0, 10))
+        sidebar.grid_rowconfigure(3, weight=1)
+        
+        # Titre
+        title = ctk.CTkLabel(
+            sidebar,
+            text="⚡ WaveSpeed",
+            font=ctk.CTkFont(size=24, weight="bold"),
+            text_color=self.colors["accent"]
+        )
+        title.pack(pady=(20, 5))
+        
+        subtitle = ctk.CTkLabel(
+            sidebar,
+            text="Generator for Leila",
+            font=ctk.CTkFont(size=12),
+            text_color=self.colors["text_secondary"]
+        )
+        subtitle.pack(pady=(0, 20))
+        
+        # Section Configuration
+        config_frame = ctk.CTkFrame(sidebar, fg_color="transparent")
+        config_frame.pack(fill="x", padx=15, pady=10)
+        
+        # API Key
+        ctk.CTkLabel(config_frame, text="🔑 Clé API", font=ctk.CTkFont(weight="bold")).pack(anchor="w", pady=(0, 5))
+        self.api_entry = ctk.CTkEntry(
+            config_frame,
+            placeholder_text="Votre clé API WaveSpeed",
+            show="•",
+            height=35,
+            corner_radius=8
+        )
+        self.api_entry.pack(fill="x", pady=(0, 10))
+        self.api_entry.insert(0, self.config.get("api_key", ""))
+        
+        # LoRa Path
+        ctk.CTkLabel(config_frame, text="🖼️ Image LoRa", font=ctk.CTkFont(weight="bold")).pack(anchor="w", pady=(0, 5))
+        lora_frame = ctk.CTkFrame(config_frame, fg_color="transparent")
+        lora_frame.pack(fill="x", pady=(0, 10))
+        lora_frame.grid_columnconfigure(0, weight=1)
+        
+        self.lora_entry = ctk.CTkEntry(
+            lora_frame,
+            placeholder_text="Chemin vers image LoRa",
+            height=35,
+            corner_radius=8
+        )
+        self.lora_entry.grid(row=0, column=0, sticky="ew", padx=(0, 5))
+        self.lora_entry.insert(0, self.config.get("lora_path", ""))
+        
+        ctk.CTkButton(
+            lora_frame,
+            text="📁",
+            width=40,
+            height=35,
+            corner_radius=8,
+            command=self.browse_lora
+        ).grid(row=0, column=1)
+        
+        # Section Prompts
+        prompts_frame = ctk.CTkFrame(sidebar, fg_color="transparent")
+        prompts_frame.pack(fill="x", padx=15, pady=10)
+        
+        ctk.CTkLabel(prompts_frame, text="✏️ Prompt A (Principal)", font=ctk.CTkFont(weight="bold")).pack(anchor="w", pady=(0, 5))
+        self.prompt_a = ctk.CTkTextbox(
+            prompts_frame,
+            height=80,
+            corner_radius=10,
+            border_width=1,
+            border_color=self.colors["border"]
+        )
+        self.prompt_a.pack(fill="x", pady=(0, 10))
+        
+        ctk.CTkLabel(prompts_frame, text="🎨 Prompt B (Variante)", font=ctk.CTkFont(weight="bold")).pack(anchor="w", pady=(0, 5))
+        self.prompt_b = ctk.CTkTextbox(
+            prompts_frame,
+            height=80,
+            corner_radius=10,
+            border_width=1,
+            border_color=self.colors["border"]
+        )
+        self.prompt_b.pack(fill="x", pady=(0, 10))
+        
+        ctk.CTkLabel(prompts_frame, text="💬 Caption", font=ctk.CTkFont(weight="bold")).pack(anchor="w", pady=(0, 5))
+        self.caption = ctk.CTkTextbox(
+            prompts_frame,
+            height=60,
+            corner_radius=10,
+            border_width=1,
+            border_color=self.colors["border"]
+        )
+        self.caption.pack(fill="x", pady=(0, 10))
+        
+        # Réutiliser un résultat identique (même LoRa, prompt et paramètres) au lieu de le repayer
+        self.reuse_var = ctk.BooleanVar(value=self.config.get("reuse_results", False))
+        ctk.CTkCheckBox(
+            prompts_frame,
+            text="♻️ Réutiliser les images déjà générées",
+            variable=self.reuse_var,
+            font=ctk.CTkFont(size=11),
+            fg_color=self.colors["accent"],
+            hover_color=self.colors["accent_hover"]
+        ).pack(anchor="w")
+        
+        # Bouton Générer
+        self.generate_btn = ctk.CTkButton(
+            sidebar,
+            text="🚀 Générer les 2 images",
+            height=45,
+            corner_radius=12,
+            font=ctk.CTkFont(size=14, weight="bold"),
+            fg_color=self.colors["accent"],
+            hover_color=self.colors["accent_hover"],
+            command=self.start_generation
+        )
+        self.generate_btn.pack(fill="x", padx=15, pady=(20, 10))
+        
+        # Info
+        info = ctk.CTkLabel(
+            sidebar,
+            text="💡 Format: 9:16 | 2K Quality",
+            font=ctk.CTkFont(size=10),
+            text_color=self.colors["text_secondary"]
+        )
+        info.pack(pady=(0, 10))
+        
+        # File d'attente
+        queue_header = ctk.CTkFrame(sidebar, fg_color="transparent")
+        queue_header.pack(fill="x", padx=15)
+        
+        ctk.CTkLabel(queue_header, text="📋 File d'attente", font=ctk.CTkFont(weight="bold")).pack(side="left")
+        
+        ctk.CTkButton(
+            queue_header,
+            text="🧹",
+            width=30,
+            height=25,
+            corner_radius=8,
+            command=self.clear_finished_jobs
+        ).pack(side="right")
+        
+        self.queue_count = ctk.CTkLabel(
+            queue_header,
+            text="",
+            font=ctk.CTkFont(size=11),
+            text_color=self.colors["text_secondary"]
+        )
+        self.queue_count.pack(side="right", padx=10)
+        
+        self.queue_list = ctk.CTkScrollableFrame(
+            sidebar,
+            fg_color=self.colors["bg_tertiary"],
+            corner_radius=10,
+            height=120
+        )
+        self.queue_list.pack(fill="both", expand=True, padx=15, pady=(5, 5))
+        
+        # Tableau de bord : débit, octets échangés, puis file, en cours, latence moyenne / p95 par étape
+        ctk.CTkLabel(sidebar, text="📊 Performances", font=ctk.CTkFont(weight="bold")).pack(anchor="w", padx=15)
+        self.pipeline_label = ctk.CTkLabel(
+            sidebar,
+            text="",
+            justify="left",
+            anchor="w",
+            font=ctk.CTkFont(family="Courier", size=10),
+            text_color=self.colors["text_secondary"]
+        )
+        self.pipeline_label.pack(fill="x", padx=15, pady=(0, 15))
+        self.refresh_pipeline_stats()
+    
+    def create_preview_panel(self):
+        """Crée le panneau de prévisualisation centrale"""
+        preview_frame = ctk.CTkFrame(
+            self.main_frame,
+            fg_color=self.colors["bg_secondary"],
+            corner_radius=15,
+            border_width=1,
+            border_color=self.colors["border"]
+        )
+        preview_frame.grid(row=0, column=1, sticky="nsew", padx=5)
+        preview_frame.grid_rowconfigure(1, weight=1)
+        preview_frame.grid_columnconfigure(0, weight=1)
+        
+        # Header
+        header = ctk.CTkFrame(preview_frame, fg_color="transparent", height=50)
+        header.grid(row=0, column=0, sticky="ew", padx=15, pady=10)
+        header.grid_columnconfigure(0, weight=1)
+        
+        ctk.CTkLabel(
+            header,
+            text="👁️ Prévisualisation",
+            font=ctk.CTkFont(size=16, weight="bold")
+        ).grid(row=0, column=0, sticky="w")
+        
+        self.image_label = ctk.CTkLabel(header, text="", font=ctk.CTkFont(size=12))
+        self.image_label.grid(row=0, column=1, sticky="e")
+        
+        # Zone d'image
+        self.preview_container = ctk.CTkFrame(
+            preview_frame,
+            fg_color=self.colors["bg_tertiary"],
+            corner_radius=10
+        )
+        self.preview_container.grid(row=1, column=0, sticky="nsew", padx=15, pady=(0, 15))
+        
+        self.preview_image = ctk.CTkLabel(
+            self.preview_container,
+            text="📷 Aucune image sélectionnée",
+            font=ctk.CTkFont(size=14),
+            text_color=self.colors["text_secondary"]
+        )
+        self.preview_image.pack(expand=True)
+        self.preview_container.bind("<Configure>", self.on_preview_resize)
+        
+        # Boutons d'action
+        actions = ctk.CTkFrame(preview_frame, fg_color="transparent", height=50)
+        actions.grid(row=2, column=0, sticky="ew", padx=15, pady=(0, 15))
+        actions.grid_columnconfigure((0, 1, 2), weight=1)
+        
+        ctk.CTkButton(
+            actions,
+            text="📂 Ouvrir dossier",
+            height=35,
+            corner_radius=8,
+            command=self.open_output_folder
+        ).grid(row=0, column=0, padx=5)
+        
+        ctk.CTkButton(
+            actions,
+            text="📋 Copier prompt",
+            height=35,
+            corner_radius=8,
+            command=self.copy_prompt
+        ).grid(row=0, column=1, padx=5)
+        
+        ctk.CTkButton(
+            actions,
+            text="🗑️ Supprimer",
+            height=35,
+            corner_radius=8,
+            fg_color=self.colors["error"],
+            hover_color="#dc2626",
+            command=self.delete_selected
+        ).grid(row=0, column=2, padx=5)
+    
+    def create_gallery_panel(self):
+        """Crée le panneau de galerie à droite"""
+        gallery_frame = ctk.CTkFrame(
+            self.main_frame,
+            fg_color=self.colors["bg_secondary"],
+            corner_radius=15,
+            border_width=1,
+            border_color=self.colors["border"]
+        )
+        gallery_frame.grid(row=0, column=2, sticky="nsew", padx=(10, 0))
+        gallery_frame.grid_rowconfigure(2, weight=1)
+        gallery_frame.grid_columnconfigure(0, weight=1)
+        
+        # Header
+        header = ctk.CTkFrame(gallery_frame, fg_color="transparent", height=50)
+        header.grid(row=0, column=0, sticky="ew", padx=15, pady=10)
+        
+        ctk.CTkLabel(
+            header,
+            text="🖼️ Galerie",
+            font=ctk.CTkFont(size=16, weight="bold")
+        ).pack(side="left")
+        
+        self.gallery_count = ctk.CTkLabel(
+            header,
+            text="0 images",
+            font=ctk.CTkFont(size=12),
+            text_color=self.colors["text_secondary"]
+        )
+        self.gallery_count.pack(side="right")
+        
+        ctk.CTkButton(
+            header,
+            text="🧹",
+            width=32,
+            height=28,
+            corner_radius=8,
+            command=self.clean_storage
+        ).pack(side="right", padx=(0, 10))
+        
+        ctk.CTkButton(
+            header,
+            text="📦 Exporter",
+            width=90,
+            height=28,
+            corner_radius=8,
+            command=self.export_gallery
+        ).pack(side="right", padx=(0, 10))
+        
+        # Recherche dans les prompts et captions (index plein texte)
+        self.search_entry = ctk.CTkEntry(
+            gallery_frame,
+            placeholder_text="🔍 Rechercher un prompt ou une caption...",
+            height=32,
+            corner_radius=8,
+            border_color=self.colors["border"],
+            fg_color=self.colors["bg_tertiary"]
+        )
+        self.search_entry.grid(row=1, column=0, sticky="ew", padx=15, pady=(0, 10))
+        self.search_entry.bind("<KeyRelease>", self.on_search_change)
+        
+        # Liste virtualisée : widgets pour les lignes visibles seulement
+        self.gallery = VirtualGallery(
+            gallery_frame,
+            self.colors,
+            on_select=self.select_image,
+            thumbnail=self.gallery_thumbnail
+        )
+        self.gallery.grid(row=2, column=0, sticky="nsew", padx=10, pady=(0, 10))
+        # Les images sont chargées par start_services, après le premier affichage
+    
+    def create_status_bar(self):
+        """Crée la barre de statut en bas"""
+        status_frame = ctk.CTkFrame(
+            self.window,
+            fg_color=self.colors["bg_secondary"],
+            height=35,
+            corner_radius=0
+        )
+        status_frame.pack(fill="x", side="bottom")
+        
+        self.status_label = ctk.CTkLabel(
+            status_frame,
+            text="✅ Prêt",
+            font=ctk.CTkFont(size=11),
+            text_color=self.colors["text_secondary"]
+        )
+        self.status_label.pack(side="left", padx=20)
+        
+        self.limits_label = ctk.CTkLabel(
+            status_frame,
+            text="",
+            font=ctk.CTkFont(size=11),
+            text_color=self.colors["text_secondary"]
+        )
+        self.limits_label.pack(side="left", padx=20)
+        self.refresh_limits()
+        
+        self.progress = ctk.CTkProgressBar(
+            status_frame,
+            width=200,
+            height=6,
+            corner_radius=3,
+            mode="indeterminate"
+        )
+        self.progress.pack(side="right", padx=20)
+        self.progress.stop()
+        self.progress.set(0)
+        self.progress_running = False
+    
+    def browse_lora(self):
+        """Ouvre le dialogue pour choisir l'image LoRa"""
+        from tkinter import filedialog
+        filename = filedialog.askopenfilename(
+            title="Choisir l'image LoRa",
+            filetypes=[("Images", "*.jpg *.jpeg *.png")]
+        )
+        if filename:
+            self.lora_entry.delete(0, "end")
+            self.lora_entry.insert(0, filename)
+    
+    def start_generation(self):
+        """Ajoute un post à la file de génération"""
+        # Récupérer les valeurs
+        api_key = self.api_entry.get().strip()
+        lora_path = self.lora_entry.get().strip()
+        prompt_a = self.prompt_a.get("1.0", "end").strip()
+        prompt_b = self.prompt_b.get("1.0", "end").strip()
+        caption = self.caption.get("1.0", "end").strip()
+        
+        # Vérifications
+        if not api_key:
+            self.show_error("Veuillez entrer votre clé API")
+            return
+        if not lora_path or not Path(lora_path).exists():
+            self.show_error("Veuillez sélectionner une image LoRa valide")
+            return
+        if not prompt_a:
+            self.show_error("Veuillez entrer le Prompt A")
+            return
+        if not prompt_b:
+            self.show_error("Veuillez entrer le Prompt B")
+            return
+        
+        # Sauvegarder config
+        self.config["api_key"] = api_key
+        self.config["lora_path"] = lora_path
+        self.config["reuse_results"] = self.reuse_var.get()
+        self.save_config()
+        
+        # Ajouter à la file (services créés tout de suite si le démarrage n'est pas fini)
+        from jobs import Job
+        self.start_services()
+        job = self.jobs.submit(Job(api_key, lora_path, prompt_a, prompt_b, caption, reuse=self.reuse_var.get()))
+        self.update_status(f"📥 Post #{job.id} ajouté à la file")
+    
+    async def run_job(self, job):
+        """Génère les images d'un job (coroutine exécutée par la file)"""
+        if job.resume:
+            await self.pipeline.resume_post(
+                self.client.with_key(job.api_key),
+                job,
+                job.resume,
+                lambda state, step: self.jobs.set_state(job, state, step)
+            )
+            return
+        await self.pipeline.run_post(
+            self.client.with_key(job.api_key),
+            job,
+            self.config.get("output_folder", Path.home() / "WaveSpeed_Images"),
+            lambda state, step: self.jobs.set_state(job, state, step)
+        )
+    
+    def resume_interrupted_jobs(self):
+        """Remet dans la file les posts interrompus par un arrêt de l'application"""
+        from jobs import Job
+        pending = [post for post in self.journal.unfinished() if not post.get("source")]
+        self.journal.compact()
+        api_key = self.config.get("api_key", "")
+        if not pending or not api_key:
+            return
+        for post in pending:
+            self.jobs.submit(Job(
+                api_key,
+                post.get("lora_path", ""),
+                post.get("prompt_a", ""),
+                post.get("prompt_b", ""),
+                post.get("caption", ""),
+                reuse=post.get("reuse", False),
+                resume=post
+            ))
+        self.update_status(f"🔁 {len(pending)} post(s) interrompu(s) repris")
+    
+    def on_job_change(self, job):
+        """Met à jour la file d'attente quand un job change d'état (thread UI)"""
+        from jobs import DONE, FAILED
+        row = self.job_rows.get(job.id)
+        if row is None:
+            row = ctk.CTkLabel(
+                self.queue_list,
+                text="",
+                anchor="w",
+                font=ctk.CTkFont(size=11)
+            )
+            row.pack(fill="x", padx=5, pady=1)
+            self.job_rows[job.id] = row
+        
+        color = self.colors["text_primary"]
+        if job.state == DONE:
+            color = self.colors["success"]
+        elif job.state == FAILED:
+            color = self.colors["error"]
+        row.configure(text=job.label(), text_color=color)
+        
+        if job.state == DONE:
+            reused = sum(entry["reused"] for entry in self.http.stats().values())
+            polls = self.poller.summary()
+            self.update_status(
+                f"🎉 Post #{job.id} créé dans: {job.output_path} "
+                f"(connexions réutilisées: {reused}, ~{polls.get('mean_polls', 0):.1f} polls/image)"
+            )
+            self.update_gallery_folders([job.output_path])
+        elif job.state == FAILED:
+            self.update_status(f"❌ Post #{job.id}: {job.error}")
+        
+        self.update_queue_summary()
+    
+    def update_queue_summary(self):
+        """Met à jour le compteur de la file et la barre de progression"""
+        from jobs import DONE, FAILED
+        counts = self.jobs.counts()
+        active = self.jobs.active_count()
+        self.queue_count.configure(text=f"{active} en cours | {counts[DONE]} ✅ {counts[FAILED]} ❌")
+        if active and not self.progress_running:
+            self.progress.start()
+            self.progress_running = True
+        elif not active and self.progress_running:
+            self.reset_ui()
+    
+    def refresh_pipeline_stats(self):
+        """Tableau de bord : débit, octets, retries, puis file et latences par étape (toutes les secondes)"""
+        metrics = self.metrics
+        lines = [
+            f"{metrics.rate('posts_total', status='done'):4.1f} posts/min  "
+            f"↑{metrics.counter('http_bytes_total', direction='up') / 1e6:6.1f} Mo  "
+            f"↓{metrics.counter('http_bytes_total', direction='down') / 1e6:6.1f} Mo  "
+            f"retries {metrics.counter('http_retries_total')}"
+        ]
+        for stage in self.pipeline.snapshot() if self.pipeline is not None else []:
+            timing = metrics.histogram("stage_seconds", stage=stage["stage"]) or {"mean": 0.0, "p95": 0.0}
+            lines.append(
+                f"{stage['stage']:<9}file {stage['depth']:>2}  ▶{stage['active']:>2}  "
+                f"{timing['mean']:5.1f}s  p95 {timing['p95']:5.1f}s"
+            )
+        for name, label in (("disk_write_seconds", "disque"), ("thumbnail_seconds", "miniature")):
+            timing = metrics.histogram(name)
+            if timing:
+                lines.append(f"{label:<9}{timing['count']:>5} ×  {timing['mean'] * 1000:5.0f}ms  p95 {timing['p95'] * 1000:5.0f}ms")
+        self.pipeline_label.configure(text="\n".join(lines))
+        self.window.after(1000, self.refresh_pipeline_stats)
+    
+    def refresh_limits(self):
+        """Affiche les limites courantes du limiteur d'appels API (toutes les secondes)"""
+        if self.http is not None:
+            self.limits_label.configure(text=self.http.limiter.describe())
+        self.window.after(1000, self.refresh_limits)
+    
+    def clear_finished_jobs(self):
+        """Retire les jobs terminés de la file affichée"""
+        if self.jobs is None:
+            return
+        self.jobs.clear_finished()
+        remaining = {job.id for job in self.jobs.jobs}
+        for job_id in list(self.job_rows):
+            if job_id not in remaining:
+                self.job_rows.pop(job_id).destroy()
+        self.update_queue_summary()
+    
+    def refresh_gallery(self, reconcile=True):
+        """Rafraîchit la galerie : lecture de l'index en arrière-plan, affichage page par page"""
+        if self.post_index is None:
+            return      # démarrage pas fini : start_services chargera la galerie
+        self.gallery_generation += 1
+        
+        # Les miniatures demandées par le rafraîchissement précédent ne servent plus
+        for future in self.thumbnail_futures.values():
+            future.cancel()
+        self.thumbnail_futures = {}
+        
+        threading.Thread(
+            target=self.scan_gallery,
+            args=(self.gallery_generation, self.gallery_filter, reconcile),
+            daemon=True
+        ).start()
+    
+    def on_search_change(self, event=None):
+        """Filtre la galerie quand on tape dans la recherche (après une courte pause)"""
+        if self.search_after is not None:
+            self.window.after_cancel(self.search_after)
+        self.search_after = self.window.after(150, self.apply_search)
+    
+    def apply_search(self):
+        self.search_after = None
+        text = self.search_entry.get().strip()
+        if text != self.gallery_filter:
+            self.gallery_filter = text
+            self.gallery.canvas.yview_moveto(0)
+            self.refresh_gallery(reconcile=False)
+    
+    def scan_gallery(self, generation, text, reconcile):
+        """Lit les posts dans l'index (thread) et les envoie au thread UI par pages"""
+        if not self.post_index.count():
+            self.post_index.reconcile()     # premier lancement : indexer le dossier existant
+        
+        self.send_gallery_pages(generation, text)
+        if not reconcile:
+            return
+        
+        # Posts créés, modifiés ou supprimés par un autre outil depuis le dernier lancement
+        changed = self.post_index.reconcile()
+        if len(changed) > GALLERY_PAGE:
+            self.send_gallery_pages(generation, text)
+        elif changed:
+            self.ui.post(self.apply_gallery_changes, generation, self.gallery_changes(changed))
+    
+    def send_gallery_pages(self, generation, text=""):
+        offset = 0
+        while generation == self.gallery_generation:
+            rows = self.post_index.search(text, limit=GALLERY_PAGE, offset=offset)
+            images = [item for row in rows for item in post_items(self.post_index, row)]
+            self.ui.post(self.show_gallery_page, generation, images, offset == 0)
+            if len(rows) < GALLERY_PAGE:
+                return
+            offset += GALLERY_PAGE
+    
+    def show_gallery_page(self, generation, images, first):
+        """Affiche une page d'images (la première remplace le modèle)"""
+        if generation != self.gallery_generation:
+            return
+        if first:
+            self.timings.setdefault("gallery", time.perf_counter())
+            self.gallery.set_items(images)
+        else:
+            self.gallery.extend(images)
+        self.current_images = self.gallery.items
+        self.gallery_count.configure(text=f"{len(self.current_images)} images")
+    
+    def update_gallery_folders(self, folders, reread=False):
+        """Relit quelques posts (thread) et applique le diff à la galerie"""
+        def scan():
+            self.ui.post(self.apply_gallery_changes, generation, self.gallery_changes(folders, reread))
+        
+        generation = self.gallery_generation
+        threading.Thread(target=scan, daemon=True).start()
+    
+    def gallery_changes(self, folders, reread=False):
+        """[(dossier, entrées de galerie)] depuis l'index, en relisant le disque si reread"""
+        changes = []
+        for folder in folders:
+            name = Path(folder).name
+            row = self.post_index.refresh_folder(name) if reread else self.post_index.get(name)
+            changes.append((row["created"] if row else 0, name, post_items(self.post_index, row)))
+        # Les plus récents en dernier : chaque nouveau post est inséré en tête
+        changes.sort()
+        return [(name, items) for _, name, items in changes]
+    
+    def apply_gallery_changes(self, generation, changes):
+        """Remplace les images des dossiers modifiés (thread UI)"""
+        if generation != self.gallery_generation:
+            return      # une relecture complète est en cours, elle inclura ces changements
+        if self.gallery_filter:
+            self.refresh_gallery(reconcile=False)   # refaire la recherche (le post ne correspond peut-être pas)
+            return
+        for folder, items in changes:
+            self.gallery.update_folder(folder, items)
+        self.current_images = self.gallery.items
+        self.gallery_count.configure(text=f"{len(self.current_images)} images")
+    
+    def on_output_change(self, names):
+        """Dossiers de post modifiés sur disque, signalés par le watcher (son thread)"""
+        if names is None:
+            self.ui.post(self.refresh_gallery)
+            return
+        changes = self.gallery_changes(names, reread=True)
+        self.ui.post(self.apply_gallery_changes, self.gallery_generation, changes)
+    
+    def gallery_thumbnail(self, img_info):
+        """Miniature prête (cache mémoire), sinon None et calcul dans le pool de processus"""
+        key = img_info["key"]
+        ctk_img = self.thumbnail_cache.get(key)
+        if ctk_img is not None or key in self.thumbnail_futures:
+            return ctk_img
+        
+        # Défilement rapide : abandonner les miniatures des lignes qui ne sont plus affichées
+        if len(self.thumbnail_futures) > 2 * len(self.gallery.rows):
+            shown = {row.key for row in self.gallery.rows}
+            for other in [other for other in self.thumbnail_futures if other not in shown]:
+                if self.thumbnail_futures[other].cancel():
+                    del self.thumbnail_futures[other]
+        
+        future = self.get_thumbnail_pool().submit(
+            make_thumbnail, str(img_info["path"]), str(self.thumbnail_store.root.parent), key
+        )
+        started = time.perf_counter()
+        future.add_done_callback(lambda f: self.ui.post(self.on_thumbnail_ready, key, f, started))
+        self.thumbnail_futures[key] = future
+        return None
+    
+    def get_thumbnail_pool(self):
+        """Pool de processus pour le décodage des images (créé au premier besoin)"""
+        if self.thumbnail_pool is None:
+            from concurrent.futures import ProcessPoolExecutor
+            self.thumbnail_pool = ProcessPoolExecutor(max_workers=max(1, min(4, (os.cpu_count() or 2) - 1)))
+        return self.thumbnail_pool
+    
+    def on_thumbnail_ready(self, key, future, started):
+        """Affiche une miniature calculée par le pool (thread UI)"""
+        if self.thumbnail_futures.get(key) is future:
+            del self.thumbnail_futures[key]
+        if future.cancelled():
+            return
+        try:
+            with Image.open(future.result()) as img:
+                img.load()
+                ctk_img = ctk.CTkImage(light_image=img, dark_image=img, size=(img.width, img.height))
+            self.thumbnail_cache.put(key, ctk_img)
+            self.gallery.set_thumbnail(key, ctk_img)
+            self.metrics.observe("thumbnail_seconds", time.perf_counter() - started)
+        except Exception as e:
+            print(f"Erreur thumbnail: {e}")
+    
+    def select_image(self, img_info):
+        """Sélectionne une image pour la prévisualisation"""
+        self.selected_image = img_info
+        self.image_label.configure(text=f"{img_info['folder']} - {img_info['type']}")
+        self.render_preview()
+        self.prefetch_previews(img_info)
+    
+    def preview_box(self):
+        """Taille utile de la zone de prévisualisation, en pixels écran (arrondie à 16 px)"""
+        width = self.preview_container.winfo_width() - PREVIEW_MARGIN
+        height = self.preview_container.winfo_height() - PREVIEW_MARGIN
+        if width < 64 or height < 64:
+            return (800, 600)       # zone pas encore affichée
+        return (width // 16 * 16, height // 16 * 16)
+    
+    def render_preview(self):
+        """Affiche l'image sélectionnée à la taille de la zone (prête en cache, sinon chargée en fond)"""
+        img_info = self.selected_image
+        if img_info is None:
+            return
+        box = self.preview_box()
+        ctk_img = self.preview_cache.get((img_info["key"], box))
+        if ctk_img is None:
+            self.load_preview(img_info, box)
+            ctk_img = self.stretched_preview(img_info, box)
+            if ctk_img is None:
+                return
+        self.show_preview(img_info, ctk_img)
+    
+    def stretched_preview(self, img_info, box):
+        """En attendant le bon niveau : l'image déjà affichée ou la miniature, étirée à la zone"""
+        if self.preview_shown is not None and self.preview_shown[0] == img_info["key"]:
+            source = self.preview_shown[1]
+        else:
+            source = self.thumbnail_cache.get(img_info["key"])
+        if source is None:
+            return None
+        img = source.cget("light_image")
+        scale = min(box[0] / img.width, box[1] / img.height)
+        return self.preview_ctk_image(img, (img.width * scale, img.height * scale))
+    
+    def preview_ctk_image(self, img, size):
+        """CTkImage affichée à size pixels écran (CTk applique ensuite son facteur d'échelle)"""
+        scaling = ctk.ScalingTracker.get_widget_scaling(self.preview_container)
+        size = (max(1, round(size[0] / scaling)), max(1, round(size[1] / scaling)))
+        return ctk.CTkImage(light_image=img, dark_image=img, size=size)
+    
+    def show_preview(self, img_info, ctk_img):
+        self.preview_image.configure(image=ctk_img, text="")
+        self.preview_image.image = ctk_img      # garder référence
+        self.preview_shown = (img_info["key"], ctk_img)
+    
+    def load_preview(self, img_info, box):
+        """Décode en fond le plus petit niveau qui couvre box, réduit à la zone"""
+        request = (img_info["key"], box)
+        if request in self.preview_futures:
+            return
+        path = self.previews.pick(img_info["path"], img_info["key"], box, img_info.get("size"))
+        if path == img_info["path"]:
+            self.schedule_previews(img_info["path"], img_info["key"])    # niveaux absents ou pas encore prêts
+        future = self.preview_pool.submit(load_scaled, path, box, False)
+        future.add_done_callback(lambda f: self.ui.post(self.on_preview_ready, request, f))
+        self.preview_futures[request] = future
+    
+    def on_preview_ready(self, request, future):
+        """Met en cache (et affiche si elle est toujours sélectionnée) une image décodée (thread UI)"""
+        if self.preview_futures.get(request) is future:
+            del self.preview_futures[request]
+        if future.cancelled():
+            return
+        try:
+            img = future.result()
+        except Exception as e:
+            print(f"Erreur preview: {e}")
+            return
+        ctk_img = self.preview_ctk_image(img, img.size)
+        self.preview_cache.put(request, ctk_img)
+        key, box = request
+        if self.selected_image is not None and self.selected_image["key"] == key and self.preview_box() == box:
+            self.show_preview(self.selected_image, ctk_img)
+    
+    def prefetch_previews(self, img_info):
+        """Prépare les images voisines de la sélection (clic suivant instantané)"""
+        items = self.gallery.items
+        index = next((i for i, item in enumerate(items) if item["key"] == img_info["key"]), None)
+        if index is None:
+            return
+        box = self.preview_box()
+        neighbours = [items[i] for i in (index + 1, index - 1, index + 2, index - 2) if 0 <= i < len(items)]
+        
+        # Défilement rapide : abandonner les voisines des sélections précédentes
+        wanted = {(item["key"], box) for item in neighbours + [img_info]}
+        for request in [request for request in self.preview_futures if request not in wanted]:
+            if self.preview_futures[request].cancel():
+                del self.preview_futures[request]
+        
+        for item in neighbours:
+            if self.preview_cache.get((item["key"], box)) is None:
+                self.load_preview(item, box)
+    
+    def schedule_previews(self, image_path, key=None):
+        """Calcule les niveaux de prévisualisation d'une image dans le pool de processus"""
+        try:
+            key = key or file_key(image_path)
+        except OSError:
+            return
+        if key in self.preview_jobs:
+            return
+        self.preview_jobs.add(key)
+        future = self.get_thumbnail_pool().submit(
+            make_previews, str(image_path), str(self.thumbnail_store.root.parent), key
+        )
+        future.add_done_callback(lambda done: self.ui.post(self.on_previews_done, key, done))
+    
+    def on_previews_done(self, key, future):
+        """Calcul terminé (ou en échec) : la clé sort des calculs en cours, un échec pourra être relancé"""
+        self.preview_jobs.discard(key)
+        if not future.cancelled() and future.exception() is not None:
+            print(f"Erreur prévisualisations {key}: {future.exception()}")
+    
+    def on_preview_resize(self, event):
+        """Zone de prévisualisation redimensionnée : réafficher au bon niveau une fois stable"""
+        if self.resize_after is not None:
+            self.window.after_cancel(self.resize_after)
+        self.resize_after = self.window.after(80, self.on_preview_resized)
+    
+    def on_preview_resized(self):
+        self.resize_after = None
+        if self.selected_image is not None:
+            self.render_preview()
+            self.prefetch_previews(self.selected_image)
+    
+    def open_output_folder(self):
+        """Ouvre le dossier de sortie"""
+        output_folder = self.config.get("output_folder", Path.home() / "WaveSpeed_Images")
+        os.startfile(output_folder)
+    
+    def export_gallery(self):
+        """Exporte les posts affichés (recherche en cours) aux formats des plateformes, en arrière-plan"""
+        if self.post_index is None:
+            return
+        from tkinter import filedialog
+        dest = filedialog.asksaveasfilename(
+            title="Exporter les posts affichés",
+            defaultextension=".zip",
+            initialfile=f"export_{time.strftime('%Y-%m-%d_%H-%M')}.zip",
+            filetypes=[("Archive ZIP", "*.zip")]
+        )
+        if not dest:
+            return
+        text = self.search_entry.get().strip()
+        
+        def run():
+            from export import DEFAULT_PROFILES, export_posts, resolve_profiles, select_posts
+            try:
+                profiles = resolve_profiles(
+                    self.config.get("export_profiles", list(DEFAULT_PROFILES)),
+                    self.config.get("export_custom_profiles")
+                )
+                rows = select_posts(self.post_index, search=text)
+                manifest = export_posts(
+                    rows, self.post_index.root, dest, profiles,
+                    workers=self.config.get("export_workers") or None,
+                    on_progress=lambda done, total: self.ui.post(self.update_status, f"📦 Export: {done}/{total} images")
+                )
+            except Exception as e:
+                self.ui.post(self.show_error, f"Export impossible: {e}")
+                return
+            errors = f", {len(manifest['errors'])} erreurs" if manifest["errors"] else ""
+            self.ui.post(self.update_status, f"📦 {len(manifest['posts'])} posts exportés dans {dest}{errors}")
+        
+        self.update_status("📦 Export en cours...")
+        threading.Thread(target=run, name="export", daemon=True).start()
+    
+    def copy_prompt(self):
+        """Copie le prompt dans le presse-papier (pris dans l'index pour un post archivé)"""
+        if not self.selected_image:
+            return
+        folder = self.selected_image["path"].parent
+        try:
+            prompts = folder / "prompts.txt"
+            if prompts.exists():
+                content = prompts.read_text(encoding='utf-8')
+            else:
+                # Post archivé : le dossier affiché est celui des aperçus, les prompts sont dans l'index
+                row = self.post_index.get(folder.name) if self.post_index is not None else None
+                if row is None or not (row["prompt_a"] or row["prompt_b"]):
+                    self.update_status(f"❌ Prompt introuvable pour {folder.name}")
+                    return
+                content = f"PROMPT A:\n{row['prompt_a']}\n\nPROMPT B:\n{row['prompt_b']}"
+            self.window.clipboard_clear()
+            self.window.clipboard_append(content)
+        except Exception as e:
+            self.update_status(f"❌ Copie du prompt impossible: {e}")
+            return
+        self.update_status("📋 Prompt copié!")
+    
+    def delete_selected(self):
+        """Supprime l'image sélectionnée (le post entier s'il n'a plus d'image ou s'il est archivé)"""
+        if self.selected_image and self.storage is not None:
+            from tkinter import messagebox
+            image = self.selected_image
+            question = "Supprimer ce post archivé (A et B) ?" if image.get("archived") else "Supprimer cette image ?"
+            if messagebox.askyesno("Confirmer", question):
+                self.thumbnail_cache.discard_path(image["path"])
+                self.gallery.remove(image["key"])
+                self.gallery_count.configure(text=f"{len(self.gallery.items)} images")
+                self.preview_image.configure(image="", text="📷 Aucune image sélectionnée")
+                self.selected_image = None
+                self.preview_shown = None
+                self.run_storage(lambda: self.storage.delete_image(image["path"]), [image["path"].parent])
+    
+    def clean_storage(self):
+        """Calcule (en fond) ce que les règles de rétention et le nettoyage retireraient, puis demande confirmation"""
+        if self.storage is None:
+            return
+        policy = retention_policy(self.config)
+        
+        def scan():
+            self.post_index.reconcile()
+            skipped = []
+            rows = self.storage.plan(**policy, skipped=skipped)
+            self.ui.post(self.confirm_clean_storage, policy, rows, self.storage.find_orphans(), skipped)
+        
+        self.update_status("🧹 Analyse du dossier de sortie...")
+        threading.Thread(target=scan, name="storage-scan", daemon=True).start()
+    
+    def confirm_clean_storage(self, policy, rows, orphans, skipped=()):
+        from tkinter import messagebox
+        from storage import describe_skips
+        verb = "supprimés" if policy["action"] == "delete" else "archivés"
+        size = sum((row["a_size"] or 0) + (row["b_size"] or 0) for row in rows)
+        size += sum(orphan[1] for orphan in orphans)
+        skips = {}
+        for _, reason in skipped:
+            skips[reason] = skips.get(reason, 0) + 1
+        if not rows and not orphans:
+            self.update_status("🧹 Rien à nettoyer" + (f" ({describe_skips(skips)})" if skips else ""))
+            return
+        kept = f"\n\nLaissés en place : {describe_skips(skips)}." if skips else ""
+        if messagebox.askyesno(
+            "Nettoyer le dossier de sortie",
+            f"{len(rows)} posts seront {verb} et {len(orphans)} fichiers orphelins supprimés "
+            f"(~{size / 1e6:.0f} Mo). Continuer ?{kept}"
+        ):
+            self.run_storage(lambda: self.storage.apply(
+                on_progress=lambda done, total: self.ui.post(self.update_status, f"🧹 {done}/{total} posts"),
+                **policy
+            ))
+    
+    def run_storage(self, operation, folders=None):
+        """Exécute une opération de StorageManager dans un thread, puis affiche l'espace libéré"""
+        def run():
+            try:
+                report = operation()
+            except Exception as e:
+                self.ui.post(self.show_error, str(e))
+                return
+            self.ui.post(self.on_storage_done, report, folders)
+        
+        threading.Thread(target=run, name="storage", daemon=True).start()
+    
+    def on_storage_done(self, report, folders=None):
+        from storage import describe
+        self.update_status(describe(report))
+        for error in report["errors"]:
+            print(f"Erreur nettoyage: {error}")
+        if folders:
+            self.update_gallery_folders(folders)
+        else:
+            self.refresh_gallery(reconcile=False)
+    
+    def update_status(self, message):
+        """Met à jour le statut"""
+        self.status_label.configure(text=message)
+    
+    def reset_ui(self):
+        """Réinitialise l'interface"""
+        self.progress.stop()
+        self.progress.set(0)
+        self.progress_running = False
+    
+    def show_error(self, message):
+        """Affiche une erreur"""
+        from tkinter import messagebox
+        messagebox.showerror("Erreur", message)
+    
+    def show_success(self, message):
+        """Affiche un succès"""
+        from tkinter import messagebox
+        messagebox.showinfo("Succès", message)
+    
+    def run(self):
+        """Lance l'application, puis l'arrête proprement"""
+        self.window.mainloop()
+        self.shutdown()
+    
+    def shutdown(self):
+        """Ferme les services, des producteurs aux écritures : pipeline et client sur leur boucle, puis SQLite et mesures"""
+        if self.watcher is not None:
+            self.watcher.stop()
+        if self.loop is not None:
+            for service in (self.pipeline, self.client):
+                if service is None:
+                    continue
+                try:
+                    self.loop.submit(service.close()).result(SHUTDOWN_TIMEOUT)
+                except Exception as e:
+                    print(f"Erreur à l'arrêt de {type(service).__name__}: {e}")
+        # Ordonnanceur et session passés au client : c'est à l'application de les fermer
+        if self.poller is not None:
+            self.poller.close()
+        if self.http is not None:
+            self.http.close()
+        self.preview_pool.shutdown(wait=False, cancel_futures=True)
+        if self.thumbnail_pool is not None:
+            self.thumbnail_pool.shutdown(wait=False, cancel_futures=True)
+        if self.post_index is not None:
+            self.post_index.close()
+        if self.results is not None:
+            self.results.close()
+        if self.loop is not None:
+            self.loop.stop()
+        # Dernier export des mesures, une fois tout le reste arrêté
+        if self.exporter is not None:
+            self.exporter.stop()
@@ -0,0 +1,272 @@
+# batch.py - Mode batch sans interface : python main.py batch manifest.jsonl
+"""Génère des posts à partir d'un manifeste JSONL, sans interface graphique.
+
+Chaque ligne du manifeste est un objet JSON :
+
+    {"prompt_a": "...", "prompt_b": "...", "caption": "..."}
+
+("lora_path" est optionnel et remplace celui de config.json pour ce post ;
+"reuse" remplace l'option --reuse / --force pour ce post.)
+
+L'état de chaque entrée est ajouté dans <manifeste>.state.jsonl : au
+lancement suivant, les entrées déjà terminées sont sautées et celles en
+échec ou ignorées sont relancées. Les posts interrompus en pleine
+génération (journal des posts) sont repris là où ils s'étaient arrêtés.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+from config import CONFIG_FILE, load_config, client_options, metrics_exporter, rate_limiter, result_cache
+from jobs import Job
+from journal import JobJournal
+from metrics import Metrics
+from pipeline import Pipeline
+from post_index import PostIndex
+from wavespeed_async import AsyncWaveSpeedClient
+from wavespeed_client import HttpClient, PollScheduler
+
+
+def entry_key(lineno, record):
+    """Identifiant stable d'une entrée (numéro de ligne + contenu)"""
+    content = json.dumps([record.get("prompt_a"), record.get("prompt_b"), record.get("caption")])
+    return f"{lineno}:{hashlib.sha1(content.encode('utf-8')).hexdigest()[:12]}"
+
+
+def load_state(state_path):
+    """Dernier statut connu de chaque entrée"""
+    state = {}
+    if state_path.exists():
+        with open(state_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    record = json.loads(line)
+                    state[record["key"]] = record
+    return state
+
+
+def read_manifest(manifest_path):
+    """Lit le manifeste ligne par ligne : (numéro, entrée, erreur ou None)"""
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield lineno, {}, f"JSON invalide: {e}"
+                continue
+            if not record.get("prompt_a") or not record.get("prompt_b"):
+                yield lineno, record, "prompt_a et prompt_b sont obligatoires"
+            else:
+                yield lineno, record, None
+
+
+class BatchRunner:
+    """Fait passer les entrées du manifeste dans le pipeline avec une concurrence bornée"""
+    
+    def __init__(self, client, config, manifest_path, concurrency, index=None, cache=None, journal=None,
+                 metrics=None):
+        self.client = client
+        self.config = config
+        self.manifest_path = Path(manifest_path)
+        self.state_path = self.manifest_path.with_name(self.manifest_path.name + ".state.jsonl")
+        self.concurrency = max(1, concurrency)
+        self.counts = {"done": 0, "failed": 0, "skipped": 0, "already_done": 0}
+        self.journal = journal
+        self.pipeline = Pipeline(
+            max_in_flight=self.concurrency, index=index, cache=cache, journal=journal, metrics=metrics
+        )
+    
+    def record(self, key, status, **extra):
+        """Ajoute le statut d'une entrée dans le fichier d'état"""
+        self.counts[status] += 1
+        with open(self.state_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({"key": key, "status": status, "time": time.time(), **extra}) + "\n")
+    
+    def source(self, key):
+        """Origine d'un post dans le journal : manifeste + clé de l'entrée"""
+        return f"{self.manifest_path.resolve()}#{key}"
+    
+    def interrupted(self, state):
+        """Posts de ce manifeste interrompus pendant leur génération {clé: état du journal}"""
+        if self.journal is None:
+            return {}
+        prefix = self.source("")
+        return {
+            post["source"][len(prefix):]: post
+            for post in self.journal.unfinished()
+            if post.get("source", "").startswith(prefix)
+            and state.get(post["source"][len(prefix):], {}).get("status") != "done"
+        }
+    
+    async def run(self):
+        state = load_state(self.state_path)
+        slots = asyncio.Semaphore(self.concurrency)
+        tasks = set()
+        
+        resumed = self.interrupted(state)
+        for key, post in resumed.items():
+            print(f"🔁 Ligne {key.split(':')[0]}: reprise de {post['post']}")
+            await slots.acquire()
+            task = asyncio.create_task(self.run_entry(key.split(":")[0], key, post, resume=post))
+            task.add_done_callback(lambda t: slots.release())
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        
+        for lineno, record, error in read_manifest(self.manifest_path):
+            key = entry_key(lineno, record)
+            if key in resumed:
+                continue
+            if state.get(key, {}).get("status") == "done":
+                self.counts["already_done"] += 1
+                continue
+            if error:
+                print(f"⚠️ Ligne {lineno} ignorée: {error}")
+                self.record(key, "skipped", error=error)
+                continue
+            
+            # Lecture du manifeste au fil de l'eau : on attend une place libre
+            await slots.acquire()
+            task = asyncio.create_task(self.run_entry(lineno, key, record))
+            task.add_done_callback(lambda t: slots.release())
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        
+        if tasks:
+            await asyncio.gather(*tasks)
+        await self.pipeline.close()
+        return self.counts
+    
+    def print_stages(self):
+        """Profondeur et latences par étape du pipeline"""
+        for stage in self.pipeline.snapshot():
+            print(
+                f"   {stage['stage']:<9} {stage['done']:>5} traités  attente {stage['wait']:6.2f}s  "
+                f"moyenne {stage['mean']:6.2f}s  p95 {stage['p95']:6.2f}s  erreurs {stage['errors']}"
+            )
+    
+    async def run_entry(self, lineno, key, record, resume=None):
+        job = Job(
+            self.client.api_key,
+            record.get("lora_path") or self.config.get("lora_path", ""),
+            record["prompt_a"],
+            record["prompt_b"],
+            record.get("caption", ""),
+            reuse=record.get("reuse", self.config.get("reuse_results", False)),
+            source=self.source(key),
+            resume=resume
+        )
+        started = time.monotonic()
+        try:
+            if resume:
+                output_path = await self.pipeline.resume_post(self.client, job, resume, lambda state, step: None)
+            else:
+                output_path = await self.pipeline.run_post(
+                    self.client, job, self.config["output_folder"], lambda state, step: None
+                )
+        except Exception as e:
+            print(f"❌ Ligne {lineno}: {e}")
+            self.record(key, "failed", error=str(e), folder=str(job.output_path or ""))
+            return
+        seconds = time.monotonic() - started
+        print(f"✅ Ligne {lineno}: {output_path} ({seconds:.1f}s)")
+        self.record(key, "done", folder=str(output_path), seconds=round(seconds, 3))
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="main.py batch", description="Génère des posts depuis un manifeste JSONL")
+    parser.add_argument("manifest", help="fichier JSONL (prompt_a, prompt_b, caption)")
+    parser.add_argument("--config", default=str(CONFIG_FILE), help="fichier de configuration (défaut: config.json)")
+    parser.add_argument("--concurrency", type=int, help="posts en parallèle (défaut: max_workers)")
+    parser.add_argument("--output", help="dossier de sortie (défaut: output_folder)")
+    parser.add_argument("--lora", help="image LoRa (défaut: lora_path)")
+    reuse = parser.add_mutually_exclusive_group()
+    reuse.add_argument("--reuse", dest="reuse", action="store_true", default=None,
+                       help="réutiliser les images déjà générées pour une requête identique")
+    reuse.add_argument("--force", dest="reuse", action="store_false", help="toujours relancer la génération")
+    return parser.parse_args(argv)
+
+
+async def run_batch(args, config):
+    metrics = Metrics()
+    exporter = metrics_exporter(config, metrics)
+    if exporter is not None:
+        exporter.start()
+    http = HttpClient(pool_size=args.concurrency * 2 + 2, limiter=rate_limiter(config), metrics=metrics)
+    poller = PollScheduler(
+        http,
+        deadline=config.get("poll_deadline", 120),
+        stats_path=Path(config["output_folder"]) / "poll_stats.jsonl"
+    )
+    client = AsyncWaveSpeedClient(
+        config["api_key"],
+        http=http,
+        poller=poller,
+        io_workers=args.concurrency * 2 + 2,
+        **client_options(config)
+    )
+    index = PostIndex(config["output_folder"])
+    cache = result_cache(config)
+    journal = JobJournal(config["output_folder"])
+    journal.compact()
+    async with client:
+        runner = BatchRunner(
+            client, config, args.manifest, args.concurrency,
+            index=index, cache=cache, journal=journal, metrics=metrics
+        )
+        counts = await runner.run()
+        runner.print_stages()
+        print(f"   {http.limiter.describe()}")
+        print(
+            f"   ↑ {metrics.counter('http_bytes_total', direction='up') / 1e6:.1f} Mo  "
+            f"↓ {metrics.counter('http_bytes_total', direction='down') / 1e6:.1f} Mo  "
+            f"retries {metrics.counter('http_retries_total')}"
+        )
+    index.close()
+    if cache is not None:
+        if config.get("reuse_results"):
+            print(f"♻️ Cache des résultats: {cache.hits} réutilisés, {cache.misses} générés")
+        cache.close()
+    poller.close()
+    http.close()
+    if exporter is not None:
+        exporter.stop()
+        print(f"📊 Mesures: {exporter.path}")
+    return counts
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    config = load_config(args.config)
+    config["api_key"] = os.environ.get("WAVESPEED_API_KEY") or config.get("api_key", "")
+    if args.output:
+        config["output_folder"] = args.output
+    if args.lora:
+        config["lora_path"] = args.lora
+    if args.reuse is not None:
+        config["reuse_results"] = args.reuse
+    config.setdefault("output_folder", str(Path.home() / "WaveSpeed_Images"))
+    args.concurrency = args.concurrency or config.get("max_workers", 3)
+    
+    if not config["api_key"]:
+        print("❌ Clé API manquante (config.json ou variable WAVESPEED_API_KEY)")
+        return 2
+    if not Path(args.manifest).exists():
+        print(f"❌ Manifeste introuvable: {args.manifest}")
+        return 2
+    
+    started = time.monotonic()
+    counts = asyncio.run(run_batch(args, config))
+    print(
+        f"🎉 Terminé en {time.monotonic() - started:.1f}s : {counts['done']} générés, "
+        f"{counts['failed']} en échec, {counts['skipped']} ignorés, {counts['already_done']} déjà faits"
+    )
+    return 1 if counts["failed"] else 0
@@ -0,0 +1,117 @@
+# benchmarks/bench_decode.py - Décodage des miniatures/previews : complet vs draft JPEG
+"""Compare le temps de décodage et la mémoire max par image.
+
+    python -m benchmarks.bench_decode                  # images de test générées
+    python -m benchmarks.bench_decode C:/.../A.jpg ... # vraies images
+
+Chaque variante tourne dans un sous-processus pour mesurer sa mémoire
+maximale (VmHWM / ru_maxrss, non disponible sous Windows).
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Lancé comme script (python benchmarks/bench_decode.py) : la racine du dépôt sur le chemin d'import
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+VARIANTS = {
+    "thumb_sans_draft": ((150, 200), "nodraft"),
+    "thumb_actuel": ((150, 200), "full"),
+    "thumb_draft": ((150, 200), "fast"),
+    "preview_actuel": ((800, 600), "full"),
+    "preview_draft": ((800, 600), "quality"),
+}
+
+
+def decode(paths, size, mode):
+    """Décode chaque image avec la méthode demandée ; renvoie la durée moyenne (ms)"""
+    from PIL import Image
+    
+    from thumbnails import load_scaled
+    
+    started = time.perf_counter()
+    for path in paths:
+        if mode == "nodraft":
+            # Décodage pleine résolution forcé (référence)
+            with Image.open(path) as img:
+                img.load()
+                img.resize((size[0], size[0] * img.height // img.width))
+        elif mode == "full":
+            # Chemin d'origine : Image.thumbnail (Pillow demande déjà un draft)
+            with Image.open(path) as img:
+                img.thumbnail(size)
+        else:
+            with load_scaled(path, size, fast=(mode == "fast")) as img:
+                img.load()
+    return (time.perf_counter() - started) * 1000 / len(paths)
+
+
+def peak_rss_mb():
+    """Mémoire résidente maximale du processus (Mo)"""
+    # VmHWM repart de zéro à l'exec, contrairement à ru_maxrss sous Linux
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 if sys.platform != "darwin" else peak / (1024 * 1024)
+
+
+def worker(variant, paths):
+    from PIL import Image  # noqa: F401  (import hors mesure)
+    
+    size, mode = VARIANTS[variant]
+    baseline = peak_rss_mb()
+    ms = decode(paths, size, mode)
+    peak = peak_rss_mb()
+    print(json.dumps({"ms": ms, "peak_mb": None if peak is None else peak - baseline}))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("images", nargs="*", help="images JPEG à décoder (défaut: images générées)")
+    parser.add_argument("--count", type=int, default=20, help="nombre d'images générées")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    
+    if args.worker:
+        return worker(args.worker, args.images)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = args.images
+        if not paths:
+            from mock_server import make_jpeg
+            
+            data = make_jpeg(1152, 2048)
+            paths = []
+            for i in range(args.count):
+                path = Path(tmp) / f"{i}.jpg"
+                path.write_bytes(data)
+                paths.append(str(path))
+        
+        print(f"{len(paths)} images")
+        print(f"{'variante':16} {'ms/image':>9} {'mémoire max':>12}")
+        for variant in VARIANTS:
+            out = subprocess.run(
+                [sys.executable, str(Path(__file__).resolve()), "--worker", variant, *paths],
+                capture_output=True, text=True, check=True
+            )
+            result = json.loads(out.stdout)
+            peak = "n/a" if result["peak_mb"] is None else f"{result['peak_mb']:.1f} Mo"
+            print(f"{variant:16} {result['ms']:9.1f} {peak:>12}")
+
+
+if __name__ == "__main__":
+    main()
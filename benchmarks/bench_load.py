@@ -0,0 +1,173 @@
+# benchmarks/bench_load.py - Charge de bout en bout sur le faux serveur : débit, latences, mémoire
+"""Fait passer N posts par le pipeline complet, à plusieurs niveaux de concurrence.
+
+    python -m benchmarks.bench_load --posts 40 --concurrency 1,4,8
+    python -m benchmarks.bench_load --failure-rate 0.1 --error-rate 0.05
+    python -m benchmarks.bench_load --max-tasks 4 --concurrency 8
+
+Le faux serveur (mock_server.py) tourne dans ce processus ; chaque niveau
+de concurrence est exécuté dans un sous-processus (client, pipeline et
+téléchargements) pour mesurer sa mémoire maximale. Affiche le débit, les
+latences p50/p95/p99 par post, les échecs, les octets échangés et la
+mémoire max. Avec --max-tasks, le faux serveur refuse en 429 au-delà de
+ce nombre de générations en cours : le limiteur du client doit ralentir
+sans faire échouer de posts.
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Lancé comme script (python benchmarks/bench_load.py) : la racine du dépôt sur le chemin d'import
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.bench_decode import peak_rss_mb
+
+
+def percentile(values, fraction):
+    """Percentile par rang (valeurs triées)"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+async def run_posts(url, posts, concurrency, latency, workdir, limits):
+    """Génère posts posts avec au plus concurrency en vol ; renvoie (latences, échecs)"""
+    from jobs import Job
+    from mock_server import make_jpeg
+    from pipeline import Pipeline
+    from rate_limit import RateLimiter
+    from wavespeed_async import AsyncWaveSpeedClient
+    from wavespeed_client import HttpClient, PollScheduler
+    
+    lora = workdir / "lora.jpg"
+    lora.write_bytes(make_jpeg(1024, 1536))
+    limiter = RateLimiter(**limits, max_concurrency=concurrency)
+    http = HttpClient(pool_size=concurrency * 2 + 2, limiter=limiter)
+    poller = PollScheduler(http, deadline=max(30, latency * 10))
+    poller.estimator.observe(latency)
+    client = AsyncWaveSpeedClient("bench", http=http, poller=poller, io_workers=concurrency * 2 + 2, api_base=url)
+    pipeline = Pipeline(max_in_flight=concurrency)
+    slots = asyncio.Semaphore(concurrency)
+    latencies = []
+    failures = []
+    
+    async def one(i):
+        async with slots:
+            job = Job("bench", str(lora), f"prompt A {i}", f"prompt B {i}")
+            started = time.perf_counter()
+            try:
+                await pipeline.run_post(client, job, workdir / "posts", lambda state, step: None)
+            except Exception as e:
+                failures.append(str(e))
+                return
+            latencies.append(time.perf_counter() - started)
+    
+    async with client:
+        await asyncio.gather(*(one(i) for i in range(posts)))
+        await pipeline.close()
+    http.close()
+    return sorted(latencies), failures, limiter.snapshot()
+
+
+def worker(args):
+    import requests  # noqa: F401  (imports hors mesure)
+    from PIL import Image  # noqa: F401
+    
+    baseline = peak_rss_mb()
+    with tempfile.TemporaryDirectory() as tmp:
+        started = time.perf_counter()
+        limits = {"submits_per_minute": args.submits_per_minute, "polls_per_second": args.polls_per_second}
+        latencies, failures, limiter = asyncio.run(
+            run_posts(args.url, args.posts, args.worker, args.latency, Path(tmp), limits)
+        )
+        elapsed = time.perf_counter() - started
+    peak = peak_rss_mb()
+    print(json.dumps({
+        "elapsed": elapsed,
+        "latencies": latencies,
+        "failures": len(failures),
+        "final_limit": limiter["limit"],
+        "peak_mb": None if peak is None else peak - baseline,
+    }))
+
+
+def main(argv=None):
+    from mock_server import MockWaveSpeed, parse_sizes
+    
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=24)
+    parser.add_argument("--concurrency", default="1,4,8", help="niveaux de concurrence, ex. 1,4,8")
+    parser.add_argument("--latency", type=float, default=1.0, help="durée simulée d'une génération (s)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="part des tâches en échec (0-1)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="part des submits en erreur 500 (0-1)")
+    parser.add_argument("--sizes", type=parse_sizes, default=None, help="tailles des images, ex. 1152x2048,768x1344")
+    parser.add_argument("--max-tasks", type=int, default=0, help="générations simultanées acceptées par le serveur")
+    parser.add_argument("--submits-per-minute", type=int, default=600, help="débit de submits du client")
+    parser.add_argument("--polls-per-second", type=int, default=50, help="débit de polls du client")
+    parser.add_argument("--json", help="écrit aussi les résultats dans ce fichier (suivi des régressions)")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--url", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    
+    if args.worker:
+        return worker(args)
+    
+    mock = MockWaveSpeed(
+        latency=args.latency,
+        failure_rate=args.failure_rate,
+        error_rate=args.error_rate,
+        output_sizes=args.sizes,
+        max_tasks=args.max_tasks
+    ).start()
+    results = []
+    print(f"{args.posts} posts, génération simulée {args.latency:.1f}s")
+    print(
+        f"{'concurrence':>11} {'posts/min':>10} {'p50 (s)':>8} {'p95 (s)':>8} {'p99 (s)':>8} "
+        f"{'échecs':>7} {'429':>5} {'envoyé':>9} {'reçu':>9} {'mémoire max':>12}"
+    )
+    for concurrency in [int(n) for n in args.concurrency.split(",")]:
+        before = json.loads(json.dumps(mock.stats))
+        out = subprocess.run(
+            [sys.executable, str(Path(__file__).resolve()), "--worker", str(concurrency), "--url", mock.url,
+             "--posts", str(args.posts), "--latency", str(args.latency),
+             "--submits-per-minute", str(args.submits_per_minute), "--polls-per-second", str(args.polls_per_second)],
+            capture_output=True, text=True, check=True
+        )
+        run = json.loads(out.stdout.strip().splitlines()[-1])
+        latencies = run["latencies"]
+        result = {
+            "concurrency": concurrency,
+            "posts": args.posts,
+            "failures": run["failures"],
+            "throttled": mock.stats["throttled"] - before["throttled"],
+            "final_limit": run["final_limit"],
+            "posts_per_min": len(latencies) * 60 / run["elapsed"],
+            "p50": percentile(latencies, 0.50),
+            "p95": percentile(latencies, 0.95),
+            "p99": percentile(latencies, 0.99),
+            "bytes_in": mock.stats["bytes_in"] - before["bytes_in"],
+            "bytes_out": mock.stats["bytes_out"] - before["bytes_out"],
+            "peak_mb": run["peak_mb"],
+        }
+        results.append(result)
+        peak = "n/a" if result["peak_mb"] is None else f"{result['peak_mb']:.1f} Mo"
+        print(
+            f"{concurrency:>11} {result['posts_per_min']:10.1f} {result['p50']:8.2f} {result['p95']:8.2f} "
+            f"{result['p99']:8.2f} {result['failures']:>7} {result['throttled']:>5} {result['bytes_in'] / 1e6:7.1f}Mo "
+            f"{result['bytes_out'] / 1e6:7.1f}Mo {peak:>12}"
+        )
+    mock.stop()
+    
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
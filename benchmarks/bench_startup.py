@@ -0,0 +1,147 @@
+# benchmarks/bench_startup.py - Démarrage à froid : temps d'import et premier affichage de la fenêtre
+"""Mesure le démarrage de l'interface, chargement différé vs tout importé d'avance.
+
+    python -m benchmarks.bench_startup --runs 5
+    python -m benchmarks.bench_startup --json demarrage.json
+    python -m benchmarks.bench_startup --baseline demarrage.json
+
+Chaque mesure est un interpréteur neuf (sous-processus), comme au
+lancement de l'application. La variante "avant" importe en plus, avant
+de créer la fenêtre, les modules que app.py chargeait au niveau module
+(requests, asyncio, sqlite3, PIL.ImageTk, multiprocessing) : c'est le
+démarrage d'origine. Les temps sont comptés depuis le lancement du
+processus : import de app, premier affichage, services prêts, première
+page de la galerie. Sans affichage (pas de $DISPLAY), seuls les imports
+sont mesurés.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Lancé comme script (python benchmarks/bench_startup.py) : la racine du dépôt sur le chemin d'import
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+ROOT = Path(__file__).resolve().parent.parent
+EAGER_MODULES = ("multiprocessing", "PIL.ImageTk", "jobs", "pipeline", "post_index", "wavespeed_async")
+STEPS = ("import", "first_paint", "services", "gallery")
+
+
+def child(args):
+    """Lancé dans le sous-processus : importe, ouvre la fenêtre, renvoie les temps (s depuis le lancement)"""
+    import importlib
+    
+    spawned = args.spawned
+    if args.eager:
+        for name in EAGER_MODULES:
+            importlib.import_module(name)
+    from app import ModernWaveSpeedApp
+    result = {"import": time.time() - spawned}
+    if not args.window:
+        print(json.dumps(result))
+        return
+    
+    app = ModernWaveSpeedApp()
+    offset = time.time() - time.perf_counter()
+    
+    def check():
+        done = "gallery" in app.timings or time.time() - spawned > args.timeout
+        if not done:
+            app.window.after(10, check)
+            return
+        for step in STEPS[1:]:
+            if step in app.timings:
+                result[step] = app.timings[step] + offset - spawned
+        app.window.destroy()
+    
+    app.window.after(10, check)
+    app.window.mainloop()
+    if app.exporter is not None:
+        app.exporter.stop()
+    print(json.dumps(result))
+
+
+def measure(variant, window, workdir, timeout):
+    """Une mesure dans un interpréteur neuf ; renvoie {étape: secondes}"""
+    command = [sys.executable, str(ROOT / "benchmarks" / "bench_startup.py"), "--child", "--spawned", repr(time.time()),
+               "--timeout", str(timeout)]
+    if variant == "avant":
+        command.append("--eager")
+    if window:
+        command.append("--window")
+    env = dict(os.environ, PYTHONPATH=str(ROOT) + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    out = subprocess.run(command, cwd=workdir, env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def bare_interpreter(runs):
+    """Démarrage de l'interpréteur seul (référence, en s)"""
+    durations = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+        durations.append(time.perf_counter() - started)
+    return statistics.median(durations)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="mesures par variante (médiane)")
+    parser.add_argument("--timeout", type=float, default=20.0, help="attente max de la galerie (s)")
+    parser.add_argument("--json", help="écrit aussi les résultats dans ce fichier (suivi des régressions)")
+    parser.add_argument("--baseline", help="fichier --json d'une mesure précédente à comparer")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--eager", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--window", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--spawned", type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    
+    if args.child:
+        return child(args)
+    
+    window = bool(os.environ.get("DISPLAY")) or sys.platform in ("win32", "darwin")
+    if not window:
+        print("Pas d'affichage ($DISPLAY) : premier affichage non mesuré, imports seulement")
+    
+    results = {"interpreter": bare_interpreter(args.runs)}
+    with tempfile.TemporaryDirectory() as tmp:
+        # Configuration et dossier de sortie jetables : la vraie galerie n'est pas touchée
+        workdir = Path(tmp)
+        (workdir / "config.json").write_text(json.dumps({"output_folder": str(workdir / "out")}))
+        for variant in ("avant", "après"):
+            runs = [measure(variant, window, workdir, args.timeout) for _ in range(args.runs)]
+            results[variant] = {
+                step: statistics.median(run[step] for run in runs)
+                for step in STEPS if all(step in run for run in runs)
+            }
+    
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    
+    print(f"interpréteur seul : {results['interpreter'] * 1000:.0f} ms (médiane de {args.runs})")
+    print(f"{'étape':<12} {'avant (ms)':>11} {'après (ms)':>11} {'gain':>7}" + (f" {'référence':>10}" if baseline else ""))
+    for step in STEPS:
+        if step not in results["après"]:
+            continue
+        before, after = results["avant"].get(step), results["après"][step]
+        line = f"{step:<12} {before * 1000:11.0f} {after * 1000:11.0f} {(before - after) * 1000:6.0f}ms"
+        if baseline:
+            reference = baseline.get("après", {}).get(step)
+            line += f" {reference * 1000:8.0f}ms" if reference is not None else f" {'-':>10}"
+        print(line)
+    
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
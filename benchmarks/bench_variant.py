@@ -0,0 +1,76 @@
+# benchmarks/bench_variant.py - Coût de la variante B selon la référence à l'image A
+"""Compare inline (base64), url et upload pour la génération de B.
+
+    python -m benchmarks.bench_variant --posts 20
+
+Lance le faux serveur local (mock_server.py), génère les posts avec
+chaque mode (par le Pipeline de l'application) et affiche le temps par post et les octets envoyés au
+serveur par post.
+"""
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Lancé comme script (python benchmarks/bench_variant.py) : la racine du dépôt sur le chemin d'import
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from jobs import Job
+from mock_server import MockWaveSpeed, make_jpeg
+from pipeline import Pipeline
+from wavespeed_async import VARIANT_REFERENCES, AsyncWaveSpeedClient
+
+
+async def run_mode(mode, posts, latency, workdir):
+    mock = MockWaveSpeed(latency=latency).start()
+    lora = workdir / "lora.jpg"
+    lora.write_bytes(make_jpeg(1024, 1536))
+    client = AsyncWaveSpeedClient("bench", api_base=mock.url, variant_reference=mode, io_workers=16)
+    client.poller.estimator.observe(latency)
+    pipeline = Pipeline(max_in_flight=posts)
+    
+    async def one(i):
+        job = Job("bench", str(lora), f"prompt A {i}", f"prompt B {i}")
+        started = time.perf_counter()
+        await pipeline.run_post(client, job, workdir / mode, lambda state, step: None)
+        return time.perf_counter() - started
+    
+    started = time.perf_counter()
+    async with client:
+        latencies = await asyncio.gather(*(one(i) for i in range(posts)))
+        await pipeline.close()
+    elapsed = time.perf_counter() - started
+    stats = dict(mock.stats)
+    mock.stop()
+    return {
+        "mode": mode,
+        "elapsed": elapsed,
+        "mean_post": sum(latencies) / len(latencies),
+        "bytes_up_per_post": stats["bytes_in"] / posts,
+        "bytes_down_per_post": stats["bytes_out"] / posts,
+        "fallbacks": client.fallbacks,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.5, help="durée simulée d'une génération (s)")
+    args = parser.parse_args(argv)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        results = [asyncio.run(run_mode(mode, args.posts, args.latency, Path(tmp))) for mode in VARIANT_REFERENCES]
+    
+    print(f"{'mode':8} {'total (s)':>10} {'post (s)':>9} {'envoyé/post':>12} {'reçu/post':>10} {'fallbacks':>9}")
+    for r in results:
+        print(
+            f"{r['mode']:8} {r['elapsed']:10.2f} {r['mean_post']:9.2f} "
+            f"{r['bytes_up_per_post'] / 1024:10.0f}Ko {r['bytes_down_per_post'] / 1024:8.0f}Ko {r['fallbacks']:9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
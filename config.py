@@ -0,0 +1,98 @@
+# config.py - Chargement de config.json (partagé par l'interface et le mode batch)
+import json
+from pathlib import Path
+
+CONFIG_FILE = Path("config.json")
+
+
+def default_config():
+    """Configuration par défaut"""
+    return {
+        "api_key": "",
+        "lora_path": "",
+        "output_folder": str(Path.home() / "WaveSpeed_Images"),
+        "max_workers": 3,
+        "poll_deadline": 120,
+        "lora_max_side": 0,
+        "lora_quality": 90,
+        "variant_reference": "url",
+        "result_cache_mb": 2048,
+        "reuse_results": False,
+        "submits_per_minute": 30,
+        "polls_per_second": 5,
+        "max_concurrency": 8,
+        "metrics_file": "metrics.prom",
+        "metrics_interval": 15,
+        "export_profiles": ["instagram", "threads"],
+        "export_workers": 0,
+        "retention_days": 0,
+        "retention_max_posts": 0,
+        "retention_max_gb": 0,
+        "retention_action": "archive",
+        "archive_quality": 0
+    }
+
+
+def load_config(path=CONFIG_FILE):
+    """Charge la configuration (valeurs par défaut si le fichier n'existe pas)"""
+    path = Path(path)
+    if path.exists():
+        with open(path, 'r') as f:
+            return json.load(f)
+    return default_config()
+
+
+def save_config(config, path=CONFIG_FILE):
+    """Sauvegarde la configuration"""
+    with open(path, 'w') as f:
+        json.dump(config, f, indent=2)
+
+
+def client_options(config):
+    """Options du client WaveSpeed tirées de config.json"""
+    from wavespeed_async import ReferenceCache
+    from wavespeed_client import API_BASE
+    return {
+        "api_base": config.get("api_base", API_BASE),
+        "references": ReferenceCache(max_side=config.get("lora_max_side", 0), quality=config.get("lora_quality", 90)),
+        "variant_reference": config.get("variant_reference", "url"),
+    }
+
+
+def rate_limiter(config):
+    """Limiteur de débit et de concurrence des appels à l'API (quotas WaveSpeed)"""
+    from rate_limit import RateLimiter
+    return RateLimiter(
+        submits_per_minute=config.get("submits_per_minute", 30),
+        polls_per_second=config.get("polls_per_second", 5),
+        max_concurrency=config.get("max_concurrency", 8)
+    )
+
+
+def metrics_exporter(config, metrics):
+    """Export périodique des mesures (fichier relatif au dossier de sortie), None si metrics_file est vide"""
+    from metrics import MetricsExporter
+    name = config.get("metrics_file", "metrics.prom")
+    if not name:
+        return None
+    path = Path(config.get("output_folder", str(Path.home() / "WaveSpeed_Images"))) / name
+    return MetricsExporter(metrics, path, interval=config.get("metrics_interval", 15))
+
+
+def retention_policy(config):
+    """Règles de rétention du dossier de sortie (0 = pas de limite), pour StorageManager.apply"""
+    return {
+        "days": config.get("retention_days", 0),
+        "max_posts": config.get("retention_max_posts", 0),
+        "max_gb": config.get("retention_max_gb", 0),
+        "action": config.get("retention_action", "archive"),
+    }
+
+
+def result_cache(config):
+    """Cache des résultats de génération (None si result_cache_mb vaut 0)"""
+    from result_cache import ResultCache
+    max_mb = config.get("result_cache_mb", 2048)
+    if not max_mb:
+        return None
+    return ResultCache(config.get("output_folder", str(Path.home() / "WaveSpeed_Images")), max_bytes=max_mb * 1024 ** 2)
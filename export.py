@@ -0,0 +1,301 @@
+# export.py - Export groupé des posts pour publication : python main.py export dest.zip
+"""Ré-encode les images d'une sélection de posts aux formats des plateformes.
+
+    python main.py export posts.zip --profiles instagram,threads
+    python main.py export publication/ --since 2026-02-01 --until 2026-02-28
+    python main.py export posts.zip --search "gothique" --workers 6
+
+Chaque profil (PROFILES) fixe la taille cible (recadrée ou contenue), le
+format (JPEG progressif ou WebP) et la qualité. Les images sont décodées
+et ré-encodées dans un pool de processus (un par cœur, moins un) ; au
+plus 2 images par processus sont en cours, et chaque résultat est écrit
+dès qu'il arrive. La mémoire reste donc bornée quel que soit le nombre
+de posts. La destination est une archive ZIP (si elle finit par .zip) ou un
+dossier, organisés de la même façon :
+
+    <profil>/<dossier du post>/A.jpg, B.jpg, caption.txt
+    manifest.json      posts, prompts, fichiers, dimensions et tailles
+
+Les originaux des posts archivés (storage.py) sont lus dans leur archive
+mensuelle, pas dans les aperçus réduits affichés par la galerie.
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from config import CONFIG_FILE, load_config
+from post_index import ARCHIVE_DIR, PostIndex
+
+PROFILES = {
+    # Portrait 4:5 recadré, la taille max du fil Instagram
+    "instagram": {"size": (1080, 1350), "fit": "crop", "format": "JPEG", "quality": 90, "progressive": True},
+    "instagram_story": {"size": (1080, 1920), "fit": "crop", "format": "JPEG", "quality": 90, "progressive": True},
+    # Threads garde le ratio d'origine, 1440 px de large au plus
+    "threads": {"size": (1440, 1920), "fit": "contain", "format": "JPEG", "quality": 88, "progressive": True},
+    "webp": {"size": None, "fit": "contain", "format": "WEBP", "quality": 85},
+}
+DEFAULT_PROFILES = ("instagram", "threads")
+EXTENSIONS = {"JPEG": ".jpg", "WEBP": ".webp"}
+MANIFEST_FILE = "manifest.json"
+
+
+def render(source, profile, member=None):
+    """Image source ré-encodée selon profile : (octets, largeur, hauteur) ; exécuté dans un processus du pool
+
+    Avec member, source est une archive ZIP et l'image est le fichier member de l'archive.
+    """
+    from PIL import Image, ImageOps
+    
+    if member is not None:
+        import zipfile
+        with zipfile.ZipFile(source) as zf:
+            source = io.BytesIO(zf.read(member))
+    size = profile.get("size")
+    with Image.open(source) as img:
+        if size and img.format == "JPEG":
+            # Décodage DCT réduit quand la cible est au moins 2 fois plus petite
+            cover = max if profile.get("fit") == "crop" else min
+            scale = cover(size[0] / img.width, size[1] / img.height)
+            img.draft("RGB", (int(img.width * scale), int(img.height * scale)))
+        img = img.convert("RGB")
+    if size:
+        if profile.get("fit") == "crop":
+            img = ImageOps.fit(img, size, Image.Resampling.LANCZOS)
+        else:
+            img.thumbnail(size, Image.Resampling.LANCZOS)
+    
+    options = {"quality": profile.get("quality", 90)}
+    if profile["format"] == "JPEG":
+        options.update(optimize=True, progressive=profile.get("progressive", True))
+    elif profile["format"] == "WEBP":
+        options["method"] = 4
+    out = io.BytesIO()
+    img.save(out, profile["format"], **options)
+    return out.getvalue(), img.width, img.height
+
+
+def resolve_profiles(names, custom=None):
+    """{nom: profil} pour une liste de noms (profils de PROFILES ou de custom)"""
+    available = dict(PROFILES, **(custom or {}))
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise ValueError(f"Profil inconnu: {', '.join(unknown)} (disponibles: {', '.join(available)})")
+    return {name: available[name] for name in names}
+
+
+def select_posts(index, folders=None, since=None, until=None, search=""):
+    """Lignes de l'index à exporter : dossiers donnés, ou recherche et/ou intervalle de dates"""
+    if folders:
+        rows = [index.get(Path(folder).name) for folder in folders]
+        rows = [row for row in rows if row is not None]
+    elif search:
+        rows = index.search(search)
+    else:
+        rows = index.posts_between(since, until)
+    return [
+        row for row in rows
+        if (since is None or row["created"] >= since) and (until is None or row["created"] < until)
+    ]
+
+
+class ZipSink:
+    """Destination ZIP : images stockées telles quelles (déjà compressées), textes compressés"""
+    
+    def __init__(self, path):
+        import zipfile
+        
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._zipfile = zipfile
+        self._tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        self._zip = zipfile.ZipFile(self._tmp, 'w', allowZip64=True)
+    
+    def write(self, name, data, compress=False):
+        method = self._zipfile.ZIP_DEFLATED if compress else self._zipfile.ZIP_STORED
+        self._zip.writestr(name, data, compress_type=method)
+    
+    def close(self, ok=True):
+        self._zip.close()
+        if ok:
+            os.replace(self._tmp, self.path)
+        else:
+            self._tmp.unlink(missing_ok=True)
+
+
+class FolderSink:
+    """Destination dossier : un fichier par entrée"""
+    
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+    
+    def write(self, name, data, compress=False):
+        target = self.path / name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, target)
+    
+    def close(self, ok=True):
+        pass
+
+
+def export_posts(rows, output_folder, dest, profiles, workers=None, on_progress=None):
+    """Exporte les posts rows (lignes de l'index) vers dest (ZIP ou dossier) ; renvoie le manifeste
+
+    on_progress(faites, total) est appelé après chaque image, depuis le thread appelant.
+    """
+    output_folder = Path(output_folder)
+    workers = workers or max(1, (os.cpu_count() or 2) - 1)
+    sink = ZipSink(dest) if str(dest).lower().endswith(".zip") else FolderSink(dest)
+    manifest = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "source": str(output_folder),
+        "profiles": profiles,
+        "posts": [],
+        "errors": [],
+    }
+    
+    done = 0
+    ok = False
+    try:
+        # Une tâche par (post, image, profil) ; textes écrits tout de suite
+        tasks = []
+        for row in rows:
+            post = {
+                "folder": row["folder"],
+                "created": datetime.fromtimestamp(row["created"]).isoformat(timespec="seconds"),
+                "prompt_a": row["prompt_a"],
+                "prompt_b": row["prompt_b"],
+                "caption": row["caption"],
+                "files": {name: {} for name in profiles},
+            }
+            manifest["posts"].append(post)
+            for name, profile in profiles.items():
+                if row["caption"]:
+                    sink.write(f"{name}/{row['folder']}/caption.txt", row["caption"], compress=True)
+                for image in ("A", "B"):
+                    if row[f"{image.lower()}_mtime_ns"] is None:
+                        continue
+                    if row["archive"]:
+                        # Original dans l'archive du mois (la galerie n'a que l'aperçu réduit)
+                        archive = output_folder / ARCHIVE_DIR / f"{row['archive']}.zip"
+                        source = (archive, f"{row['folder']}/{image}.jpg")
+                    else:
+                        source = (output_folder / row["folder"] / f"{image}.jpg", None)
+                    target = f"{name}/{row['folder']}/{image}{EXTENSIONS[profile['format']]}"
+                    tasks.append((post, name, image, source, target, profile))
+        
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = {}
+            queued = iter(tasks)
+            while True:
+                # Fenêtre bornée : au plus 2 images par processus décodées ou en attente d'écriture
+                for task in queued:
+                    (path, member), profile = task[3], task[5]
+                    pending[pool.submit(render, str(path), profile, member)] = task
+                    if len(pending) >= workers * 2:
+                        break
+                if not pending:
+                    break
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    post, name, image, source, target, profile = pending.pop(future)
+                    try:
+                        data, width, height = future.result()
+                    except Exception as e:
+                        file = str(source[0]) if source[1] is None else f"{source[0]}:{source[1]}"
+                        manifest["errors"].append({"file": file, "profile": name, "error": str(e)})
+                    else:
+                        sink.write(target, data)
+                        post["files"][name][image] = {
+                            "path": target, "width": width, "height": height, "bytes": len(data)
+                        }
+                    done += 1
+                    if on_progress:
+                        on_progress(done, len(tasks))
+        sink.write(MANIFEST_FILE, json.dumps(manifest, indent=2, ensure_ascii=False), compress=True)
+        ok = True
+    finally:
+        sink.close(ok)
+    return manifest
+
+
+def parse_date(text):
+    """Date AAAA-MM-JJ ou AAAA-MM-JJ HH:MM"""
+    for fmt in ("%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            pass
+    raise argparse.ArgumentTypeError(f"date invalide: {text} (attendu AAAA-MM-JJ)")
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="main.py export", description="Exporte des posts pour publication")
+    parser.add_argument("dest", help="archive .zip ou dossier de destination")
+    parser.add_argument("--config", default=str(CONFIG_FILE), help="fichier de configuration (défaut: config.json)")
+    parser.add_argument("--output", help="dossier des posts (défaut: output_folder)")
+    parser.add_argument("--profiles", help=f"profils séparés par des virgules (défaut: export_profiles), parmi "
+                                           f"{', '.join(PROFILES)}")
+    parser.add_argument("--post", action="append", dest="posts", help="dossier de post à exporter (répétable)")
+    parser.add_argument("--since", type=parse_date, help="posts créés à partir de cette date (AAAA-MM-JJ)")
+    parser.add_argument("--until", type=parse_date, help="posts créés jusqu'à cette date incluse")
+    parser.add_argument("--search", default="", help="posts dont les prompts ou la caption contiennent ces mots")
+    parser.add_argument("--workers", type=int, help="processus d'encodage (défaut: export_workers, ou cœurs - 1)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    config = load_config(args.config)
+    output_folder = args.output or config.get("output_folder", str(Path.home() / "WaveSpeed_Images"))
+    names = args.profiles.split(",") if args.profiles else config.get("export_profiles", list(DEFAULT_PROFILES))
+    try:
+        profiles = resolve_profiles(names, config.get("export_custom_profiles"))
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 2
+    since = args.since.timestamp() if args.since else None
+    until = None
+    if args.until:
+        # --until AAAA-MM-JJ est inclusif : jusqu'à la fin de la journée
+        whole_day = args.until.time() == datetime.min.time()
+        until = (args.until + timedelta(days=1) if whole_day else args.until).timestamp()
+    
+    index = PostIndex(output_folder)
+    index.reconcile()
+    rows = select_posts(index, args.posts, since, until, args.search)
+    index.close()
+    if not rows:
+        print("⚠️ Aucun post à exporter")
+        return 1
+    
+    def progress(done, total):
+        if done == total or done % 20 == 0:
+            print(f"   {done}/{total} images")
+    
+    print(f"📦 {len(rows)} posts → {args.dest} ({', '.join(profiles)})")
+    started = time.monotonic()
+    manifest = export_posts(
+        rows, output_folder, args.dest, profiles,
+        workers=args.workers or config.get("export_workers") or None,
+        on_progress=progress
+    )
+    images = sum(len(files) for post in manifest["posts"] for files in post["files"].values())
+    size = sum(
+        info["bytes"] for post in manifest["posts"] for files in post["files"].values() for info in files.values()
+    )
+    print(f"🎉 {images} images ({size / 1e6:.1f} Mo) en {time.monotonic() - started:.1f}s : {args.dest}")
+    for error in manifest["errors"]:
+        print(f"❌ {error['file']} ({error['profile']}): {error['error']}")
+    return 1 if manifest["errors"] else 0
@@ -0,0 +1,221 @@
+# gallery.py - Galerie virtualisée : seules les lignes visibles ont des widgets
+import tkinter as tk
+
+import customtkinter as ctk
+from PIL import Image
+
+ROW_HEIGHT = 230      # miniature 200 px + légende + marge
+BUFFER_ROWS = 2       # lignes préparées au-dessus et au-dessous de la zone visible
+
+
+def post_items(index, row):
+    """Entrées de galerie d'un post de l'index (A puis B, images présentes seulement)"""
+    items = []
+    if row is None:
+        return items
+    for image in ("A", "B"):
+        img_path = index.image_path(row, image)
+        if img_path is None:
+            continue
+        prefix = image.lower()
+        items.append({
+            "path": img_path,
+            "folder": row["folder"],
+            "type": image,
+            # Même clé que thumbnails.file_key (index.root est déjà résolu)
+            "key": (str(img_path), row[f"{prefix}_mtime_ns"], row[f"{prefix}_size"]),
+            "size": (row[f"{prefix}_width"], row[f"{prefix}_height"]),
+            "archived": bool(row["archive"])
+        })
+    return items
+
+
+class GalleryRow:
+    """Widgets d'une ligne (miniature + légende), réutilisés pendant le défilement"""
+    
+    def __init__(self, gallery):
+        self.index = None
+        self.key = None
+        self.frame = ctk.CTkFrame(gallery.canvas, fg_color="transparent")
+        self.button = ctk.CTkButton(
+            self.frame,
+            text="⏳",
+            width=150,
+            height=200,
+            corner_radius=10,
+            fg_color=gallery.colors["bg_tertiary"],
+            hover_color=gallery.colors["accent"],
+            command=lambda: gallery.on_select(gallery.items[self.index])
+        )
+        self.button.pack()
+        self.label = ctk.CTkLabel(
+            self.frame,
+            text="",
+            font=ctk.CTkFont(size=9),
+            text_color=gallery.colors["text_secondary"]
+        )
+        self.label.pack()
+        self.window_id = gallery.canvas.create_window(0, 0, window=self.frame, anchor="n", state="hidden")
+
+
+class VirtualGallery(ctk.CTkFrame):
+    """Liste de miniatures virtualisée
+
+    Le modèle (items) peut contenir des milliers d'images : seules les
+    lignes visibles (plus BUFFER_ROWS de chaque côté) ont des widgets, qui
+    sont recyclés au défilement. Défiler ou remplacer le modèle ne coûte
+    donc que le nombre de lignes visibles.
+
+    thumbnail(item) renvoie la CTkImage si elle est prête, sinon None (et
+    lance son chargement) ; set_thumbnail(key, image) l'affiche ensuite si
+    la ligne est toujours visible.
+    """
+    
+    def __init__(self, master, colors, on_select, thumbnail, row_height=ROW_HEIGHT, **kwargs):
+        super().__init__(master, fg_color="transparent", **kwargs)
+        self.colors = colors
+        self.on_select = on_select
+        self.thumbnail = thumbnail
+        self.row_height = row_height
+        self.items = []
+        self.rows = []
+        # Image vide : configure(image=None) ne retire pas l'ancienne image d'un CTkButton
+        self.placeholder = ctk.CTkImage(Image.new("RGBA", (1, 1), (0, 0, 0, 0)), size=(1, 1))
+        
+        self.canvas = tk.Canvas(self, bg=colors["bg_secondary"], highlightthickness=0, bd=0)
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._yview)
+        self.canvas.configure(yscrollcommand=self._on_canvas_scroll)
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+        
+        self.canvas.bind("<Configure>", lambda event: self.render())
+        self.bind("<Enter>", self._bind_wheel)
+        self.bind("<Leave>", self._unbind_wheel)
+    
+    def set_items(self, items):
+        """Remplace le modèle (la position de défilement est conservée)"""
+        self.items = list(items)
+        for row in self.rows:
+            row.index = row.key = None
+        self._update_scrollregion()
+        self.render()
+    
+    def extend(self, items):
+        """Ajoute une page d'images en fin de liste"""
+        self.items.extend(items)
+        self._update_scrollregion()
+        self.render()
+    
+    def update_folder(self, folder, items):
+        """Remplace les images d'un dossier de post sans toucher au reste
+
+        Un nouveau dossier est inséré en tête ; un dossier existant garde sa
+        place ; items vide le retire. La vue ne bouge pas si le changement
+        a lieu au-dessus des lignes visibles.
+        """
+        indices = [i for i, item in enumerate(self.items) if item["folder"] == folder]
+        position = indices[0] if indices else 0
+        if indices:
+            del self.items[indices[0]:indices[-1] + 1]
+        self.items[position:position] = items
+        self._shift_view(position, len(items) - len(indices))
+    
+    def remove(self, key):
+        """Retire une image (clé file_key) du modèle"""
+        for i, item in enumerate(self.items):
+            if item["key"] == key:
+                del self.items[i]
+                self._shift_view(i, -1)
+                return
+    
+    def _shift_view(self, position, delta):
+        top = self.canvas.canvasy(0)
+        for row in self.rows:
+            row.index = row.key = None
+        self._update_scrollregion()
+        if delta and top > 0 and position * self.row_height < top:
+            self.canvas.yview_moveto((top + delta * self.row_height) / max(len(self.items) * self.row_height, 1))
+        self.render()
+    
+    def visible_range(self):
+        """Indices (début, fin) des lignes visibles, sans le tampon"""
+        top = self.canvas.canvasy(0)
+        first = int(top // self.row_height)
+        last = int((top + max(self.canvas.winfo_height(), 1)) // self.row_height) + 1
+        return max(first, 0), min(last, len(self.items))
+    
+    def render(self):
+        """Associe les lignes recyclées aux images visibles"""
+        first, last = self.visible_range()
+        first = max(first - BUFFER_ROWS, 0)
+        last = min(last + BUFFER_ROWS, len(self.items))
+        
+        while len(self.rows) < last - first:
+            self.rows.append(GalleryRow(self))
+        
+        x = self.canvas.winfo_width() // 2
+        # Une ligne garde son index si elle est encore visible : pas de reconfiguration
+        free = [row for row in self.rows if row.index is None or not first <= row.index < last]
+        shown = {row.index for row in self.rows if row not in free}
+        for index in range(first, last):
+            if index not in shown:
+                self._bind_row(free.pop(), index)
+        for row in free:
+            row.index = row.key = None
+            self.canvas.itemconfigure(row.window_id, state="hidden")
+        for row in self.rows:
+            if row.index is not None:
+                self.canvas.coords(row.window_id, x, row.index * self.row_height)
+    
+    def set_thumbnail(self, key, image):
+        for row in self.rows:
+            if row.key == key:
+                row.button.configure(image=image, text="")
+    
+    def _bind_row(self, row, index):
+        item = self.items[index]
+        row.index = index
+        row.key = item["key"]
+        image = self.thumbnail(item)
+        if image is None:
+            row.button.configure(image=self.placeholder, text="⏳")
+        else:
+            row.button.configure(image=image, text="")
+        archived = "🗄️ " if item.get("archived") else ""
+        row.label.configure(text=f"{archived}{item['folder'][:15]}... ({item['type']})")
+        self.canvas.itemconfigure(row.window_id, state="normal")
+    
+    def _update_scrollregion(self):
+        self.canvas.configure(scrollregion=(0, 0, 1, len(self.items) * self.row_height))
+    
+    def _yview(self, *args):
+        self.canvas.yview(*args)
+        self.render()
+    
+    def _on_canvas_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+    
+    def _on_wheel(self, event):
+        if event.num == 4:
+            step = -1
+        elif event.num == 5:
+            step = 1
+        else:
+            step = -1 if event.delta > 0 else 1
+        self.canvas.yview_scroll(step, "units")
+        self.render()
+    
+    def _bind_wheel(self, event):
+        self.canvas.configure(yscrollincrement=self.row_height // 3)
+        self.bind_all("<MouseWheel>", self._on_wheel)
+        self.bind_all("<Button-4>", self._on_wheel)
+        self.bind_all("<Button-5>", self._on_wheel)
+    
+    def _unbind_wheel(self, event):
+        # <Leave> arrive aussi en entrant dans un widget enfant
+        widget = self.winfo_containing(event.x_root, event.y_root)
+        if widget is not None and str(widget).startswith(str(self)):
+            return
+        self.unbind_all("<MouseWheel>")
+        self.unbind_all("<Button-4>")
+        self.unbind_all("<Button-5>")
@@ -0,0 +1,158 @@
+# jobs.py - File d'attente des posts à générer
+import asyncio
+import itertools
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+
+# États d'un job
+QUEUED = "queued"
+SUBMITTING = "submitting"
+POLLING = "polling"
+DOWNLOADING = "downloading"
+DONE = "done"
+FAILED = "failed"
+
+STATE_LABELS = {
+    QUEUED: "⏳ En attente",
+    SUBMITTING: "📤 Envoi",
+    POLLING: "🔄 Génération",
+    DOWNLOADING: "⬇️ Téléchargement",
+    DONE: "✅ Terminé",
+    FAILED: "❌ Échec",
+}
+
+FINISHED_STATES = (DONE, FAILED)
+
+_job_ids = itertools.count(1)
+
+
+@dataclass
+class Job:
+    """Un post à générer (Prompt A + Prompt B + caption)"""
+    api_key: str
+    lora_path: str
+    prompt_a: str
+    prompt_b: str
+    caption: str = ""
+    reuse: bool = False            # réutiliser un résultat identique déjà généré (cache)
+    source: str = ""               # origine du post (entrée du manifeste en mode batch)
+    resume: dict = None            # état du journal si le post reprend après un arrêt
+    id: int = field(default_factory=lambda: next(_job_ids))
+    state: str = QUEUED
+    step: str = ""                 # "A" ou "B" pendant la génération
+    error: str = ""
+    output_path: Path = None
+    created_at: datetime = field(default_factory=datetime.now)
+    finished_at: datetime = None
+    
+    @property
+    def finished(self):
+        return self.state in FINISHED_STATES
+    
+    def label(self):
+        """Texte court pour l'affichage dans la file"""
+        text = f"#{self.id} {STATE_LABELS[self.state]}"
+        if self.step and not self.finished:
+            text += f" ({self.step})"
+        if self.error:
+            text += f" - {self.error[:40]}"
+        return text
+
+
+def create_post_folder(output_folder):
+    """Crée un dossier <timestamp>-post unique (plusieurs jobs peuvent finir la même seconde)"""
+    output_folder = Path(output_folder)
+    output_folder.mkdir(parents=True, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    folder = output_folder / f"{timestamp}-post"
+    n = 2
+    while True:
+        try:
+            folder.mkdir()
+            return folder
+        except FileExistsError:
+            folder = output_folder / f"{timestamp}_{n}-post"
+            n += 1
+
+
+def write_post_texts(output_path, job):
+    """Écrit caption.txt et prompts.txt d'un post"""
+    if job.caption:
+        with open(output_path / "caption.txt", 'w', encoding='utf-8') as f:
+            f.write(job.caption)
+    
+    with open(output_path / "prompts.txt", 'w', encoding='utf-8') as f:
+        f.write(f"PROMPT A:\n{job.prompt_a}\n\nPROMPT B:\n{job.prompt_b}")
+
+
+class JobQueue:
+    """File d'attente de jobs exécutés sur une boucle asyncio
+
+    Au plus max_workers jobs tournent en même temps ; les autres attendent
+    leur tour dans l'ordre d'arrivée. Aucun thread n'est créé par job.
+    """
+    
+    def __init__(self, runner, loop_thread, max_workers=3, on_change=None):
+        # runner(job) est une coroutine qui lève une exception en cas d'échec
+        self.runner = runner
+        self.loop_thread = loop_thread
+        self.max_workers = max(1, int(max_workers))
+        self.on_change = on_change
+        self.jobs = []
+        self._lock = threading.Lock()
+        self._slots = asyncio.Semaphore(self.max_workers)
+    
+    def submit(self, job):
+        """Ajoute un job à la file"""
+        with self._lock:
+            self.jobs.append(job)
+        self._notify(job)
+        self.loop_thread.submit(self._run(job))
+        return job
+    
+    def set_state(self, job, state, step=None):
+        """Change l'état d'un job et prévient l'interface"""
+        job.state = state
+        if step is not None:
+            job.step = step
+        if state in FINISHED_STATES:
+            job.finished_at = datetime.now()
+        self._notify(job)
+    
+    def counts(self):
+        """Nombre de jobs par état"""
+        with self._lock:
+            jobs = list(self.jobs)
+        counts = {state: 0 for state in STATE_LABELS}
+        for job in jobs:
+            counts[job.state] += 1
+        return counts
+    
+    def active_count(self):
+        """Nombre de jobs en attente ou en cours"""
+        with self._lock:
+            return sum(1 for job in self.jobs if not job.finished)
+    
+    def clear_finished(self):
+        """Retire les jobs terminés de la liste"""
+        with self._lock:
+            self.jobs = [job for job in self.jobs if not job.finished]
+    
+    async def _run(self, job):
+        async with self._slots:
+            try:
+                await self.runner(job)
+                self.set_state(job, DONE)
+            except Exception as e:
+                job.error = str(e)
+                self.set_state(job, FAILED)
+    
+    def _notify(self, job):
+        if self.on_change:
+            try:
+                self.on_change(job)
+            except Exception as e:
+                print(f"Erreur notification job: {e}")
@@ -0,0 +1,132 @@
+# journal.py - Journal des posts en cours, pour reprendre après un arrêt de l'application
+"""Journal durable des posts en cours dans <output_folder>/jobs.journal.jsonl.
+
+Chaque post est identifié par son dossier. Le pipeline ajoute une ligne
+à chaque étape qui coûte quelque chose :
+
+    started     prompts, caption, image LoRa (pas la clé API)
+    submitted   étape A ou B + URL de la tâche distante, AVANT le polling
+    downloaded  étape + image sur disque (chemin, sha256, URL)
+    done / failed
+
+Au lancement suivant, unfinished() renvoie l'état replié des posts sans
+done/failed : une tâche soumise est ré-attachée (polling puis
+téléchargement) au lieu d'être perdue, et payée une seconde fois.
+
+L'interface et le mode batch peuvent écrire dans le même journal : ajouts,
+lectures et compaction passent par un verrou de fichier (jobs.journal.lock)
+partagé entre processus.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+JOURNAL_FILE = "jobs.journal.jsonl"
+LOCK_SUFFIX = ".lock"
+FINAL_EVENTS = ("done", "failed")
+
+
+@contextmanager
+def file_lock(path):
+    """Verrou exclusif entre processus sur le fichier path (créé au besoin)"""
+    with open(path, 'a+b') as f:
+        if os.name == "nt":
+            import msvcrt
+            
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    pass        # LK_LOCK abandonne après 10 s : on réessaie
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class JobJournal:
+    """Journal JSONL en ajout seul (une ligne = un événement, écrite et fsync-ée)"""
+    
+    def __init__(self, output_folder, path=None):
+        self.path = Path(path) if path else Path(output_folder) / JOURNAL_FILE
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock_path = self.path.with_name(self.path.name.removesuffix(".jsonl") + LOCK_SUFFIX)
+        self._lock = threading.Lock()
+    
+    @contextmanager
+    def _locked(self):
+        """Verrou des threads de ce processus, puis celui des autres processus"""
+        with self._lock, file_lock(self.lock_path):
+            yield
+    
+    def record(self, folder, event, **fields):
+        """Ajoute un événement pour le post du dossier folder"""
+        line = json.dumps({"post": str(folder), "event": event, "time": time.time(), **fields})
+        with self._locked():
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+    
+    def states(self):
+        """État replié de chaque post : {dossier: {champs..., "steps": {...}, "event": dernier}}"""
+        with self._locked():
+            return self._read_states()
+    
+    def _read_states(self):
+        states = {}
+        if not self.path.exists():
+            return states
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue        # ligne tronquée par un arrêt brutal
+                state = states.setdefault(record["post"], {"steps": {}})
+                event = record.pop("event")
+                step = record.pop("step", None)
+                if step:
+                    state["steps"].setdefault(step, {}).update(record, event=event)
+                else:
+                    state.update(record)
+                state["event"] = event
+        return states
+    
+    def unfinished(self):
+        """Posts ni terminés ni en échec, du plus ancien au plus récent"""
+        return [state for state in self.states().values() if state["event"] not in FINAL_EVENTS]
+    
+    def compact(self):
+        """Réécrit le journal avec les seuls posts inachevés ; renvoie leur nombre"""
+        # Lecture et remplacement sous le même verrou : aucun ajout d'un autre processus n'est perdu
+        with self._locked():
+            pending = [state for state in self._read_states().values() if state["event"] not in FINAL_EVENTS]
+            lines = []
+            for state in pending:
+                steps = state.pop("steps")
+                state.pop("event")
+                lines.append(json.dumps(dict(state, event="started")))
+                for step, info in steps.items():
+                    lines.append(json.dumps(dict(info, post=state["post"], step=step)))
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.writelines(line + "\n" for line in lines)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+        return len(pending)
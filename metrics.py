@@ -0,0 +1,215 @@
+# metrics.py - Mesures de performance (compteurs, histogrammes) et export JSONL / Prometheus
+"""Registre de mesures partagé par le client HTTP, le pipeline et l'interface.
+
+    metrics.observe("stage_seconds", 1.2, stage="download")
+    metrics.inc("http_bytes_total", 52000, direction="down")
+    with metrics.time("thumbnail_seconds"):
+        ...
+
+Les histogrammes gardent des seaux cumulés (export Prometheus) et une
+fenêtre des dernières valeurs pour les quantiles affichés (p50, p95).
+Les compteurs gardent la date de leurs derniers incréments pour le débit
+(rate). MetricsExporter écrit le registre toutes les `interval` secondes :
+texte Prometheus (fichier réécrit, pour node_exporter --collector.textfile)
+ou, si le fichier finit par .jsonl, une ligne JSON par export.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+
+PREFIX = "wavespeed_"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _series(name, labels, extra=()):
+    """nom{a="1",b="2"} au format Prometheus"""
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return name
+    return name + "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+class Histogram:
+    """Distribution d'une durée (ou d'une taille) : seaux cumulés + dernières valeurs"""
+    
+    def __init__(self, buckets=DEFAULT_BUCKETS, window=500):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=window)
+    
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.recent.append(value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+    
+    def quantile(self, fraction):
+        values = sorted(self.recent)
+        if not values:
+            return 0.0
+        return values[min(len(values) - 1, int(fraction * len(values)))]
+    
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": self.sum / self.count if self.count else 0.0,
+            "p50": self.quantile(0.50),
+            "p95": self.quantile(0.95),
+        }
+
+
+class Metrics:
+    """Registre thread-safe de compteurs et d'histogrammes étiquetés"""
+    
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.started = time.time()
+        self._counters = {}
+        self._histograms = {}
+        self._marks = {}
+        self._lock = threading.Lock()
+    
+    def inc(self, name, value=1, **labels):
+        key = _key(name, labels)
+        now = time.monotonic()
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+            self._marks.setdefault(key, deque(maxlen=1000)).append((now, value))
+    
+    def observe(self, name, value, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+    
+    @contextmanager
+    def time(self, name, **labels):
+        """Mesure la durée du bloc (enregistrée même si le bloc lève une exception)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+    
+    def counter(self, name, **labels):
+        """Valeur d'un compteur ; sans étiquettes, somme de toutes ses séries"""
+        with self._lock:
+            if labels:
+                return self._counters.get(_key(name, labels), 0)
+            return sum(value for (n, _), value in self._counters.items() if n == name)
+    
+    def rate(self, name, window=300, **labels):
+        """Incréments par minute d'un compteur sur les window dernières secondes"""
+        since = time.monotonic() - window
+        window = min(window, max(1.0, time.time() - self.started))
+        with self._lock:
+            keys = [_key(name, labels)] if labels else [key for key in self._marks if key[0] == name]
+            total = sum(value for key in keys for at, value in self._marks.get(key, ()) if at >= since)
+        return total * 60 / window
+    
+    def histogram(self, name, **labels):
+        """Résumé (count, sum, mean, p50, p95) d'un histogramme, None s'il est vide"""
+        with self._lock:
+            histogram = self._histograms.get(_key(name, labels))
+            return histogram.snapshot() if histogram else None
+    
+    def histograms(self, name):
+        """{étiquettes: résumé} de toutes les séries d'un histogramme"""
+        with self._lock:
+            return {labels: h.snapshot() for (n, labels), h in self._histograms.items() if n == name}
+    
+    def snapshot(self):
+        """État complet, sérialisable en JSON"""
+        with self._lock:
+            counters = {_series(name, labels): value for (name, labels), value in self._counters.items()}
+            histograms = {_series(name, labels): h.snapshot() for (name, labels), h in self._histograms.items()}
+        return {"time": time.time(), "uptime": time.time() - self.started,
+                "counters": counters, "histograms": histograms}
+    
+    def to_prometheus(self):
+        """Registre au format texte d'exposition Prometheus"""
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(
+                (key, h.buckets, list(h.counts), h.count, h.sum) for key, h in self._histograms.items()
+            )
+        declared = set()
+        for (name, labels), value in counters:
+            if name not in declared:
+                lines.append(f"# TYPE {PREFIX}{name} counter")
+                declared.add(name)
+            lines.append(f"{_series(PREFIX + name, labels)} {value}")
+        for (name, labels), buckets, counts, count, total in histograms:
+            if name not in declared:
+                lines.append(f"# TYPE {PREFIX}{name} histogram")
+                declared.add(name)
+            cumulative = 0
+            for bound, n in zip(buckets, counts):
+                cumulative += n
+                lines.append(f"{_series(PREFIX + name + '_bucket', labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{_series(PREFIX + name + '_bucket', labels, [('le', '+Inf')])} {count}")
+            lines.append(f"{_series(PREFIX + name + '_sum', labels)} {total}")
+            lines.append(f"{_series(PREFIX + name + '_count', labels)} {count}")
+        return "\n".join(lines) + "\n"
+    
+    def export(self, path):
+        """Écrit le registre : ligne JSON ajoutée (.jsonl) ou texte Prometheus réécrit atomiquement"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.suffix == ".jsonl":
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(self.snapshot()) + "\n")
+            return
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp, path)
+
+
+class MetricsExporter:
+    """Thread qui exporte le registre toutes les interval secondes (et une dernière fois à l'arrêt)"""
+    
+    def __init__(self, metrics, path, interval=15.0):
+        self.metrics = metrics
+        self.path = Path(path)
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="metrics-exporter", daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self._export()
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._export()
+    
+    def _export(self):
+        try:
+            self.metrics.export(self.path)
+        except OSError as e:
+            print(f"Erreur export des mesures: {e}")
@@ -0,0 +1,324 @@
+# mock_server.py - Faux serveur WaveSpeed local (tests et benchmarks sans crédits)
+"""Serveur local qui imite l'API WaveSpeed utilisée par l'application.
+
+    python mock_server.py --port 8765 --latency 3
+    python mock_server.py --failure-rate 0.1 --error-rate 0.05 --sizes 1152x2048,768x1344
+    python mock_server.py --max-tasks 4
+
+puis dans config.json : "api_base": "http://127.0.0.1:8765"
+
+Endpoints imités : submit (edit), état de la tâche, téléchargement du
+résultat (avec Range/ETag), upload de média. GET /__stats renvoie les
+compteurs (requêtes, octets reçus/envoyés) pour les benchmarks.
+
+Pannes simulées : error_rate est la part des submits refusés en HTTP 500,
+failure_rate la part des tâches qui finissent en "failed". Chaque tâche
+produit une image d'une des tailles de output_sizes (tirée au hasard).
+Quota simulé : au-delà de max_tasks générations en cours, le submit est
+refusé en HTTP 429 avec un en-tête Retry-After ; les throttled_polls
+premiers polls sont refusés de même.
+"""
+import argparse
+import hashlib
+import io
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from wavespeed_client import EDIT_PATH, UPLOAD_PATH
+
+
+def make_jpeg(width, height, quality=90):
+    """Image JPEG de test (dégradé bruité, taille proche d'une vraie sortie)"""
+    from PIL import Image
+    
+    gradient = Image.linear_gradient("L").resize((width, height))
+    noise = Image.effect_noise((width, height), 40)
+    img = Image.merge("RGB", (gradient, noise, Image.blend(gradient, noise, 0.5)))
+    out = io.BytesIO()
+    img.save(out, "JPEG", quality=quality)
+    return out.getvalue()
+
+
+class MockWaveSpeed:
+    """État du faux serveur : tâches, fichiers et compteurs"""
+    
+    def __init__(self, host="127.0.0.1", port=0, latency=2.0, jitter=0.25, output_size=(1152, 2048),
+                 reject_urls=False, failure_rate=0.0, error_rate=0.0, output_sizes=None, max_tasks=0,
+                 throttled_polls=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.reject_urls = reject_urls
+        self.failure_rate = failure_rate
+        self.error_rate = error_rate
+        self.max_tasks = max_tasks
+        self.throttled_polls = throttled_polls
+        self.outputs = [make_jpeg(*size) for size in (output_sizes or [output_size])]
+        self.tasks = {}
+        self.media = {}
+        self.stats = {"requests": {}, "bytes_in": 0, "bytes_out": 0, "submits": 0, "url_references": 0,
+                      "inline_references": 0, "uploads": 0, "errors": 0, "failures": 0,
+                      "throttled": 0, "throttled_polls": 0, "peak_running": 0}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), _Handler)
+        self.server.daemon_threads = True
+        self.server.mock = self
+        self._thread = None
+    
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def start(self):
+        """Lance le serveur dans un thread ; renvoie self"""
+        self._thread = threading.Thread(target=self.server.serve_forever, name="mock-wavespeed", daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+    
+    def count(self, endpoint, bytes_in=0, bytes_out=0):
+        with self._lock:
+            self.stats["requests"][endpoint] = self.stats["requests"].get(endpoint, 0) + 1
+            self.stats["bytes_in"] += bytes_in
+            self.stats["bytes_out"] += bytes_out
+    
+    def bump(self, counter):
+        with self._lock:
+            self.stats[counter] += 1
+    
+    def running(self):
+        """Nombre de générations pas encore terminées"""
+        now = time.monotonic()
+        return sum(1 for task in list(self.tasks.values()) if task["ready_at"] > now)
+    
+    def new_task(self):
+        """Crée une tâche (None si le quota max_tasks est atteint)"""
+        with self._lock:
+            running = self.running()
+            if self.max_tasks and running >= self.max_tasks:
+                self.stats["throttled"] += 1
+                return None
+            self.stats["peak_running"] = max(self.stats["peak_running"], running + 1)
+            task_id = str(next(self._ids))
+            delay = self.latency * random.uniform(1 - self.jitter, 1 + self.jitter)
+            failed = random.random() < self.failure_rate
+            self.tasks[task_id] = {
+                "ready_at": time.monotonic() + delay,
+                "failed": failed,
+                "output": random.choice(self.outputs),
+            }
+            self.stats["submits"] += 1
+            self.stats["failures"] += failed
+        return task_id
+    
+    def throttle_poll(self):
+        """Vrai si ce poll doit être refusé (quota throttled_polls)"""
+        with self._lock:
+            if self.stats["throttled_polls"] >= self.throttled_polls:
+                return False
+            self.stats["throttled_polls"] += 1
+            return True
+    
+    def known_url(self, url):
+        """Une URL servie par ce serveur (résultat ou média envoyé)"""
+        match = re.search(r"/(outputs|media)/(\w+)\.jpg$", url)
+        if not match or not url.startswith(self.url):
+            return False
+        kind, name = match.groups()
+        return name in (self.tasks if kind == "outputs" else self.media)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    
+    def log_message(self, format, *args):
+        pass
+    
+    @property
+    def mock(self):
+        return self.server.mock
+    
+    def _body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return self.rfile.read(length) if length else b""
+    
+    def _json(self, obj, status=200, endpoint="", bytes_in=0, headers=None):
+        body = json.dumps(obj).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.mock.count(endpoint, bytes_in, len(body))
+    
+    def _authorized(self):
+        return self.headers.get("Authorization", "").startswith("Bearer ")
+    
+    def do_POST(self):
+        body = self._body()
+        if not self._authorized():
+            return self._json({"code": 401, "message": "Unauthorized"}, 401, "unauthorized", len(body))
+        if self.path == EDIT_PATH:
+            return self._submit(body)
+        if self.path == UPLOAD_PATH:
+            return self._upload(body)
+        self._json({"code": 404, "message": "Not found"}, 404, "not_found", len(body))
+    
+    def _submit(self, body):
+        data = json.loads(body or b"{}")
+        images = data.get("images") or []
+        if not data.get("prompt") or not images:
+            return self._json({"code": 400, "message": "prompt and images are required"}, 400, "submit", len(body))
+        for image in images:
+            if image.startswith("data:"):
+                self.mock.bump("inline_references")
+            elif self.mock.reject_urls or not self.mock.known_url(image):
+                return self._json({"code": 400, "message": f"cannot fetch {image}"}, 400, "submit", len(body))
+            else:
+                self.mock.bump("url_references")
+        
+        if random.random() < self.mock.error_rate:
+            self.mock.bump("errors")
+            return self._json({"code": 500, "message": "simulated server error"}, 500, "submit", len(body))
+        task_id = self.mock.new_task()
+        if task_id is None:
+            return self._json({"code": 429, "message": "too many running tasks"}, 429, "throttled", len(body),
+                              headers={"Retry-After": "1"})
+        self._json({
+            "code": 200,
+            "data": {
+                "id": task_id,
+                "status": "created",
+                "urls": {"get": f"{self.mock.url}/api/v3/predictions/{task_id}/result"}
+            }
+        }, endpoint="submit", bytes_in=len(body))
+    
+    def _upload(self, body):
+        # Multipart : on garde le contenu brut du fichier, sans le parser finement
+        match = re.search(rb"\r\n\r\n(.*)\r\n--", body, re.S)
+        content = match.group(1) if match else body
+        with self.mock._lock:
+            name = f"m{len(self.mock.media) + 1}"
+            self.mock.media[name] = content
+            self.mock.stats["uploads"] += 1
+        self._json({
+            "code": 200,
+            "data": {"type": "image", "download_url": f"{self.mock.url}/media/{name}.jpg"}
+        }, endpoint="upload", bytes_in=len(body))
+    
+    def do_GET(self):
+        if self.path == "/__stats":
+            return self._json(self.mock.stats, endpoint="stats")
+        
+        match = re.fullmatch(r"/api/v3/predictions/(\w+)/result", self.path)
+        if match:
+            if not self._authorized():
+                return self._json({"code": 401, "message": "Unauthorized"}, 401, "unauthorized")
+            return self._result(match.group(1))
+        
+        match = re.fullmatch(r"/(outputs|media)/(\w+)\.jpg", self.path)
+        if match:
+            kind, name = match.groups()
+            if kind == "outputs":
+                task = self.mock.tasks.get(name)
+                content = task["output"] if task and not task["failed"] else None
+            else:
+                content = self.mock.media.get(name)
+            if content is None:
+                return self._json({"code": 404, "message": "Not found"}, 404, "not_found")
+            return self._file(content, kind)
+        
+        self._json({"code": 404, "message": "Not found"}, 404, "not_found")
+    
+    def _result(self, task_id):
+        if self.mock.throttle_poll():
+            return self._json({"code": 429, "message": "too many requests"}, 429, "poll", headers={"Retry-After": "2"})
+        task = self.mock.tasks.get(task_id)
+        if task is None:
+            return self._json({"code": 404, "message": "Task not found"}, 404, "poll")
+        done = time.monotonic() >= task["ready_at"]
+        status = "processing"
+        if done:
+            status = "failed" if task["failed"] else "completed"
+        self._json({
+            "code": 200,
+            "data": {
+                "id": task_id,
+                "status": status,
+                "outputs": [f"{self.mock.url}/outputs/{task_id}.jpg"] if status == "completed" else [],
+                "error": "simulated generation failure" if status == "failed" else ""
+            }
+        }, endpoint="poll")
+    
+    def _file(self, content, endpoint):
+        start = 0
+        match = re.fullmatch(r"bytes=(\d+)-", self.headers.get("Range", ""))
+        if match:
+            start = int(match.group(1))
+            if start >= len(content):
+                self.send_response(416)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return self.mock.count(endpoint)
+        body = content[start:]
+        self.send_response(206 if match else 200)
+        self.send_header("Content-Type", "image/jpeg")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", f'"{hashlib.md5(content).hexdigest()}"')
+        if match:
+            self.send_header("Content-Range", f"bytes {start}-{len(content) - 1}/{len(content)}")
+        self.end_headers()
+        self.wfile.write(body)
+        self.mock.count(endpoint, bytes_out=len(body))
+
+
+def parse_sizes(text):
+    """"1152x2048,768x1344" -> [(1152, 2048), (768, 1344)]"""
+    return [tuple(int(n) for n in size.lower().split("x")) for size in text.split(",") if size]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Faux serveur WaveSpeed local")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=2.0, help="durée d'une génération (secondes)")
+    parser.add_argument("--reject-urls", action="store_true", help="refuser les images passées par URL")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="part des tâches en échec (0-1)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="part des submits en erreur 500 (0-1)")
+    parser.add_argument("--sizes", type=parse_sizes, default=None, help="tailles des images, ex. 1152x2048,768x1344")
+    parser.add_argument("--max-tasks", type=int, default=0, help="générations simultanées avant 429 (0 : illimité)")
+    parser.add_argument("--throttled-polls", type=int, default=0, help="premiers polls refusés en 429")
+    args = parser.parse_args(argv)
+    
+    mock = MockWaveSpeed(
+        args.host,
+        args.port,
+        latency=args.latency,
+        reject_urls=args.reject_urls,
+        failure_rate=args.failure_rate,
+        error_rate=args.error_rate,
+        output_sizes=args.sizes,
+        max_tasks=args.max_tasks,
+        throttled_polls=args.throttled_polls
+    )
+    print(f"🧪 Faux serveur WaveSpeed sur {mock.url}")
+    print(f'   config.json : "api_base": "{mock.url}"')
+    try:
+        mock.server.serve_forever()
+    except KeyboardInterrupt:
+        mock.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+# pipeline.py - Pipeline de génération par étapes (submit, poll, download, encode, persist)
+"""Pipeline de génération où les posts indépendants se chevauchent.
+
+Chaque image passe par les étapes submit -> poll -> download ; après A,
+l'étape encode prépare la référence de la variante et B repart dans
+submit ; après B, persist écrit caption/prompts (et met à jour l'index des
+posts s'il y en a un). Avec un cache de résultats, chaque image est
+rangée sous la clé de sa requête ; pour un job en mode reuse, une requête
+déjà faite saute submit/poll/download (un B en échec relancé repart donc
+du A en cache). Avec un journal (JobJournal), chaque soumission est
+notée avant le polling : resume_post() reprend un post interrompu à
+l'étape où il s'était arrêté. on_image(chemin) est appelé (depuis la
+boucle asyncio) pour chaque image arrivée sur disque, par exemple pour
+préparer ses prévisualisations. Avec un registre de mesures
+(metrics.Metrics), chaque étape y enregistre attente en file et durée.
+
+Les étapes sont des workers asyncio reliés par des files bornées :
+pendant que B du post N est en génération, A du post N+1 peut déjà
+être soumis ou téléchargé.
+
+Le nombre de posts en vol est borné (max_in_flight) et chaque file a
+cette capacité : une file ne peut donc jamais bloquer les autres (pas
+d'interblocage malgré le retour de B vers submit).
+"""
+import asyncio
+import time
+from collections import deque
+from pathlib import Path
+
+from jobs import create_post_folder, write_post_texts
+
+STAGES = ("submit", "poll", "download", "encode", "persist")
+
+# Workers par étape (poll : l'attente est confiée au PollScheduler, pas de limite utile)
+DEFAULT_WORKERS = {"submit": 2, "poll": 1, "download": 4, "encode": 2, "persist": 1}
+
+
+class StageStats:
+    """Profondeur de file et latences d'une étape"""
+    
+    def __init__(self, name, window=200):
+        self.name = name
+        self.queue = None
+        self.active = 0
+        self.done = 0
+        self.errors = 0
+        self.latencies = deque(maxlen=window)
+        self.waits = deque(maxlen=window)
+    
+    def record(self, wait, latency):
+        self.done += 1
+        self.waits.append(wait)
+        self.latencies.append(latency)
+    
+    def snapshot(self):
+        """Copie lisible depuis un autre thread"""
+        latencies = sorted(self.latencies)
+        waits = list(self.waits)
+        return {
+            "stage": self.name,
+            "depth": self.queue.qsize() if self.queue else 0,
+            "active": self.active,
+            "done": self.done,
+            "errors": self.errors,
+            "mean": sum(latencies) / len(latencies) if latencies else 0.0,
+            "p95": latencies[int(0.95 * (len(latencies) - 1))] if latencies else 0.0,
+            "wait": sum(waits) / len(waits) if waits else 0.0,
+        }
+
+
+class PostWork:
+    """Un post qui traverse le pipeline"""
+    
+    def __init__(self, client, job, output_folder, set_state):
+        self.client = client
+        self.job = job
+        self.output_folder = output_folder
+        self.set_state = set_state
+        self.step = "A"
+        self.images = None
+        self.task_url = None
+        self.resumed = False        # tâche distante ré-attachée depuis le journal
+        self.cache_key = None
+        self.outputs = None
+        self.results = {}
+        self.enqueued_at = 0.0
+        self.started_at = time.perf_counter()
+        self.future = asyncio.get_running_loop().create_future()
+
+
+class Pipeline:
+    """Étapes de génération reliées par des files asyncio bornées"""
+    
+    def __init__(self, max_in_flight=3, workers=None, index=None, cache=None, journal=None, on_image=None,
+                 metrics=None):
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.workers = dict(DEFAULT_WORKERS, **(workers or {}))
+        self.index = index
+        self.cache = cache
+        self.journal = journal
+        self.on_image = on_image
+        self.metrics = metrics
+        self.stats = {name: StageStats(name) for name in STAGES}
+        self._slots = None
+        self._queues = None
+        self._tasks = []
+        self._waiting = set()
+    
+    def _start(self):
+        """Crée les files et les workers (dans la boucle asyncio, au premier post)"""
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        self._queues = {name: asyncio.Queue(maxsize=self.max_in_flight) for name in STAGES}
+        for name in STAGES:
+            self.stats[name].queue = self._queues[name]
+            handler = getattr(self, f"_{name}")
+            for _ in range(self.workers[name]):
+                self._tasks.append(asyncio.create_task(self._worker(name, handler)))
+    
+    async def run_post(self, client, job, output_folder, set_state):
+        """Fait passer un post dans le pipeline ; renvoie son dossier"""
+        if self._queues is None:
+            self._start()
+        async with self._slots:
+            work = PostWork(client, job, output_folder, set_state)
+            job.output_path = await asyncio.to_thread(create_post_folder, output_folder)
+            await self._journal(
+                work, "started",
+                prompt_a=job.prompt_a, prompt_b=job.prompt_b, caption=job.caption,
+                lora_path=str(job.lora_path), reuse=job.reuse, source=job.source
+            )
+            work.images = [await self._encode_reference(client, job)]
+            return await self._run(work, "submit")
+    
+    async def resume_post(self, client, job, state, set_state):
+        """Reprend un post interrompu à partir de son état dans le journal ; renvoie son dossier"""
+        if self._queues is None:
+            self._start()
+        async with self._slots:
+            job.output_path = Path(state["post"])
+            work = PostWork(client, job, job.output_path.parent, set_state)
+            a, b = state["steps"].get("A", {}), state["steps"].get("B", {})
+            if a.get("event") == "downloaded":
+                work.results["A"] = a
+            if b.get("event") == "downloaded":
+                work.step, work.results["B"], stage = "B", b, "persist"
+            elif b.get("event") == "submitted":
+                work.step, work.task_url, stage = "B", b["task_url"], "poll"
+            elif "A" in work.results:
+                stage = "encode"
+            elif a.get("event") == "submitted":
+                work.task_url, stage = a["task_url"], "poll"
+            else:
+                # Rien de soumis (ou pas encore noté) : on repart du début
+                work.images = [await self._encode_reference(client, job)]
+                stage = "submit"
+            if stage == "poll":
+                work.resumed = True
+                set_state("polling", work.step)
+            return await self._run(work, stage)
+    
+    async def _run(self, work, stage):
+        await self._put(stage, work)
+        try:
+            folder = await work.future
+        except Exception as e:
+            self._count("posts_total", status="failed")
+            await self._index_post(work, failed=True)
+            await self._journal(work, "failed", error=str(e))
+            raise
+        self._count("posts_total", status="done")
+        self._observe("post_seconds", time.perf_counter() - work.started_at)
+        return folder
+    
+    async def _encode_reference(self, client, job):
+        started = time.perf_counter()
+        image = await client.encode_reference(job.lora_path)
+        self._observe("stage_seconds", time.perf_counter() - started, stage="encode")
+        return image
+    
+    def _observe(self, name, value, **labels):
+        if self.metrics is not None:
+            self.metrics.observe(name, value, **labels)
+    
+    def _count(self, name, **labels):
+        if self.metrics is not None:
+            self.metrics.inc(name, **labels)
+    
+    def _record(self, name, wait, latency):
+        self.stats[name].record(wait, latency)
+        self._observe("queue_wait_seconds", wait, stage=name)
+        self._observe("stage_seconds", latency, stage=name)
+    
+    def snapshot(self):
+        """État de chaque étape (profondeur, en cours, latences)"""
+        return [self.stats[name].snapshot() for name in STAGES]
+    
+    async def close(self):
+        for task in self._tasks + list(self._waiting):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queues = None
+    
+    async def _put(self, stage, work):
+        work.enqueued_at = time.perf_counter()
+        await self._queues[stage].put(work)
+    
+    async def _worker(self, name, handler):
+        queue = self._queues[name]
+        stats = self.stats[name]
+        while True:
+            work = await queue.get()
+            started = time.perf_counter()
+            wait = started - work.enqueued_at
+            stats.active += 1
+            try:
+                if not work.future.done():
+                    await handler(work)
+                    if name != "poll":      # l'attente du poll est mesurée par _wait_result
+                        self._record(name, wait, time.perf_counter() - started)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                stats.errors += 1
+                self._count("stage_errors_total", stage=name)
+                if not work.future.done():
+                    work.future.set_exception(e)
+            finally:
+                stats.active -= 1
+                queue.task_done()
+    
+    async def _submit(self, work):
+        job = work.job
+        if self.cache is not None:
+            work.cache_key = await asyncio.to_thread(self._cache_key, work)
+            if job.reuse and await self._from_cache(work):
+                return
+        work.set_state("submitting", work.step)
+        if work.step == "A":
+            work.task_url = await work.client.submit(job.prompt_a, work.images)
+        else:
+            work.task_url = await work.client.submit_variant(job.prompt_b, work.results["A"], work.images)
+        await self._journal(work, "submitted", step=work.step, task_url=work.task_url)
+        work.set_state("polling", work.step)
+        await self._put("poll", work)
+    
+    async def _poll(self, work):
+        # L'attente ne bloque pas le worker : le PollScheduler suit toutes les tâches
+        task = asyncio.create_task(self._wait_result(work, time.perf_counter() - work.enqueued_at))
+        self._waiting.add(task)
+        task.add_done_callback(self._waiting.discard)
+    
+    async def _wait_result(self, work, wait):
+        stats = self.stats["poll"]
+        started = time.perf_counter()
+        stats.active += 1
+        try:
+            work.outputs = await work.client.wait_for_result(work.task_url, resumed=work.resumed)
+            work.resumed = False
+        except Exception as e:
+            stats.errors += 1
+            self._count("stage_errors_total", stage="poll")
+            if not work.future.done():
+                work.future.set_exception(e)
+            return
+        finally:
+            stats.active -= 1
+        self._record("poll", wait, time.perf_counter() - started)
+        await self._put("download", work)
+    
+    async def _download(self, work):
+        work.set_state("downloading", work.step)
+        dest = work.job.output_path / f"{work.step}.jpg"
+        info = await work.client.download_to(work.outputs[0], dest)
+        work.results[work.step] = dict(info, url=work.outputs[0], task_url=work.task_url)
+        await self._downloaded(work)
+        await self._cache_result(work, info)
+        await self._put("encode" if work.step == "A" else "persist", work)
+    
+    async def _encode(self, work):
+        # Référence de A pour la variante (URL, upload ou base64)
+        work.images = await work.client.variant_images(work.results["A"])
+        work.step = "B"
+        await self._put("submit", work)
+    
+    async def _persist(self, work):
+        await asyncio.to_thread(write_post_texts, work.job.output_path, work.job)
+        await self._index_post(work)
+        await self._journal(work, "done")
+        work.future.set_result(work.job.output_path)
+    
+    def _cache_key(self, work):
+        if work.step == "A":
+            return work.client.cache_key(work.job.prompt_a, work.images)
+        # B dépend du contenu de A, pas de son URL (temporaire) ni de son encodage
+        return work.client.cache_key(work.job.prompt_b, [work.results["A"]["sha256"]])
+    
+    async def _from_cache(self, work):
+        """Reprend l'image depuis le cache si la même requête a déjà été générée"""
+        dest = work.job.output_path / f"{work.step}.jpg"
+        info = await asyncio.to_thread(self.cache.fetch, work.cache_key, dest)
+        if info is None:
+            return False
+        work.set_state("downloading", work.step)
+        work.results[work.step] = dict(info, url=None, task_url=None, cached=True)
+        await self._downloaded(work)
+        await self._put("encode" if work.step == "A" else "persist", work)
+        return True
+    
+    async def _cache_result(self, work, info):
+        if self.cache is None or work.cache_key is None:      # post repris : clé inconnue
+            return
+        try:
+            await asyncio.to_thread(self.cache.put, work.cache_key, info["path"], info["sha256"])
+        except Exception as e:
+            print(f"Erreur cache des résultats: {e}")
+    
+    async def _downloaded(self, work):
+        result = work.results[work.step]
+        if self.on_image is not None:
+            self.on_image(result["path"])
+        await self._journal(
+            work, "downloaded",
+            step=work.step, path=str(result["path"]), size=result["size"], sha256=result["sha256"], url=result["url"]
+        )
+    
+    async def _journal(self, work, event, **fields):
+        if self.journal is None:
+            return
+        try:
+            await asyncio.to_thread(self.journal.record, work.job.output_path, event, **fields)
+        except Exception as e:
+            print(f"Erreur journal des posts: {e}")
+    
+    async def _index_post(self, work, failed=False):
+        # L'index est un confort : une erreur SQLite ne fait pas échouer le post
+        if self.index is None:
+            return
+        try:
+            latency = time.perf_counter() - work.started_at
+            await asyncio.to_thread(self.index.record_post, work.job.output_path, latency, failed)
+        except Exception as e:
+            print(f"Erreur index des posts: {e}")
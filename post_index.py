@@ -0,0 +1,293 @@
+# post_index.py - Index SQLite des posts du dossier de sortie
+"""Index des posts dans <output_folder>/posts.sqlite3.
+
+Une ligne par dossier <...>-post : date, prompts, caption, taille et
+dimensions de A et B, latence de génération et statut. Le pipeline
+l'alimente à la fin de chaque post ; reconcile() le remet d'accord avec
+le disque (posts créés ou supprimés par un autre outil) en ne relisant
+que les dossiers dont la date de modification a changé.
+
+Un post archivé (storage.py) n'a plus de dossier : sa ligne garde le mois
+de l'archive (colonne archive) et ses images pointent vers les aperçus
+réduits de .archive/<mois>/<dossier>/, pour rester visible dans la galerie.
+
+La galerie lit ses pages avec des requêtes triées sur un index au lieu
+de lister et stat-er tout le dossier de sortie. Prompts et caption sont
+aussi indexés en plein texte (FTS5, tenu à jour par des triggers) pour
+la recherche dans l'historique.
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+INDEX_FILE = "posts.sqlite3"
+ARCHIVE_DIR = ".archive"
+POST_SUFFIX = "-post"
+IMAGES = ("A", "B")
+
+SCHEMA_VERSION = 3
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    folder TEXT PRIMARY KEY,
+    created REAL NOT NULL,
+    prompt_a TEXT NOT NULL DEFAULT '',
+    prompt_b TEXT NOT NULL DEFAULT '',
+    caption TEXT NOT NULL DEFAULT '',
+    a_mtime_ns INTEGER, a_size INTEGER, a_width INTEGER, a_height INTEGER,
+    b_mtime_ns INTEGER, b_size INTEGER, b_width INTEGER, b_height INTEGER,
+    latency REAL,
+    status TEXT NOT NULL,
+    dir_mtime_ns INTEGER,
+    indexed_at REAL NOT NULL,
+    archive TEXT
+);
+CREATE INDEX IF NOT EXISTS posts_created ON posts (created DESC, folder DESC);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(
+    prompt_a, prompt_b, caption,
+    content='posts', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS posts_fts_insert AFTER INSERT ON posts BEGIN
+    INSERT INTO posts_fts (rowid, prompt_a, prompt_b, caption)
+    VALUES (new.rowid, new.prompt_a, new.prompt_b, new.caption);
+END;
+CREATE TRIGGER IF NOT EXISTS posts_fts_delete AFTER DELETE ON posts BEGIN
+    INSERT INTO posts_fts (posts_fts, rowid, prompt_a, prompt_b, caption)
+    VALUES ('delete', old.rowid, old.prompt_a, old.prompt_b, old.caption);
+END;
+CREATE TRIGGER IF NOT EXISTS posts_fts_update AFTER UPDATE OF prompt_a, prompt_b, caption ON posts BEGIN
+    INSERT INTO posts_fts (posts_fts, rowid, prompt_a, prompt_b, caption)
+    VALUES ('delete', old.rowid, old.prompt_a, old.prompt_b, old.caption);
+    INSERT INTO posts_fts (rowid, prompt_a, prompt_b, caption)
+    VALUES (new.rowid, new.prompt_a, new.prompt_b, new.caption);
+END;
+"""
+
+# Colonnes relues depuis le disque ; latence et statut "failed" viennent du pipeline
+DISK_COLUMNS = (
+    "created", "prompt_a", "prompt_b", "caption",
+    "a_mtime_ns", "a_size", "a_width", "a_height",
+    "b_mtime_ns", "b_size", "b_width", "b_height",
+    "dir_mtime_ns", "indexed_at", "archive",
+)
+
+
+def folder_timestamp(name, default):
+    """Date de création tirée du nom (2026-02-01_22-30-00[_2]-post)"""
+    try:
+        return datetime.strptime(name[:19], "%Y-%m-%d_%H-%M-%S").timestamp()
+    except ValueError:
+        return default
+
+
+def read_texts(folder):
+    """(prompt A, prompt B, caption) lus dans prompts.txt et caption.txt"""
+    prompt_a = prompt_b = caption = ""
+    try:
+        with open(folder / "prompts.txt", 'r', encoding='utf-8') as f:
+            content = f.read()
+        head, _, prompt_b = content.partition("\n\nPROMPT B:\n")
+        prompt_a = head.removeprefix("PROMPT A:\n")
+    except OSError:
+        pass
+    try:
+        with open(folder / "caption.txt", 'r', encoding='utf-8') as f:
+            caption = f.read()
+    except OSError:
+        pass
+    return prompt_a, prompt_b, caption
+
+
+def image_info(path):
+    """(mtime_ns, taille, largeur, hauteur) d'une image, ou des None si absente"""
+    from PIL import Image
+    
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None, None, None, None
+    try:
+        with Image.open(path) as img:      # en-tête seulement, pas de décodage
+            width, height = img.size
+    except Exception:
+        width = height = None
+    return stat.st_mtime_ns, stat.st_size, width, height
+
+
+def fts_query(text):
+    """Requête FTS5 : chaque mot tapé devient un préfixe entre guillemets (pas de syntaxe FTS)"""
+    words = re.findall(r"\w+", text)
+    return " ".join(f'"{word}"*' for word in words)
+
+
+class PostIndex:
+    """Index SQLite des posts, utilisable depuis plusieurs threads"""
+    
+    def __init__(self, output_folder, path=None):
+        self.root = Path(output_folder).resolve()
+        self.path = Path(path) if path else self.root / INDEX_FILE
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        with self._db:
+            version = self._db.execute("PRAGMA user_version").fetchone()[0]
+            self._db.executescript(SCHEMA)
+            columns = {row["name"] for row in self._db.execute("PRAGMA table_info(posts)")}
+            if "archive" not in columns:
+                self._db.execute("ALTER TABLE posts ADD COLUMN archive TEXT")
+            if version < 2:
+                # Index plein texte ajouté après coup : le remplir avec les posts existants
+                self._db.execute("INSERT INTO posts_fts (posts_fts) VALUES ('rebuild')")
+            self._db.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+    
+    def close(self):
+        with self._lock:
+            self._db.close()
+    
+    # --- Lecture ---
+    
+    def posts(self, limit=None, offset=0):
+        """Posts du plus récent au plus ancien (requête sur l'index posts_created)"""
+        with self._lock:
+            return self._db.execute(
+                "SELECT * FROM posts ORDER BY created DESC, folder DESC LIMIT ? OFFSET ?",
+                (-1 if limit is None else limit, offset)
+            ).fetchall()
+    
+    def posts_between(self, since=None, until=None):
+        """Posts créés dans [since, until[ (timestamps, None = sans borne), du plus récent au plus ancien"""
+        with self._lock:
+            return self._db.execute(
+                "SELECT * FROM posts WHERE created >= ? AND created < ? ORDER BY created DESC, folder DESC",
+                (float("-inf") if since is None else since, float("inf") if until is None else until)
+            ).fetchall()
+    
+    def search(self, text, limit=None, offset=0):
+        """Posts dont les prompts ou la caption contiennent tous les mots de text (préfixes)"""
+        query = fts_query(text)
+        if not query:
+            return self.posts(limit, offset)
+        with self._lock:
+            # Tri et pagination sur les rowid seulement, puis lecture des lignes de la page
+            return self._db.execute(
+                "SELECT * FROM posts WHERE rowid IN ("
+                "SELECT posts.rowid FROM posts_fts JOIN posts ON posts.rowid = posts_fts.rowid "
+                "WHERE posts_fts MATCH ? ORDER BY posts.created DESC, posts.folder DESC LIMIT ? OFFSET ?"
+                ") ORDER BY created DESC, folder DESC",
+                (query, -1 if limit is None else limit, offset)
+            ).fetchall()
+    
+    def get(self, folder):
+        with self._lock:
+            return self._db.execute("SELECT * FROM posts WHERE folder = ?", (folder,)).fetchone()
+    
+    def count(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+    
+    def image_path(self, row, image):
+        """Chemin de l'image A ou B d'une ligne (None si elle n'existe pas ; aperçu réduit si archivée)"""
+        if row[f"{image.lower()}_mtime_ns"] is None:
+            return None
+        if row["archive"]:
+            return self.root / ARCHIVE_DIR / row["archive"] / row["folder"] / f"{image}.jpg"
+        return self.root / row["folder"] / f"{image}.jpg"
+    
+    # --- Écriture ---
+    
+    def refresh_folder(self, folder):
+        """Relit un dossier de post depuis le disque ; renvoie sa ligne (None s'il a disparu)"""
+        folder = self.root / Path(folder).name
+        try:
+            dir_mtime_ns = os.stat(folder).st_mtime_ns
+        except OSError:
+            row = self.get(folder.name)
+            if row is not None and row["archive"]:
+                return row      # archivé : le dossier a été retiré exprès
+            self.delete([folder.name])
+            return None
+        
+        values = {
+            "folder": folder.name,
+            "created": folder_timestamp(folder.name, dir_mtime_ns / 1e9),
+            "dir_mtime_ns": dir_mtime_ns,
+            "indexed_at": time.time(),
+            "archive": None,
+        }
+        values["prompt_a"], values["prompt_b"], values["caption"] = read_texts(folder)
+        for image in IMAGES:
+            prefix = image.lower()
+            (values[f"{prefix}_mtime_ns"], values[f"{prefix}_size"],
+             values[f"{prefix}_width"], values[f"{prefix}_height"]) = image_info(folder / f"{image}.jpg")
+        values["status"] = "done" if values["a_mtime_ns"] and values["b_mtime_ns"] else "partial"
+        self._upsert(values)
+        return self.get(folder.name)
+    
+    def record_post(self, folder, latency=None, failed=False):
+        """Enregistre un post écrit par le pipeline (avec sa latence de génération)"""
+        self.refresh_folder(folder)
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE posts SET latency = ?, status = CASE WHEN ? THEN 'failed' ELSE status END WHERE folder = ?",
+                (latency, failed, Path(folder).name)
+            )
+    
+    def mark_archived(self, folder, month, images):
+        """Post archivé dans le mois month ; images = {"A": (mtime_ns, taille) de l'aperçu, ...}"""
+        values = {"folder": Path(folder).name, "archive": month}
+        for image in IMAGES:
+            values[f"{image.lower()}_mtime_ns"], values[f"{image.lower()}_size"] = images.get(image, (None, None))
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE posts SET archive = :archive, a_mtime_ns = :a_mtime_ns, a_size = :a_size, "
+                "b_mtime_ns = :b_mtime_ns, b_size = :b_size WHERE folder = :folder",
+                values
+            )
+    
+    def delete(self, folders):
+        """Retire des posts de l'index"""
+        with self._lock, self._db:
+            self._db.executemany("DELETE FROM posts WHERE folder = ?", [(Path(name).name,) for name in folders])
+    
+    def reconcile(self):
+        """Met l'index d'accord avec le disque ; renvoie les dossiers ajoutés, modifiés ou retirés"""
+        try:
+            with os.scandir(self.root) as entries:
+                on_disk = {
+                    entry.name: entry.stat().st_mtime_ns
+                    for entry in entries
+                    if entry.name.endswith(POST_SUFFIX) and entry.is_dir()
+                }
+        except OSError:
+            on_disk = {}
+        with self._lock:
+            indexed = dict(self._db.execute("SELECT folder, dir_mtime_ns FROM posts WHERE archive IS NULL"))
+        
+        changed = [name for name, mtime in on_disk.items() if indexed.get(name) != mtime]
+        removed = [name for name in indexed if name not in on_disk]
+        for name in changed:
+            self.refresh_folder(name)
+        if removed:
+            self.delete(removed)
+        return changed + removed
+    
+    def _upsert(self, values):
+        columns = ", ".join(values)
+        placeholders = ", ".join(f":{name}" for name in values)
+        updates = ", ".join(f"{name} = excluded.{name}" for name in DISK_COLUMNS)
+        # Un post en échec le reste tant qu'il est incomplet
+        with self._lock, self._db:
+            self._db.execute(
+                f"INSERT INTO posts ({columns}) VALUES ({placeholders}) "
+                f"ON CONFLICT (folder) DO UPDATE SET {updates}, "
+                "status = CASE WHEN posts.status = 'failed' AND excluded.status != 'done' "
+                "THEN 'failed' ELSE excluded.status END",
+                values
+            )
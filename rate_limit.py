@@ -0,0 +1,179 @@
+# rate_limit.py - Limites de débit et de concurrence côté client (quotas de l'API)
+"""Limiteur partagé par tous les appels à l'API WaveSpeed.
+
+Deux seaux à jetons bornent le débit des submits (par minute) et des
+polls (par seconde). Un régulateur AIMD borne le nombre de tâches en
+cours côté serveur : +1 après une série de réponses saines, divisé par
+deux sur un 429, réduit d'un quart sur une erreur 5xx. Un Retry-After
+met submits et polls en pause jusqu'à la date indiquée.
+
+Un submit refusé en 429 (ou 503) n'a lancé aucune génération : il est
+rejoué après la pause au lieu de faire échouer le post.
+"""
+import math
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+THROTTLE_STATUSES = (429, 503)
+
+
+def retry_after_seconds(value, now=None):
+    """Délai d'un en-tête Retry-After (secondes ou date HTTP), None s'il est illisible"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, date.timestamp() - (time.time() if now is None else now))
+
+
+class TokenBucket:
+    """Seau à jetons : rate jetons par seconde, au plus burst d'avance"""
+    
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def reserve(self):
+        """Prend un jeton si possible ; sinon renvoie le délai avant le prochain (sans le prendre)"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+    
+    def acquire(self):
+        """Attend un jeton (bloquant)"""
+        while True:
+            wait = self.reserve()
+            if not wait:
+                return
+            time.sleep(wait)
+
+
+class RateLimiter:
+    """Seaux à jetons (submits, polls) et régulateur de concurrence adaptatif"""
+    
+    def __init__(self, submits_per_minute=30, polls_per_second=5, max_concurrency=8, min_concurrency=1,
+                 initial_concurrency=None, backoff=5.0, max_backoff=60.0, max_attempts=6):
+        self.submits = TokenBucket(submits_per_minute / 60, burst=max(1, submits_per_minute // 10))
+        self.polls = TokenBucket(polls_per_second, burst=max(1, polls_per_second))
+        self.min_concurrency = max(1, min_concurrency)
+        self.max_concurrency = max(self.min_concurrency, max_concurrency)
+        self.limit = min(self.max_concurrency, max(self.min_concurrency, initial_concurrency or self.max_concurrency))
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+        self.in_flight = 0
+        self.throttled = 0
+        self.paused_until = 0.0
+        self._tasks = set()
+        self._successes = 0
+        self._strikes = 0
+        self._cond = threading.Condition()
+    
+    # --- Submits ---
+    
+    def acquire_submit(self):
+        """Attend une place (concurrence), la fin d'une pause et un jeton de submit"""
+        with self._cond:
+            while True:
+                pause = self.paused_until - time.monotonic()
+                if pause > 0:
+                    self._cond.wait(pause)
+                elif self.in_flight >= self.limit:
+                    self._cond.wait()
+                else:
+                    break
+            self.in_flight += 1
+        self.submits.acquire()
+    
+    def release_submit(self):
+        """Rend la place d'un submit qui n'a pas lancé de tâche"""
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+    
+    def task_started(self, task_url):
+        """La place du submit est gardée jusqu'à la fin de la tâche"""
+        with self._cond:
+            self._tasks.add(task_url)
+    
+    def task_finished(self, task_url):
+        """Libère la place d'une tâche terminée (sans effet pour une tâche reprise)"""
+        with self._cond:
+            if task_url in self._tasks:
+                self._tasks.discard(task_url)
+                self.in_flight -= 1
+                self._cond.notify_all()
+    
+    # --- Polls ---
+    
+    def poll_delay(self):
+        """0 si un poll peut partir (jeton pris), sinon le délai à attendre"""
+        pause = self.paused_until - time.monotonic()
+        if pause > 0:
+            return pause
+        return self.polls.reserve()
+    
+    # --- Adaptation ---
+    
+    def on_response(self, status_code, retry_after=None):
+        """Ajuste la limite de concurrence selon le statut d'une réponse de l'API"""
+        with self._cond:
+            if status_code == 429 or (status_code in THROTTLE_STATUSES and retry_after is not None):
+                self.throttled += 1
+                self._strikes += 1
+                self._successes = 0
+                self.limit = max(self.min_concurrency, self.limit // 2)
+                if retry_after is None:
+                    retry_after = min(self.max_backoff, self.backoff * 2 ** (self._strikes - 1))
+                self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+            elif status_code >= 500:
+                self._successes = 0
+                self.limit = max(self.min_concurrency, self.limit - max(1, self.limit // 4))
+            elif status_code < 400:
+                self._strikes = 0
+                self._successes += 1
+                if self._successes >= self.limit and self.limit < self.max_concurrency:
+                    self.limit += 1
+                    self._successes = 0
+            self._cond.notify_all()
+    
+    def snapshot(self):
+        """Limites courantes, pour la barre de statut"""
+        with self._cond:
+            return {
+                "limit": self.limit,
+                "max": self.max_concurrency,
+                "in_flight": self.in_flight,
+                "submits_per_minute": self.submits.rate * 60,
+                "polls_per_second": self.polls.rate,
+                "paused": max(0.0, self.paused_until - time.monotonic()),
+                "throttled": self.throttled,
+            }
+    
+    def describe(self):
+        """Résumé d'une ligne des limites courantes"""
+        s = self.snapshot()
+        text = (
+            f"⚙️ {s['in_flight']}/{s['limit']} tâches (max {s['max']}) · "
+            f"{s['submits_per_minute']:.0f} submits/min · {s['polls_per_second']:.0f} polls/s"
+        )
+        if s["paused"]:
+            text += f" · ⏸ {math.ceil(s['paused'])}s"
+        if s["throttled"]:
+            text += f" · {s['throttled']}×429"
+        return text
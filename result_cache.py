@@ -0,0 +1,137 @@
+# result_cache.py - Cache des images générées, par requête (référence + prompt + paramètres)
+"""Cache adressé par contenu des résultats de génération.
+
+La clé est un hash de la requête : endpoint, prompt, paramètres et hash
+des images de référence (pour une variante B, le hash du contenu de A).
+Une même requête redonne donc la même clé, quelle que soit l'URL
+temporaire renvoyée par l'API.
+
+Les fichiers sont dans <output_folder>/.cache/results/ (lien physique vers
+l'image du post quand c'est possible, sinon copie) ; l'index SQLite garde
+taille, hash et date de dernière utilisation pour l'éviction LRU au-delà
+de max_bytes.
+"""
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+CACHE_DIR = Path(".cache") / "results"
+
+
+def request_key(endpoint, prompt, images, params):
+    """Clé d'une requête de génération (images : data-URI, URLs ou hash de contenu)"""
+    content = json.dumps({
+        "endpoint": endpoint,
+        "prompt": prompt,
+        "images": [hashlib.sha256(image.encode("utf-8")).hexdigest() for image in images],
+        "params": params,
+    }, sort_keys=True)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _link_or_copy(src, dest):
+    """Place src en dest (lien physique si possible), de façon atomique"""
+    tmp = Path(dest).with_name(f"{Path(dest).name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dest)
+
+
+class ResultCache:
+    """Résultats déjà générés, retrouvés par clé de requête, avec éviction LRU"""
+    
+    def __init__(self, output_folder, max_bytes=2 * 1024 ** 3):
+        self.root = Path(output_folder) / CACHE_DIR
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.root / "index.sqlite3", check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, size INTEGER NOT NULL, sha256 TEXT NOT NULL, "
+                "created REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+    
+    def _path(self, key):
+        return self.root / key[:2] / f"{key}.jpg"
+    
+    def fetch(self, key, dest):
+        """Copie le résultat en cache vers dest ; renvoie {path, size, sha256} ou None"""
+        with self._lock:
+            row = self._db.execute("SELECT size, sha256 FROM results WHERE key = ?", (key,)).fetchone()
+        path = self._path(key)
+        # Fichier supprimé ou modifié sur place depuis : l'entrée ne vaut plus rien
+        if row is None or not path.exists() or file_sha256(path) != row[1]:
+            if row is not None:
+                self._drop(key)
+            self.misses += 1
+            return None
+        
+        _link_or_copy(path, dest)
+        with self._lock, self._db:
+            self._db.execute("UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key))
+        self.hits += 1
+        return {"path": str(dest), "size": row[0], "sha256": row[1]}
+    
+    def put(self, key, path, sha256=None):
+        """Ajoute un résultat téléchargé (path) sous la clé de sa requête"""
+        if self.max_bytes <= 0:
+            return
+        dest = self._path(key)
+        dest.parent.mkdir(exist_ok=True)
+        _link_or_copy(path, dest)
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results (key, size, sha256, created, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, dest.stat().st_size, sha256 or file_sha256(dest), now, now)
+            )
+        self.evict()
+    
+    def evict(self):
+        """Supprime les résultats les moins récemment utilisés au-delà de max_bytes"""
+        with self._lock:
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+            if total <= self.max_bytes:
+                return 0
+            victims = []
+            for key, size in self._db.execute("SELECT key, size FROM results ORDER BY last_used"):
+                if total <= self.max_bytes:
+                    break
+                victims.append(key)
+                total -= size
+        for key in victims:
+            self._drop(key)
+        return len(victims)
+    
+    def stats(self):
+        with self._lock:
+            count, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        return {"entries": count, "bytes": size, "hits": self.hits, "misses": self.misses}
+    
+    def _drop(self, key):
+        self._path(key).unlink(missing_ok=True)
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+    
+    def close(self):
+        with self._lock:
+            self._db.close()
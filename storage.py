@@ -0,0 +1,533 @@
+# storage.py - Rétention, nettoyage et archives mensuelles du dossier de sortie : python main.py storage
+"""Garde le dossier de sortie à une taille maîtrisée.
+
+    python main.py storage                       # règles de config.json + nettoyage
+    python main.py storage --dry-run             # affiche ce qui serait fait
+    python main.py storage --days 90 --action delete
+    python main.py storage --restore 2026-01-03_10-00-00-post
+
+Règles de rétention (retention_days, retention_max_posts, retention_max_gb)
+sur les posts du dossier : au-delà, les plus anciens sont archivés ou
+supprimés (retention_action). Les posts en cours (journal) ne sont jamais
+touchés.
+
+Un post archivé part dans l'archive ZIP de son mois (.archive/AAAA-MM.zip)
+et son dossier est retiré. Les textes y sont compressés ; les JPEG, déjà
+compressés, y sont par défaut tels quels : --restore rend les originaux
+intacts, mais l'archivage sort surtout les posts de la galerie sans gagner
+de place. Avec archive_quality > 0 (choix explicite), ils sont ré-encodés
+à cette qualité : avec perte, mais 2 à 3 fois plus petits (l'original est
+gardé si le ré-encodage ne gagne rien). Un aperçu réduit de A et B reste
+dans .archive/AAAA-MM/<dossier>/ : la galerie continue de l'afficher, avec
+ses miniatures.
+
+Des posts sont laissés en place, avec la raison dans le rapport (et dans
+--dry-run) :
+- images encore liées au cache des résultats (liens physiques de
+  .cache/results) : l'archive les dupliquerait ; ils seront archivés
+  quand le cache les aura évincées ;
+- avec perte, archive et aperçus plus gros que ce que le dossier libère.
+Les fichiers encore liés au cache ne comptent jamais dans l'espace libéré.
+
+Le nettoyage retire les orphelins :
+- dossiers de post sans image ;
+- fichiers .tmp abandonnés ;
+- aperçus d'archive sans post ;
+- miniatures et prévisualisations d'images disparues.
+
+Les dossiers sont d'abord renommés dans .trash puis supprimés : le watcher
+et la galerie ne voient jamais un post à moitié effacé.
+"""
+import argparse
+import io
+import os
+import shutil
+import sys
+import threading
+import time
+import zipfile
+from datetime import datetime
+from pathlib import Path
+
+from config import CONFIG_FILE, load_config, retention_policy
+from journal import JobJournal
+from post_index import ARCHIVE_DIR, IMAGES, POST_SUFFIX, PostIndex
+from thumbnails import PreviewPyramid, ThumbnailStore, load_scaled
+
+TRASH_DIR = ".trash"
+ARCHIVE_PREVIEW = 512       # plus grand côté des aperçus gardés pour la galerie
+ARCHIVE_QUALITY = 0         # qualité JPEG des images archivées (0 : telles quelles, sans perte)
+ORPHAN_GRACE = 3600         # un dossier ou un .tmp plus récent peut être en cours d'écriture
+
+# Raisons de ne pas archiver un post (rapport, --dry-run)
+SKIP_CACHED = "images encore dans le cache des résultats"
+SKIP_NO_GAIN = "l'archive ne libérerait rien"
+
+
+def folder_size(path, shared=True):
+    """Taille totale des fichiers d'un dossier (récursif)
+
+    shared=False : sans les fichiers qui ont d'autres liens physiques (cache
+    des résultats), que la suppression du dossier ne libère pas.
+    """
+    total = 0
+    for folder, _, files in os.walk(path):
+        for name in files:
+            try:
+                stat = os.stat(os.path.join(folder, name))
+            except OSError:
+                continue
+            if shared or stat.st_nlink <= 1:
+                total += stat.st_size
+    return total
+
+
+def month_of(created):
+    return datetime.fromtimestamp(created).strftime("%Y-%m")
+
+
+def new_report():
+    return {"archived": 0, "deleted": 0, "restored": 0, "orphans": 0, "skipped": 0, "skips": {}, "freed": 0,
+            "errors": []}
+
+
+def skip(report, reason):
+    """Compte un post laissé en place, par raison"""
+    report["skipped"] += 1
+    report["skips"][reason] = report["skips"].get(reason, 0) + 1
+
+
+def describe_skips(skips):
+    """« 3 non archivés (raison), ... » à partir de {raison: nombre}"""
+    return ", ".join(f"{count} non archivés ({reason})" for reason, count in skips.items())
+
+
+def describe(report):
+    """Résumé d'une ligne d'un rapport de nettoyage"""
+    parts = [f"{report[key]} {label}" for key, label in (
+        ("archived", "archivés"), ("deleted", "supprimés"), ("restored", "restaurés"), ("orphans", "orphelins")
+    ) if report[key]]
+    if report["skips"]:
+        parts.append(describe_skips(report["skips"]))
+    text = f"♻️ {report['freed'] / 1e6:.1f} Mo libérés"
+    if parts:
+        text += " : " + ", ".join(parts)
+    if report["errors"]:
+        text += f" ({len(report['errors'])} erreurs)"
+    return text
+
+
+class StorageManager:
+    """Rétention, archivage et nettoyage du dossier de sortie (à appeler hors du thread de l'interface)"""
+    
+    def __init__(self, index, journal=None, thumbnails=None, previews=None, archive_quality=ARCHIVE_QUALITY, grace=ORPHAN_GRACE):
+        self.index = index
+        self.root = index.root
+        self.archive_root = self.root / ARCHIVE_DIR
+        self.journal = journal
+        self.thumbnails = thumbnails
+        self.previews = previews
+        self.archive_quality = archive_quality
+        self.grace = grace
+        self._lock = threading.RLock()
+    
+    def busy_folders(self):
+        """Dossiers des posts en cours de génération (journal)"""
+        if self.journal is None:
+            return set()
+        return {Path(post["post"]).name for post in self.journal.unfinished()}
+    
+    # --- Rétention ---
+    
+    def plan(self, days=0, max_posts=0, max_gb=0, now=None, action="archive", skipped=None):
+        """Posts du dossier qui dépassent les règles, du plus ancien au plus récent
+
+        Pour action="archive", les posts qui ne peuvent pas l'être tout de
+        suite sont retirés de la liste et ajoutés à skipped : (post, raison).
+        """
+        cutoff = (now or time.time()) - days * 86400 if days else None
+        busy = self.busy_folders()
+        selected = []
+        kept = size = 0
+        full = False
+        for row in self.index.posts():      # du plus récent au plus ancien
+            if row["archive"] or row["folder"] in busy:
+                continue
+            images = (row["a_size"] or 0) + (row["b_size"] or 0)
+            full = full or (max_posts and kept >= max_posts) or (max_gb and size + images > max_gb * 1e9)
+            if full or (cutoff is not None and row["created"] < cutoff):
+                reason = self.archive_blocker(row) if action != "delete" else None
+                if reason is None:
+                    selected.append(row)
+                elif skipped is not None:
+                    skipped.append((row, reason))
+            else:
+                kept += 1
+                size += images
+        return selected[::-1]
+    
+    def apply(self, days=0, max_posts=0, max_gb=0, action="archive", on_progress=None):
+        """Applique les règles puis nettoie les orphelins ; renvoie le rapport"""
+        report = new_report()
+        self.index.reconcile()
+        skipped = []
+        rows = self.plan(days, max_posts, max_gb, action=action, skipped=skipped)
+        for _, reason in skipped:
+            skip(report, reason)
+        for done, row in enumerate(rows, 1):
+            if action == "delete":
+                self.delete_posts([row["folder"]], report)
+            else:
+                self.archive_post(row, report)
+            if on_progress:
+                on_progress(done, len(rows))
+        self.clean_orphans(report)
+        return report
+    
+    # --- Archives ---
+    
+    def archive_blocker(self, row):
+        """Raison de ne pas archiver ce post maintenant, ou None"""
+        for image in IMAGES:
+            try:
+                if (self.root / row["folder"] / f"{image}.jpg").stat().st_nlink > 1:
+                    return SKIP_CACHED
+            except OSError:
+                pass
+        return None
+    
+    def archive_post(self, row, report=None):
+        """Archive un post dans le ZIP de son mois, garde ses aperçus et retire son dossier"""
+        report = new_report() if report is None else report
+        name = row["folder"]
+        folder = self.root / name
+        month = month_of(row["created"])
+        archive = self.archive_root / f"{month}.zip"
+        previews = self.archive_root / month / name
+        try:
+            reason = self.archive_blocker(row)
+            if reason is not None:
+                skip(report, reason)
+                return report
+            size = folder_size(folder, shared=False)
+            files = sorted(path for path in folder.iterdir() if path.is_file() and not path.name.endswith(".tmp"))
+            entries = [
+                (path, self._archived_image(path) if path.suffix.lower() == ".jpg" else path.read_bytes())
+                for path in files
+            ]
+            thumbs = {}
+            for image in IMAGES:
+                source = folder / f"{image}.jpg"
+                if source.exists():
+                    out = io.BytesIO()
+                    with load_scaled(source, (ARCHIVE_PREVIEW, ARCHIVE_PREVIEW), fast=False) as img:
+                        img.convert("RGB").save(out, "JPEG", quality=85)
+                    thumbs[image] = out.getvalue()
+            # Avec perte, l'archive doit libérer de la place (textes comptés non compressés : estimation haute)
+            cost = sum(len(data) for _, data in entries) + sum(len(data) for data in thumbs.values())
+            if self.archive_quality and cost >= size:
+                skip(report, SKIP_NO_GAIN)
+                return report
+            
+            with self._lock:
+                self.archive_root.mkdir(parents=True, exist_ok=True)
+                self._rewrite_without(archive, name)    # reste d'un archivage interrompu
+                before = archive.stat().st_size if archive.exists() else 0
+                with zipfile.ZipFile(archive, 'a', allowZip64=True) as zf:
+                    for path, data in entries:
+                        info = zipfile.ZipInfo.from_file(path, f"{name}/{path.name}")
+                        compression = zipfile.ZIP_STORED if path.suffix.lower() == ".jpg" else zipfile.ZIP_DEFLATED
+                        zf.writestr(info, data, compress_type=compression)
+                with open(archive, 'rb+') as f:
+                    os.fsync(f.fileno())
+                growth = archive.stat().st_size - before
+            
+            images = {}
+            previews.mkdir(parents=True, exist_ok=True)
+            for image, data in thumbs.items():
+                target = previews / f"{image}.jpg"
+                target.write_bytes(data)
+                stat = target.stat()
+                images[image] = (stat.st_mtime_ns, stat.st_size)
+            
+            # Index d'abord : quand le watcher voit le dossier disparaître, le post est déjà archivé
+            self.index.mark_archived(name, month, images)
+            self._invalidate(folder)
+            self._remove(folder)
+        except Exception as e:
+            report["errors"].append(f"{name}: {e}")
+            return report
+        report["archived"] += 1
+        report["freed"] += size - growth - sum(stat[1] for stat in images.values())
+        return report
+    
+    def _archived_image(self, path):
+        """Octets d'une image pour l'archive : ré-encodée à archive_quality, ou le fichier tel quel s'il est plus petit"""
+        original = path.read_bytes()
+        if not self.archive_quality:
+            return original
+        from PIL import Image
+        
+        out = io.BytesIO()
+        with Image.open(io.BytesIO(original)) as img:
+            img.convert("RGB").save(
+                out, "JPEG", quality=self.archive_quality, optimize=True, progressive=True, exif=img.info.get("exif", b"")
+            )
+        return out.getvalue() if out.tell() < len(original) else original
+    
+    def restore(self, name, report=None):
+        """Remet un post archivé dans le dossier de sortie (et le retire de son archive)"""
+        report = new_report() if report is None else report
+        row = self.index.get(Path(name).name)
+        if row is None or not row["archive"]:
+            report["errors"].append(f"{name}: pas un post archivé")
+            return report
+        name, month = row["folder"], row["archive"]
+        staging = self.root / TRASH_DIR / f"restore.{time.time_ns()}"
+        try:
+            with self._lock, zipfile.ZipFile(self.archive_root / f"{month}.zip") as zf:
+                members = [member for member in zf.namelist() if member.startswith(f"{name}/")]
+                zf.extractall(staging, members)
+            # Dossier complet mis en place d'un coup (le watcher ne voit pas d'état intermédiaire)
+            os.replace(staging / name, self.root / name)
+            shutil.rmtree(staging, ignore_errors=True)
+            try:
+                staging.parent.rmdir()
+            except OSError:
+                pass
+            self.index.refresh_folder(name)
+            self._drop_archived(name, month)
+        except Exception as e:
+            report["errors"].append(f"{name}: {e}")
+            return report
+        report["restored"] += 1
+        return report
+    
+    def _drop_archived(self, name, month):
+        """Retire un post de son archive mensuelle (réécrite) et ses aperçus ; renvoie les octets libérés"""
+        archive = self.archive_root / f"{month}.zip"
+        previews = self.archive_root / month / name
+        freed = folder_size(previews)
+        shutil.rmtree(previews, ignore_errors=True)
+        try:
+            previews.parent.rmdir()     # dossier du mois, s'il est vide
+        except OSError:
+            pass
+        return freed + self._rewrite_without(archive, name)
+    
+    def _rewrite_without(self, archive, name):
+        """Réécrit l'archive sans les fichiers du post name ; renvoie les octets libérés"""
+        with self._lock:
+            if not archive.exists():
+                return 0
+            with zipfile.ZipFile(archive) as src:
+                if not any(member.startswith(f"{name}/") for member in src.namelist()):
+                    return 0
+                before = archive.stat().st_size
+                tmp = archive.with_name(f"{archive.name}.{os.getpid()}.tmp")
+                with zipfile.ZipFile(tmp, 'w', allowZip64=True) as dst:
+                    for info in src.infolist():
+                        if not info.filename.startswith(f"{name}/"):
+                            dst.writestr(info, src.read(info))
+                    empty = not dst.namelist()
+            if empty:
+                tmp.unlink()
+                archive.unlink()
+                return before
+            os.replace(tmp, archive)
+            return before - archive.stat().st_size
+    
+    # --- Suppression ---
+    
+    def delete_posts(self, names, report=None):
+        """Supprime des posts entiers (dossier ou archive) ; renvoie le rapport"""
+        report = new_report() if report is None else report
+        for name in names:
+            name = Path(name).name
+            row = self.index.get(name)
+            try:
+                if row is not None and row["archive"]:
+                    freed = self._drop_archived(name, row["archive"])
+                    self._invalidate(self.archive_root / row["archive"] / name)
+                else:
+                    folder = self.root / name
+                    freed = folder_size(folder, shared=False)
+                    self._invalidate(folder)
+                    self._remove(folder)
+                self.index.delete([name])
+            except Exception as e:
+                report["errors"].append(f"{name}: {e}")
+                continue
+            report["deleted"] += 1
+            report["freed"] += freed
+        return report
+    
+    def delete_image(self, path, report=None):
+        """Supprime une image ; le post entier s'il n'en reste aucune, ou s'il est archivé"""
+        report = new_report() if report is None else report
+        path = Path(path)
+        name = path.parent.name
+        row = self.index.get(name)
+        others = [path.parent / f"{image}.jpg" for image in IMAGES if f"{image}.jpg" != path.name]
+        if row is None or row["archive"] or not any(other.exists() for other in others):
+            return self.delete_posts([name], report)
+        try:
+            stat = path.stat()
+            freed = stat.st_size if stat.st_nlink <= 1 else 0
+            path.unlink()
+            self._invalidate_image(path)
+            self.index.refresh_folder(name)
+        except Exception as e:
+            report["errors"].append(f"{path}: {e}")
+            return report
+        report["freed"] += freed
+        return report
+    
+    # --- Orphelins ---
+    
+    def find_orphans(self):
+        """[(chemin, octets, raison)] à supprimer"""
+        now = time.time()
+        busy = self.busy_folders()
+        orphans = []
+        
+        for folder, dirs, files in os.walk(self.root):
+            if Path(folder) == self.root:
+                dirs[:] = [name for name in dirs if name != TRASH_DIR]
+                for name in list(dirs):
+                    path = Path(folder) / name
+                    if not name.endswith(POST_SUFFIX) or name in busy or now - path.stat().st_mtime < self.grace:
+                        continue
+                    if not any((path / f"{image}.jpg").exists() for image in IMAGES):
+                        orphans.append((path, folder_size(path), "post sans image"))
+                        dirs.remove(name)
+            for name in files:
+                path = Path(folder) / name
+                if name.endswith(".tmp") and now - path.stat().st_mtime > self.grace:
+                    orphans.append((path, path.stat().st_size, "fichier temporaire"))
+        
+        trash = self.root / TRASH_DIR
+        if trash.exists():
+            orphans.extend((path, folder_size(path), "corbeille") for path in trash.iterdir())
+        
+        # Aperçus d'archive dont le post n'est plus dans l'index (ou archivé ailleurs)
+        if self.archive_root.exists():
+            for month in self.archive_root.iterdir():
+                if not month.is_dir():
+                    continue
+                for folder in month.iterdir():
+                    row = self.index.get(folder.name)
+                    if row is None or row["archive"] != month.name:
+                        orphans.append((folder, folder_size(folder), "aperçu d'archive"))
+        return orphans
+    
+    def clean_orphans(self, report=None):
+        """Supprime les orphelins et les miniatures d'images disparues ; renvoie le rapport"""
+        report = new_report() if report is None else report
+        for path, size, reason in self.find_orphans():
+            try:
+                if path.is_dir():
+                    if path.parent == self.root:
+                        self._remove(path)
+                        self.index.delete([path.name])
+                    else:
+                        shutil.rmtree(path)
+                else:
+                    path.unlink()
+            except OSError as e:
+                report["errors"].append(f"{path}: {e}")
+                continue
+            report["orphans"] += 1
+            report["freed"] += size
+        
+        images = [path for row in self.index.posts() for image in IMAGES
+                  if (path := self.index.image_path(row, image)) is not None]
+        for store in (self.thumbnails, self.previews):
+            if store is not None:
+                report["freed"] += store.prune_orphans(images)
+        return report
+    
+    def _remove(self, folder):
+        """Renomme le dossier dans .trash (disparition atomique) puis le supprime"""
+        if not folder.exists():
+            return
+        trash = self.root / TRASH_DIR
+        trash.mkdir(exist_ok=True)
+        target = trash / f"{folder.name}.{time.time_ns()}"
+        os.replace(folder, target)
+        shutil.rmtree(target, ignore_errors=True)
+        try:
+            trash.rmdir()
+        except OSError:
+            pass        # autre suppression en cours
+    
+    def _invalidate(self, folder):
+        for image in IMAGES:
+            self._invalidate_image(folder / f"{image}.jpg")
+    
+    def _invalidate_image(self, path):
+        for store in (self.thumbnails, self.previews):
+            if store is not None:
+                store.invalidate(path)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="main.py storage", description="Rétention, archives et nettoyage des posts")
+    parser.add_argument("--config", default=str(CONFIG_FILE), help="fichier de configuration (défaut: config.json)")
+    parser.add_argument("--output", help="dossier des posts (défaut: output_folder)")
+    parser.add_argument("--days", type=float, help="garder les posts de moins de N jours (défaut: retention_days)")
+    parser.add_argument("--max-posts", type=int, help="garder les N posts les plus récents (défaut: retention_max_posts)")
+    parser.add_argument("--max-gb", type=float, help="garder au plus N Go d'images (défaut: retention_max_gb)")
+    parser.add_argument("--action", choices=("archive", "delete"), help="au-delà : archiver ou supprimer "
+                                                                         "(défaut: retention_action)")
+    parser.add_argument("--dry-run", action="store_true", help="affiche ce qui serait fait, sans rien modifier")
+    parser.add_argument("--restore", action="append", metavar="DOSSIER", help="restaure un post archivé (répétable)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    config = load_config(args.config)
+    output_folder = args.output or config.get("output_folder", str(Path.home() / "WaveSpeed_Images"))
+    policy = retention_policy(config)
+    for key in ("days", "max_posts", "max_gb", "action"):
+        if getattr(args, key) is not None:
+            policy[key] = getattr(args, key)
+    
+    index = PostIndex(output_folder)
+    manager = StorageManager(
+        index, JobJournal(output_folder), ThumbnailStore(output_folder), PreviewPyramid(output_folder),
+        archive_quality=config.get("archive_quality", ARCHIVE_QUALITY)
+    )
+    try:
+        if args.restore:
+            report = new_report()
+            for name in args.restore:
+                manager.restore(name, report)
+        elif args.dry_run:
+            index.reconcile()
+            skipped = []
+            rows = manager.plan(**policy, skipped=skipped)
+            verb = "supprimé" if policy["action"] == "delete" else "archivé"
+            for row in rows:
+                size = (row["a_size"] or 0) + (row["b_size"] or 0)
+                print(f"   {verb:<9} {row['folder']}  {size / 1e6:6.1f} Mo")
+            for row, reason in skipped:
+                print(f"   gardé     {row['folder']}  ({reason})")
+            orphans = manager.find_orphans()
+            for path, size, reason in orphans:
+                print(f"   orphelin  {path}  {size / 1e6:6.1f} Mo  ({reason})")
+            print(f"🔎 {len(rows)} posts {verb}s, {len(skipped)} gardés, {len(orphans)} orphelins (rien n'a été modifié)")
+            return 0
+        else:
+            def progress(done, total):
+                if done == total or done % 20 == 0:
+                    print(f"   {done}/{total} posts")
+            
+            report = manager.apply(on_progress=progress, **policy)
+    finally:
+        index.close()
+    print(describe(report))
+    for error in report["errors"]:
+        print(f"❌ {error}")
+    return 1 if report["errors"] else 0
@@ -0,0 +1,39 @@
+# tests/conftest.py - Fixtures partagées : dossier de sortie avec des posts générés
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def write_post(output_folder, name, sizes=((1152, 2048), (768, 1344)), caption="caption"):
+    """Crée un dossier de post (A.jpg, B.jpg, textes) avec des images compressibles comme de vraies photos"""
+    from PIL import Image, ImageDraw
+    
+    folder = Path(output_folder) / name
+    folder.mkdir(parents=True)
+    for image, (width, height) in zip(("A", "B"), sizes):
+        img = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+        ImageDraw.Draw(img).ellipse((40, 40, width - 40, height // 2), fill=(200, 30, 90))
+        img.save(folder / f"{image}.jpg", quality=95)
+    (folder / "caption.txt").write_text(caption, encoding="utf-8")
+    (folder / "prompts.txt").write_text(f"PROMPT A:\nA {name}\n\nPROMPT B:\nB {name}", encoding="utf-8")
+    return folder
+
+
+@pytest.fixture
+def output_folder(tmp_path):
+    folder = tmp_path / "out"
+    folder.mkdir()
+    return folder
+
+
+@pytest.fixture
+def mock():
+    """Faux serveur WaveSpeed local (générations de 2 s)"""
+    from mock_server import MockWaveSpeed
+    
+    server = MockWaveSpeed(latency=2.0, jitter=0).start()
+    yield server
+    server.stop()
@@ -0,0 +1,63 @@
+# tests/test_client.py - Fermeture du client async : ordonnanceur, session et places du limiteur
+import asyncio
+import time
+
+import pytest
+
+from mock_server import make_jpeg
+from rate_limit import RateLimiter
+from wavespeed_async import AsyncWaveSpeedClient, encode_image
+from wavespeed_client import EDIT_PATH, ApiError, HttpClient, PollScheduler
+
+
+def test_close_shuts_down_what_the_client_built(mock):
+    async def scenario():
+        client = AsyncWaveSpeedClient("test", api_base=mock.url)
+        other = client.with_key("other")
+        task_url = await client.submit("a cat", [encode_image(make_jpeg(64, 64))])
+        waiting = asyncio.ensure_future(client.wait_for_result(task_url))
+        await asyncio.sleep(0.1)
+        await other.close()     # un clone ne ferme rien de partagé
+        assert client.poller.in_flight() == 1
+        await client.close()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        return client
+    
+    client = asyncio.run(scenario())
+    assert not client.poller._thread.is_alive()
+
+
+def test_close_leaves_shared_resources_and_frees_limiter_slots(mock):
+    limiter = RateLimiter()
+    http = HttpClient(limiter=limiter)
+    poller = PollScheduler(http)
+    
+    async def scenario():
+        async with AsyncWaveSpeedClient("test", http=http, poller=poller, api_base=mock.url) as client:
+            task_url = await client.submit("a cat", [encode_image(make_jpeg(64, 64))])
+            return client.poller.watch("test", task_url)
+    
+    future = asyncio.run(scenario())
+    # Ordonnanceur passé en paramètre : toujours en marche après la fermeture du client
+    assert poller._thread.is_alive() and limiter.in_flight == 1
+    poller.close()
+    http.close()
+    assert future.cancelled() and limiter.in_flight == 0 and not poller._thread.is_alive()
+
+
+def test_throttled_poll_reaches_the_limiter_on_first_reply(mock):
+    mock.throttled_polls = 1
+    limiter = RateLimiter()
+    http = HttpClient(limiter=limiter)
+    task_url = http.submit("test", {"prompt": "a cat", "images": [encode_image(make_jpeg(64, 64))]},
+                           url=f"{mock.url}{EDIT_PATH}")
+    started = time.monotonic()
+    with pytest.raises(ApiError) as error:
+        http.get_task("test", task_url)
+    http.close()
+    
+    # Pas de retry urllib3 sur Retry-After : une seule requête, sans attente
+    assert error.value.status_code == 429 and error.value.retry_after == 2
+    assert mock.stats["requests"]["poll"] == 1 and time.monotonic() - started < 1
+    assert limiter.throttled == 1
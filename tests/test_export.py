@@ -0,0 +1,52 @@
+# tests/test_export.py - Export groupé, y compris des posts archivés
+import json
+
+from PIL import Image
+
+from conftest import write_post
+from export import PROFILES, export_posts, select_posts
+from post_index import PostIndex
+from storage import StorageManager
+
+
+def test_export_reads_archived_originals(output_folder, tmp_path):
+    write_post(output_folder, "2026-01-05_10-00-00-post")
+    write_post(output_folder, "2026-02-05_10-00-00-post")
+    index = PostIndex(output_folder)
+    index.reconcile()
+    
+    report = StorageManager(index).archive_post(index.get("2026-01-05_10-00-00-post"))
+    assert report["archived"] == 1 and not report["errors"]
+    assert not (output_folder / "2026-01-05_10-00-00-post").exists()
+    
+    rows = select_posts(index)
+    profiles = {"webp": PROFILES["webp"], "instagram": PROFILES["instagram"]}
+    manifest = export_posts(rows, output_folder, tmp_path / "export", profiles, workers=1)
+    index.close()
+    
+    assert manifest["errors"] == []
+    archived = next(post for post in manifest["posts"] if post["folder"] == "2026-01-05_10-00-00-post")
+    # Taille d'origine : l'original de l'archive, pas l'aperçu réduit de la galerie
+    assert (archived["files"]["webp"]["A"]["width"], archived["files"]["webp"]["A"]["height"]) == (1152, 2048)
+    assert (archived["files"]["instagram"]["B"]["width"], archived["files"]["instagram"]["B"]["height"]) == (1080, 1350)
+    with Image.open(tmp_path / "export" / "webp" / "2026-01-05_10-00-00-post" / "A.webp") as img:
+        assert img.size == (1152, 2048)
+    saved = json.loads((tmp_path / "export" / "manifest.json").read_text(encoding="utf-8"))
+    assert len(saved["posts"]) == 2
+
+
+def test_export_zip_of_live_posts(output_folder, tmp_path):
+    import zipfile
+    
+    write_post(output_folder, "2026-02-05_10-00-00-post", caption="gothique")
+    index = PostIndex(output_folder)
+    index.reconcile()
+    manifest = export_posts(select_posts(index, search="gothique"), output_folder, tmp_path / "posts.zip",
+                            {"threads": PROFILES["threads"]}, workers=1)
+    index.close()
+    
+    assert manifest["errors"] == []
+    with zipfile.ZipFile(tmp_path / "posts.zip") as zf:
+        names = set(zf.namelist())
+    assert {"threads/2026-02-05_10-00-00-post/A.jpg", "threads/2026-02-05_10-00-00-post/B.jpg",
+            "threads/2026-02-05_10-00-00-post/caption.txt", "manifest.json"} <= names
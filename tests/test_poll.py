@@ -0,0 +1,79 @@
+# tests/test_poll.py - PollScheduler : premier poll à froid et statistiques bornées
+import json
+import time
+
+import pytest
+
+from wavespeed_client import (
+    COLD_FIRST_POLL, MAX_RECORDS, STATS_KEEP, STATS_MAX_LINES, CompletionEstimator, PollScheduler
+)
+
+
+class FakeHttp:
+    """Tâches toujours terminées ; note l'heure de chaque poll"""
+    limiter = None
+    metrics = None
+    
+    def __init__(self):
+        self.polled = []
+    
+    def get_task(self, api_key, task_url):
+        self.polled.append(time.monotonic())
+        return {"status": "completed", "outputs": [f"{task_url}.jpg"]}
+    
+    def count_retry(self, call, reason):
+        pass
+
+
+@pytest.fixture
+def scheduler():
+    """Fabrique de PollScheduler, tous fermés à la fin du test (boucle et pool de polls)"""
+    created = []
+    
+    def make(http=None, **options):
+        poller = PollScheduler(http or FakeHttp(), **options)
+        created.append(poller)
+        return poller
+    
+    yield make
+    for poller in created:
+        poller.close()
+
+
+def test_cold_start_first_poll_is_capped():
+    estimator = CompletionEstimator()
+    assert estimator.first_poll_delay(0.5) <= COLD_FIRST_POLL
+    # Une estimation initiale trop haute est bornée tant qu'aucune durée n'est observée
+    assert CompletionEstimator(initial=20.0).first_poll_delay(0.5) == COLD_FIRST_POLL
+    estimator.observe(20.0)
+    assert estimator.first_poll_delay(0.5) == 15.0
+
+
+def test_first_poll_without_history_comes_quickly(scheduler):
+    http = FakeHttp()
+    poller = scheduler(http)
+    started = time.monotonic()
+    assert poller.watch("key", "task").result(timeout=10) == ["task.jpg"]
+    assert http.polled[0] - started <= COLD_FIRST_POLL + 0.5
+
+
+def test_records_are_bounded(scheduler):
+    poller = scheduler(min_interval=0.01)
+    futures = [poller.watch("key", f"task-{n}", resumed=True) for n in range(MAX_RECORDS + 200)]
+    for future in futures:
+        future.result(timeout=30)
+    summary = poller.summary()
+    assert summary["tasks"] == MAX_RECORDS and summary["completed"] == MAX_RECORDS
+
+
+def test_stats_file_is_compacted(tmp_path, scheduler):
+    stats = tmp_path / "poll_stats.jsonl"
+    line = json.dumps({"status": "completed", "seconds": 10.0, "last_pending": 8.0}) + "\n"
+    stats.write_text(line * (STATS_MAX_LINES * 4))
+    poller = scheduler(min_interval=0.01, stats_path=stats)
+    # Au lancement : fichier réduit, estimation faite sur les dernières lignes seulement
+    assert len(stats.read_text().splitlines()) == STATS_KEEP
+    assert poller.estimator.samples == STATS_KEEP
+    for future in [poller.watch("key", f"task-{n}", resumed=True) for n in range(STATS_MAX_LINES)]:
+        future.result(timeout=30)
+    assert len(stats.read_text().splitlines()) <= STATS_MAX_LINES
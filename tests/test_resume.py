@@ -0,0 +1,69 @@
+# tests/test_resume.py - Batch tué pendant le polling puis relancé, contre le faux serveur
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from journal import JobJournal
+from mock_server import make_jpeg
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def batch_command(tmp_path, mock):
+    lora = tmp_path / "lora.jpg"
+    lora.write_bytes(make_jpeg(256, 256))
+    config = tmp_path / "config.json"
+    config.write_text(json.dumps({
+        "api_key": "test", "api_base": mock.url, "lora_path": str(lora),
+        "output_folder": str(tmp_path / "out"), "result_cache_mb": 0,
+    }))
+    manifest = tmp_path / "posts.jsonl"
+    manifest.write_text(json.dumps({"prompt_a": "a cat", "prompt_b": "the same cat", "caption": "chat"}) + "\n")
+    return [sys.executable, str(ROOT / "main.py"), "batch", str(manifest), "--config", str(config)]
+
+
+def test_batch_killed_while_polling_resumes_without_resubmitting(tmp_path, mock):
+    command = batch_command(tmp_path, mock)
+    journal = JobJournal(tmp_path / "out")
+    
+    process = subprocess.Popen(command, cwd=tmp_path, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        limit = time.monotonic() + 30
+        while not any(post["steps"].get("A", {}).get("event") == "submitted" for post in journal.unfinished()):
+            assert process.poll() is None and time.monotonic() < limit, "A jamais soumise"
+            time.sleep(0.05)
+    finally:
+        process.kill()
+        process.wait()
+    assert mock.stats["submits"] == 1
+    
+    rerun = subprocess.run(command, cwd=tmp_path, capture_output=True, text=True, timeout=60)
+    assert rerun.returncode == 0, rerun.stdout + rerun.stderr
+    
+    # A est ré-attachée (pas resoumise) : seule B part en plus
+    assert mock.stats["submits"] == 2
+    assert journal.unfinished() == []
+    folders = [path for path in (tmp_path / "out").iterdir() if path.name.endswith("-post")]
+    assert len(folders) == 1
+    assert (folders[0] / "A.jpg").exists() and (folders[0] / "B.jpg").exists()
+
+
+def test_compact_keeps_lines_appended_by_other_processes(tmp_path):
+    journal = JobJournal(tmp_path)
+    for n in range(20):
+        journal.record(f"done-{n}", "started")
+        journal.record(f"done-{n}", "done")
+    # Un autre processus ajoute des posts pendant que celui-ci compacte
+    writer = subprocess.Popen([sys.executable, "-c", (
+        "import sys; sys.path.insert(0, sys.argv[1]); from journal import JobJournal; "
+        "journal = JobJournal(sys.argv[2]); "
+        "[journal.record(f'other-{n}', 'started') for n in range(200)]"
+    ), str(ROOT), str(tmp_path)])
+    while writer.poll() is None:
+        journal.compact()
+    writer.wait()
+    journal.compact()
+    
+    assert {post["post"] for post in journal.unfinished()} == {f"other-{n}" for n in range(200)}
@@ -0,0 +1,81 @@
+# tests/test_storage.py - Archives mensuelles : espace réellement libéré et restauration
+from conftest import write_post
+from post_index import ARCHIVE_DIR, PostIndex
+from result_cache import ResultCache
+from storage import SKIP_CACHED, StorageManager, folder_size, new_report
+
+POSTS = ("2026-01-05_10-00-00-post", "2026-01-06_10-00-00-post", "2026-01-07_10-00-00-post")
+
+
+def test_default_archive_is_lossless(output_folder):
+    folder = write_post(output_folder, POSTS[0])
+    originals = {path.name: path.read_bytes() for path in folder.iterdir()}
+    index = PostIndex(output_folder)
+    index.reconcile()
+    manager = StorageManager(index)
+    assert manager.archive_post(index.get(POSTS[0]))["archived"] == 1
+    
+    report = manager.restore(POSTS[0])
+    index.close()
+    
+    assert report["restored"] == 1 and not report["errors"]
+    assert {path.name: path.read_bytes() for path in folder.iterdir()} == originals
+
+
+def test_lossy_archive_frees_space(output_folder):
+    for name in POSTS:
+        write_post(output_folder, name)
+    originals = sum(folder_size(output_folder / name) for name in POSTS)
+    index = PostIndex(output_folder)
+    index.reconcile()
+    
+    manager = StorageManager(index, archive_quality=85)
+    report = new_report()
+    for name in POSTS:
+        manager.archive_post(index.get(name), report)
+    index.close()
+    
+    assert report["archived"] == 3 and not report["errors"]
+    assert report["freed"] > 0
+    # Archive et aperçus tiennent dans moins que les dossiers d'origine
+    assert folder_size(output_folder / ARCHIVE_DIR) + report["freed"] <= originals
+
+
+def test_archive_skips_posts_still_linked_from_cache(output_folder):
+    folder = write_post(output_folder, POSTS[0])
+    cache = ResultCache(output_folder)
+    for image in ("A", "B"):
+        cache.put(image * 64, folder / f"{image}.jpg")
+    index = PostIndex(output_folder)
+    index.reconcile()
+    
+    manager = StorageManager(index)
+    skipped = []
+    planned = manager.plan(max_posts=0, days=1, skipped=skipped)
+    report = manager.apply(days=1)
+    index.close()
+    cache.close()
+    
+    # Les images restent dans le cache : l'archive les dupliquerait, le post reste en place avec sa raison
+    assert planned == [] and [(row["folder"], reason) for row, reason in skipped] == [(POSTS[0], SKIP_CACHED)]
+    assert report["skips"] == {SKIP_CACHED: 1} and report["archived"] == 0 and report["freed"] == 0
+    assert folder.exists() and not (output_folder / ARCHIVE_DIR / "2026-01.zip").exists()
+
+
+def test_restore_removes_empty_month_folder(output_folder):
+    write_post(output_folder, POSTS[0])
+    index = PostIndex(output_folder)
+    index.reconcile()
+    manager = StorageManager(index)
+    manager.archive_post(index.get(POSTS[0]))
+    month = index.get(POSTS[0])["archive"]
+    assert (output_folder / ARCHIVE_DIR / month / POSTS[0]).is_dir()
+    
+    report = manager.restore(POSTS[0])
+    row = index.get(POSTS[0])
+    index.close()
+    
+    assert report["restored"] == 1 and not report["errors"]
+    assert not row["archive"] and (output_folder / POSTS[0] / "A.jpg").exists()
+    assert not (output_folder / ARCHIVE_DIR / month).exists()
+    assert not (output_folder / ARCHIVE_DIR / f"{month}.zip").exists()
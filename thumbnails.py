@@ -0,0 +1,259 @@
+# thumbnails.py - Cache des miniatures de la galerie (mémoire + disque)
+import hashlib
+import io
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+THUMB_SIZE = (150, 200)
+THUMBS_DIR = ".thumbs"
+PREVIEWS_DIR = ".previews"
+PREVIEW_LEVELS = (512, 1024, 2048)      # plus grand côté de chaque niveau de prévisualisation
+
+
+def file_key(path):
+    """Clé d'un fichier : chemin + mtime + taille (change si l'image est modifiée)"""
+    stat = os.stat(path)
+    return (str(Path(path).resolve()), stat.st_mtime_ns, stat.st_size)
+
+
+def load_scaled(path, size, fast=True):
+    """Ouvre une image réduite pour tenir dans size, en décodant le moins possible
+
+    Pour un JPEG : miniature EXIF intégrée si elle est assez grande (mode
+    fast), sinon décodage DCT réduit (draft, 1/2 à 1/8) juste au-dessus de
+    la taille voulue, puis redimensionnement final. fast=True utilise un
+    filtre bilinéaire (miniatures), sinon bicubique (prévisualisation).
+    """
+    from PIL import Image
+    
+    img = Image.open(path)
+    if img.format == "JPEG":
+        if fast:
+            embedded = _exif_thumbnail(img, size)
+            if embedded is not None:
+                img.close()
+                img = embedded
+        if img.format == "JPEG":
+            img.draft("RGB", size)
+    
+    if fast:
+        img.thumbnail(size, Image.Resampling.BILINEAR, reducing_gap=2.0)
+    else:
+        img.thumbnail(size, Image.Resampling.BICUBIC)
+    return img
+
+
+def _exif_thumbnail(img, size):
+    """Miniature JPEG intégrée dans l'EXIF (IFD1), si elle couvre size"""
+    from PIL import ExifTags, Image
+    
+    exif_bytes = img.info.get("exif")
+    if not exif_bytes:
+        return None
+    try:
+        ifd1 = img.getexif().get_ifd(ExifTags.IFD.IFD1)
+        offset = ifd1.get(0x0201)      # JPEGInterchangeFormat
+        length = ifd1.get(0x0202)      # JPEGInterchangeFormatLength
+        if not offset or not length:
+            return None
+        # Les offsets EXIF partent de l'en-tête TIFF, après "Exif\0\0"
+        start = 6 + offset if exif_bytes.startswith(b"Exif") else offset
+        thumb = Image.open(io.BytesIO(exif_bytes[start:start + length]))
+        thumb.load()
+    except Exception:
+        return None
+    
+    # Trop petite : elle serait agrandie, on décode l'image principale
+    scale = min(size[0] / img.width, size[1] / img.height, 1)
+    if thumb.width < img.width * scale or thumb.height < img.height * scale:
+        return None
+    return thumb
+
+
+class LRUCache:
+    """Petit cache LRU thread-safe"""
+    
+    def __init__(self, max_entries=300):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+    
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def discard_path(self, path):
+        """Retire toutes les entrées d'un fichier (quelle que soit sa version)"""
+        path = str(Path(path).resolve())
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == path]:
+                del self._entries[key]
+    
+    def __len__(self):
+        return len(self._entries)
+
+
+class ThumbnailStore:
+    """Miniatures JPEG stockées dans <output_folder>/.thumbs/
+
+    Chemin : .thumbs/<hash du chemin>/<hash mtime+taille>.jpg, ce qui permet
+    de retrouver (et supprimer) les miniatures d'une image même après
+    modification. Au-delà de max_entries, les plus anciennes sont évincées.
+    """
+    
+    def __init__(self, output_folder, size=THUMB_SIZE, max_entries=5000, quality=85, folder=THUMBS_DIR):
+        self.root = Path(output_folder) / folder
+        self.size = size
+        self.max_entries = max_entries
+        self.quality = quality
+    
+    def _folder(self, path):
+        return self.root / hashlib.sha1(str(path).encode("utf-8")).hexdigest()[:16]
+    
+    def path_for(self, key):
+        path, mtime_ns, size = key
+        version = hashlib.sha1(f"{mtime_ns}:{size}:{self.size}".encode()).hexdigest()[:12]
+        return self._folder(path) / f"{version}.jpg"
+    
+    def ensure(self, image_path, key=None):
+        """Chemin de la miniature de image_path, créée si besoin"""
+        key = key or file_key(image_path)
+        thumb = self.path_for(key)
+        if thumb.exists():
+            return thumb
+        with load_scaled(image_path, self.size) as img:
+            return self.save(key, img)
+    
+    def save(self, key, img):
+        """Écrit img (déjà réduite) comme miniature de key ; renvoie son chemin"""
+        thumb = self.path_for(key)
+        # Anciennes versions (image modifiée depuis)
+        if thumb.parent.exists():
+            for old in thumb.parent.glob("*.jpg"):
+                old.unlink(missing_ok=True)
+        thumb.parent.mkdir(parents=True, exist_ok=True)
+        tmp = thumb.with_name(f"{thumb.name}.{os.getpid()}.tmp")
+        img.convert("RGB").save(tmp, "JPEG", quality=self.quality)
+        os.replace(tmp, thumb)
+        return thumb
+    
+    def invalidate(self, image_path):
+        """Supprime les miniatures d'une image (supprimée ou modifiée)"""
+        shutil.rmtree(self._folder(Path(image_path).resolve()), ignore_errors=True)
+    
+    def prune_orphans(self, image_paths):
+        """Supprime les miniatures des images absentes de image_paths ; renvoie les octets libérés"""
+        if not self.root.exists():
+            return 0
+        keep = {self._folder(Path(path).resolve()).name for path in image_paths}
+        freed = 0
+        for folder in os.scandir(self.root):
+            if folder.is_dir() and folder.name not in keep:
+                freed += sum(entry.stat().st_size for entry in os.scandir(folder.path) if entry.is_file())
+                shutil.rmtree(folder.path, ignore_errors=True)
+        return freed
+    
+    def prune(self):
+        """Évince les miniatures les plus anciennes au-delà de max_entries"""
+        if not self.root.exists():
+            return 0
+        thumbs = []
+        for folder in os.scandir(self.root):
+            if folder.is_dir():
+                thumbs.extend(entry for entry in os.scandir(folder.path) if entry.name.endswith(".jpg"))
+        excess = len(thumbs) - self.max_entries
+        if excess <= 0:
+            return 0
+        thumbs.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in thumbs[:excess]:
+            os.unlink(entry.path)
+        return excess
+
+
+class PreviewPyramid:
+    """Niveaux de prévisualisation précalculés, dans <output_folder>/.previews/<niveau>/
+
+    Chaque niveau est un JPEG dont le plus grand côté vaut au plus le
+    niveau ; ils sont tous tirés d'un seul décodage de l'original. Le
+    preview prend le plus petit niveau qui couvre la zone d'affichage au
+    lieu de décoder l'image entière.
+    """
+    
+    def __init__(self, output_folder, levels=PREVIEW_LEVELS, max_entries=2000, quality=88):
+        self.levels = tuple(sorted(levels))
+        self.stores = {
+            level: ThumbnailStore(output_folder, (level, level), max_entries, quality, folder=Path(PREVIEWS_DIR) / str(level))
+            for level in self.levels
+        }
+    
+    def ensure(self, image_path, key=None):
+        """Crée les niveaux manquants (plus petits que l'original) ; renvoie leur nombre"""
+        from PIL import Image
+        
+        key = key or file_key(image_path)
+        with Image.open(image_path) as img:
+            longest = max(img.size)
+        missing = [level for level in self.levels
+                   if level < longest and not self.stores[level].path_for(key).exists()]
+        if not missing:
+            return 0
+        with load_scaled(image_path, (missing[-1], missing[-1]), fast=False) as img:
+            img = img.convert("RGB")
+            for level in reversed(missing):
+                img.thumbnail((level, level), Image.Resampling.BICUBIC)
+                self.stores[level].save(key, img)
+        return len(missing)
+    
+    def pick(self, image_path, key, box, size=None):
+        """Plus petit niveau existant qui couvre box (l'original sinon)
+
+        Avec la taille de l'original, on vise le plus grand côté de l'image
+        ajustée à box plutôt que celui de box.
+        """
+        needed = max(box)
+        if size and all(size):
+            needed = max(size) * min(box[0] / size[0], box[1] / size[1], 1)
+        for level in self.levels:
+            if level >= needed:
+                path = self.stores[level].path_for(key)
+                if path.exists():
+                    return path
+        return Path(image_path)
+    
+    def invalidate(self, image_path):
+        for store in self.stores.values():
+            store.invalidate(image_path)
+    
+    def prune(self):
+        return sum(store.prune() for store in self.stores.values())
+    
+    def prune_orphans(self, image_paths):
+        image_paths = list(image_paths)
+        return sum(store.prune_orphans(image_paths) for store in self.stores.values())
+
+
+def make_thumbnail(image_path, output_folder, key=None):
+    """Crée (si besoin) la miniature d'une image ; exécuté dans un processus du pool"""
+    return str(ThumbnailStore(output_folder).ensure(image_path, key))
+
+
+def make_previews(image_path, output_folder, key=None):
+    """Crée (si besoin) les niveaux de prévisualisation d'une image ; exécuté dans un processus du pool"""
+    return PreviewPyramid(output_folder).ensure(image_path, key)
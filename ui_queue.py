@@ -0,0 +1,45 @@
+# ui_queue.py - File d'événements vers le thread Tk
+"""Livraison au thread de l'interface des événements venus d'autres threads.
+
+Tk n'est pas thread-safe : les threads de travail (boucle asyncio,
+watcher, pools de miniatures) ne touchent jamais aux widgets. Ils
+déposent un appel dans une file (post) ; le thread Tk la vide toutes les
+`interval` ms avec window.after, au plus `budget` secondes par passage
+pour laisser l'interface répondre même sous une rafale d'événements.
+"""
+import queue
+import time
+
+
+class UiQueue:
+    """File d'appels (callback, args) exécutés dans le thread Tk"""
+    
+    def __init__(self, window, interval=30, budget=0.008, metrics=None):
+        self.window = window
+        self.interval = interval
+        self.budget = budget
+        self.metrics = metrics
+        self._queue = queue.SimpleQueue()
+    
+    def post(self, callback, *args):
+        """Demande l'exécution de callback(*args) dans le thread Tk (appelable de partout)"""
+        self._queue.put((time.perf_counter(), callback, args))
+    
+    def start(self):
+        self.window.after(self.interval, self._drain)
+        return self
+    
+    def _drain(self):
+        deadline = time.perf_counter() + self.budget
+        while time.perf_counter() < deadline:
+            try:
+                posted, callback, args = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if self.metrics is not None:
+                self.metrics.observe("ui_event_delay_seconds", time.perf_counter() - posted)
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"Erreur événement interface ({getattr(callback, '__name__', callback)}): {e}")
+        self.window.after(self.interval, self._drain)
@@ -0,0 +1,209 @@
+# watcher.py - Surveillance du dossier de sortie (inotify sous Linux, sinon scrutation)
+"""Signale les dossiers <...>-post créés, modifiés ou supprimés.
+
+Sous Linux, inotify (via ctypes, sans dépendance) surveille le dossier de
+sortie et chaque dossier de post. Ailleurs, ou si inotify n'est pas
+disponible, le dossier est scruté toutes les `interval` secondes en
+comparant la date de modification de chaque dossier de post (elle change
+quand un fichier y est ajouté, renommé ou supprimé).
+
+Les changements sont regroupés (debounce) puis passés à on_change sous
+forme d'un ensemble de noms de dossiers, depuis le thread du watcher ;
+None signifie « tout relire » (événements perdus).
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+POST_SUFFIX = "-post"
+
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_Q_OVERFLOW = 0x4000
+IN_ISDIR = 0x40000000
+
+ROOT_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO
+POST_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE | IN_DELETE_SELF
+EVENT = struct.Struct("iIII")
+
+
+def scan_posts(folder):
+    """{nom du dossier de post: mtime_ns}"""
+    try:
+        entries = os.scandir(folder)
+    except OSError:
+        return {}
+    with entries:
+        return {
+            entry.name: entry.stat().st_mtime_ns
+            for entry in entries
+            if entry.name.endswith(POST_SUFFIX) and entry.is_dir()
+        }
+
+
+class _Inotify:
+    """Accès minimal à inotify par ctypes"""
+    
+    def __init__(self):
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+    
+    def add_watch(self, path, mask):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), path)
+        return wd
+    
+    def read(self, timeout):
+        """Événements (wd, mask, nom) disponibles dans le délai"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        data = os.read(self.fd, 64 * 1024)
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = EVENT.unpack_from(data, offset)
+            offset += EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0").decode("utf-8", "replace")
+            offset += length
+            events.append((wd, mask, name))
+        return events
+    
+    def close(self):
+        os.close(self.fd)
+
+
+class FolderWatcher:
+    """Thread qui signale les dossiers de post modifiés dans output_folder"""
+    
+    def __init__(self, output_folder, on_change, interval=2.0, debounce=0.5, use_inotify=None):
+        self.output_folder = os.fspath(output_folder)
+        self.on_change = on_change
+        self.interval = interval
+        self.debounce = debounce
+        self.use_inotify = sys.platform.startswith("linux") if use_inotify is None else use_inotify
+        self.backend = "polling"
+        self._inotify = None
+        self._root_wd = None
+        self._watches = {}
+        self._known = {}
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        if self.use_inotify:
+            try:
+                self._start_inotify()
+                self.backend = "inotify"
+            except (OSError, AttributeError) as e:
+                print(f"inotify indisponible, scrutation du dossier: {e}")
+                self._close_inotify()
+        if self._inotify is None:
+            self._known = scan_posts(self.output_folder)
+        self._thread = threading.Thread(target=self._run, name="folder-watcher", daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+        self._close_inotify()
+    
+    def _run(self):
+        pending = set()
+        flush_at = None
+        while not self._stop.is_set():
+            timeout = self.interval if flush_at is None else max(flush_at - time.monotonic(), 0)
+            try:
+                changed = self._wait_changes(timeout)
+            except OSError as e:
+                print(f"Erreur surveillance dossier: {e}")
+                changed = None
+            
+            if changed is None:
+                pending = None
+            elif pending is not None:
+                pending |= changed
+            if changed is None or changed:
+                flush_at = flush_at or time.monotonic() + self.debounce
+            
+            if flush_at is not None and time.monotonic() >= flush_at:
+                try:
+                    self.on_change(pending)
+                except Exception as e:
+                    print(f"Erreur surveillance dossier: {e}")
+                pending = set()
+                flush_at = None
+    
+    def _wait_changes(self, timeout):
+        """Dossiers modifiés pendant timeout (None : tout relire)"""
+        if self._inotify is not None:
+            return self._inotify_changes(timeout)
+        if self._stop.wait(timeout):
+            return set()
+        return self._scan_changes()
+    
+    # --- Scrutation ---
+    
+    def _scan_changes(self):
+        current = scan_posts(self.output_folder)
+        changed = {name for name, mtime in current.items() if self._known.get(name) != mtime}
+        changed |= self._known.keys() - current.keys()
+        self._known = current
+        return changed
+    
+    # --- inotify ---
+    
+    def _start_inotify(self):
+        self._inotify = _Inotify()
+        self._root_wd = self._inotify.add_watch(self.output_folder, ROOT_MASK)
+        for name in scan_posts(self.output_folder):
+            self._watch_post(name)
+    
+    def _watch_post(self, name):
+        try:
+            wd = self._inotify.add_watch(os.path.join(self.output_folder, name), POST_MASK)
+        except FileNotFoundError:
+            return
+        self._watches[wd] = name
+    
+    def _inotify_changes(self, timeout):
+        changed = set()
+        for wd, mask, name in self._inotify.read(timeout):
+            if mask & IN_Q_OVERFLOW:
+                return None
+            if wd == self._root_wd:
+                # Événement du dossier de sortie : un dossier de post créé, renommé ou supprimé
+                if not name.endswith(POST_SUFFIX):
+                    continue
+                if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    self._watch_post(name)
+                changed.add(name)
+                continue
+            folder = self._watches.get(wd)
+            if folder is None:
+                continue
+            if mask & IN_DELETE_SELF:
+                del self._watches[wd]
+            changed.add(folder)
+        return changed
+    
+    def _close_inotify(self):
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+            self._watches = {}
@@ -0,0 +1,291 @@
+# wavespeed_async.py - Client asyncio pour l'API WaveSpeed
+"""Client asyncio WaveSpeed, utilisable sans interface graphique.
+
+Exemple (script headless) :
+
+    import asyncio
+    from pathlib import Path
+    from wavespeed_async import AsyncWaveSpeedClient, encode_image
+
+    async def main():
+        async with AsyncWaveSpeedClient("ma_clé") as client:
+            image = await client.generate("un chat gothique", [encode_image("lora.jpg")])
+            Path("chat.jpg").write_bytes(image)
+
+    asyncio.run(main())
+
+Les appels HTTP bloquants passent par la session partagée (HttpClient,
+keep-alive) sur un petit pool de threads borné ; l'attente des résultats
+est confiée au PollScheduler. Des centaines de tâches en vol ne coûtent
+donc ni un thread ni un socket chacune.
+"""
+import asyncio
+import base64
+import io
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from result_cache import request_key
+from wavespeed_client import API_BASE, EDIT_PATH, UPLOAD_PATH, ApiError, HttpClient, PollScheduler
+
+DEFAULT_PARAMS = {
+    "aspect_ratio": "9:16",
+    "resolution": "2k",
+    "output_format": "jpeg",
+}
+
+CHUNK_SIZE = 64 * 1024
+
+# Comment l'image A est passée à la génération de la variante B
+VARIANT_REFERENCES = ("url", "upload", "inline")
+
+
+def encode_image(source):
+    """Encode une image (chemin ou bytes) en data-URI base64"""
+    if isinstance(source, (bytes, bytearray)):
+        data = bytes(source)
+    else:
+        with open(source, "rb") as f:
+            data = f.read()
+    mime = "image/png" if data.startswith(b"\x89PNG") else "image/jpeg"
+    return f"data:{mime};base64,{base64.b64encode(data).decode('utf-8')}"
+
+
+def shrink_image(data, max_side, quality=90):
+    """Réduit une image à max_side pixels (plus grand côté) et la recompresse en JPEG"""
+    from PIL import Image
+    
+    with Image.open(io.BytesIO(data)) as img:
+        if max(img.size) <= max_side and img.format == "JPEG":
+            return data
+        img.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+        out = io.BytesIO()
+        img.convert("RGB").save(out, "JPEG", quality=quality, optimize=True)
+        return out.getvalue()
+
+
+class ReferenceCache:
+    """Cache des data-URI de l'image LoRa de référence
+
+    Clé : chemin + mtime + taille du fichier, donc une image modifiée est
+    relue. Optionnellement l'image est réduite à max_side pixels et
+    recompressée avant encodage (requêtes plus légères).
+    """
+    
+    def __init__(self, max_side=0, quality=90, max_entries=8):
+        self.max_side = max_side
+        self.quality = quality
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, path):
+        """Renvoie le data-URI de l'image (lu et encodé une seule fois)"""
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size, self.max_side, self.quality)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            
+            self.misses += 1
+            with open(path, "rb") as f:
+                data = f.read()
+            if self.max_side:
+                data = shrink_image(data, self.max_side, self.quality)
+            uri = encode_image(data)
+            
+            self._entries[key] = uri
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return uri
+
+
+def _no_state(state):
+    pass
+
+
+class AsyncWaveSpeedClient:
+    """Client async : submit, attente du résultat et téléchargement en streaming"""
+    
+    def __init__(self, api_key, http=None, poller=None, io_workers=8, deadline=120, api_base=API_BASE,
+                 references=None, variant_reference="url"):
+        self.api_key = api_key
+        self.api_base = api_base.rstrip("/")
+        self.endpoint = f"{self.api_base}{EDIT_PATH}"
+        if variant_reference not in VARIANT_REFERENCES:
+            raise ValueError(f"variant_reference doit être l'un de {VARIANT_REFERENCES}")
+        self.variant_reference = variant_reference
+        self.fallbacks = 0
+        self.references = references or ReferenceCache()
+        # Session et ordonnanceur créés ici : fermés par close() ; ceux passés en paramètre restent à l'appelant
+        self._owns_http = http is None
+        self._owns_poller = poller is None
+        self.http = http or HttpClient(pool_size=io_workers)
+        self.poller = poller or PollScheduler(self.http, deadline=deadline)
+        self._io = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="wavespeed-io")
+    
+    def with_key(self, api_key):
+        """Même client (session, ordonnanceur, threads) avec une autre clé API"""
+        clone = object.__new__(AsyncWaveSpeedClient)
+        clone.__dict__.update(self.__dict__)
+        clone.api_key = api_key
+        clone._owns_http = clone._owns_poller = False
+        return clone
+    
+    async def _run_io(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._io, partial(func, *args, **kwargs))
+    
+    async def encode_reference(self, path):
+        """Data-URI de l'image de référence (via le cache)"""
+        return await self._run_io(self.references.get, path)
+    
+    async def submit(self, prompt, images, **params):
+        """Soumet une génération ; renvoie l'URL de suivi de la tâche"""
+        data = {"prompt": prompt, "images": list(images), **DEFAULT_PARAMS, **params}
+        return await self._run_io(self.http.submit, self.api_key, data, url=self.endpoint)
+    
+    def cache_key(self, prompt, images, **params):
+        """Clé de la requête pour le cache des résultats (mêmes paramètres que submit)"""
+        return request_key(self.endpoint, prompt, list(images), {**DEFAULT_PARAMS, **params})
+    
+    async def upload(self, path):
+        """Envoie une image sur le stockage WaveSpeed ; renvoie son URL"""
+        return await self._run_io(self.http.upload, self.api_key, path, url=f"{self.api_base}{UPLOAD_PATH}")
+    
+    async def wait_for_result(self, task_url, deadline=None, resumed=False):
+        """Attend la fin d'une tâche (resumed : ré-attachée, pollée tout de suite) ; renvoie les URLs de sortie"""
+        future = self.poller.watch(self.api_key, task_url, deadline=deadline, resumed=resumed)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+    
+    async def stream_download(self, url, chunk_size=CHUNK_SIZE):
+        """Télécharge une image par morceaux (itérateur async de bytes)"""
+        response = await self._run_io(self.http.request, "GET", url, "download", stream=True)
+        try:
+            response.raise_for_status()
+            chunks = response.iter_content(chunk_size)
+            while True:
+                chunk = await self._run_io(next, chunks, None)
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            response.close()
+    
+    async def download(self, url):
+        """Télécharge une image entière en mémoire"""
+        return b"".join([chunk async for chunk in self.stream_download(url)])
+    
+    async def download_to(self, url, dest):
+        """Télécharge une image sur disque (streaming, reprise, renommage atomique)"""
+        return await self._run_io(self.http.download_to, url, dest)
+    
+    async def generate_to_file(self, prompt, images, dest, on_state=_no_state, **params):
+        """Submit + attente + téléchargement sur disque ; renvoie les infos du fichier"""
+        on_state("submitting")
+        task_url = await self.submit(prompt, images, **params)
+        return await self._result_to_file(task_url, dest, on_state)
+    
+    async def generate_variant_to_file(self, prompt, source, dest, on_state=_no_state, **params):
+        """Génère une variante d'une image déjà générée (infos renvoyées par generate_to_file)
+
+        Selon variant_reference, l'image source est référencée par son URL de
+        résultat ("url"), envoyée une fois sur le stockage WaveSpeed
+        ("upload"), ou ré-encodée en base64 dans la requête ("inline"). Si
+        l'API refuse la référence, on retombe sur l'envoi inline.
+        """
+        on_state("submitting")
+        images = await self.variant_images(source)
+        task_url = await self.submit_variant(prompt, source, images, **params)
+        return await self._result_to_file(task_url, dest, on_state)
+    
+    async def variant_images(self, source):
+        """Référence à l'image source pour la variante, selon variant_reference"""
+        if self.variant_reference == "upload":
+            try:
+                return [await self.upload(source["path"])]
+            except Exception as e:
+                print(f"Upload refusé, envoi inline: {e}")
+                self.fallbacks += 1
+        elif self.variant_reference == "url" and source.get("url"):
+            return [source["url"]]
+        return [await self._run_io(encode_image, source["path"])]
+    
+    async def submit_variant(self, prompt, source, images, **params):
+        """Soumet la variante ; si l'API refuse la référence, renvoie l'image en base64"""
+        try:
+            return await self.submit(prompt, images, **params)
+        except ApiError as e:
+            # Seulement si l'API a répondu : une erreur réseau pendant le
+            # submit pourrait avoir lancé une génération (payée). Un 429 ou
+            # un 5xx ne dit rien de la référence.
+            if e.status_code == 429 or e.status_code >= 500 or all(image.startswith("data:") for image in images):
+                raise
+            print(f"Référence {self.variant_reference} refusée, envoi inline: {e}")
+            self.fallbacks += 1
+        inline = await self._run_io(encode_image, source["path"])
+        return await self.submit(prompt, [inline], **params)
+    
+    async def _result_to_file(self, task_url, dest, on_state):
+        on_state("polling")
+        outputs = await self.wait_for_result(task_url)
+        on_state("downloading")
+        info = await self.download_to(outputs[0], dest)
+        return dict(info, url=outputs[0], task_url=task_url)
+    
+    async def generate(self, prompt, images, on_state=_no_state, **params):
+        """Submit + attente + téléchargement ; renvoie les bytes de l'image"""
+        on_state("submitting")
+        task_url = await self.submit(prompt, images, **params)
+        on_state("polling")
+        outputs = await self.wait_for_result(task_url)
+        on_state("downloading")
+        return await self.download(outputs[0])
+    
+    async def close(self):
+        self._io.shutdown(wait=False)
+        if self._owns_poller:
+            self.poller.close()
+        if self._owns_http:
+            self.http.close()
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+class LoopThread:
+    """Boucle asyncio qui tourne dans son propre thread (à côté de Tk)"""
+    
+    def __init__(self, name="asyncio-loop"):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+    
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+    
+    def submit(self, coro):
+        """Lance une coroutine sur la boucle ; renvoie un concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+    
+    def stop(self, timeout=5):
+        """Arrête la boucle et attend la fin de son thread"""
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+        if not self._thread.is_alive():
+            self.loop.close()
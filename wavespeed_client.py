@@ -0,0 +1,597 @@
+# wavespeed_client.py - Couche HTTP partagée pour l'API WaveSpeed
+import hashlib
+import heapq
+import itertools
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from rate_limit import THROTTLE_STATUSES, retry_after_seconds
+
+API_BASE = "https://api.wavespeed.ai"
+EDIT_PATH = "/api/v3/google/nano-banana-pro/edit"
+UPLOAD_PATH = "/api/v3/media/upload/binary"
+EDIT_ENDPOINT = f"{API_BASE}{EDIT_PATH}"
+
+COLD_FIRST_POLL = 2.0       # premier poll au plus tard, tant qu'aucune durée n'a été observée (s)
+MAX_RECORDS = 1000          # tâches terminées gardées pour summary()
+STATS_KEEP = 50             # lignes de poll_stats.jsonl relues au lancement (et gardées à la compaction)
+STATS_MAX_LINES = 500       # au-delà, poll_stats.jsonl est réduit à ses STATS_KEEP dernières lignes
+
+# Timeouts (connexion, lecture) en secondes, par type d'appel
+TIMEOUTS = {
+    "submit": (10, 60),
+    "poll": (10, 30),
+    "download": (10, 60),
+    "upload": (10, 60),
+}
+
+# Politique de retry : les erreurs de connexion sont toujours rejouées
+# (la requête n'est pas partie), les statuts/lectures seulement pour GET,
+# pour ne jamais payer deux fois une génération. Les 429/503 ne sont pas
+# rejoués ici, même avec Retry-After (urllib3 les rejouerait sinon en
+# bloquant le thread) : le RateLimiter doit les voir dès la première réponse.
+RETRY = Retry(
+    total=3,
+    connect=3,
+    read=2,
+    status=3,
+    backoff_factor=0.5,
+    status_forcelist=tuple(status for status in (500, 502, 503, 504) if status not in THROTTLE_STATUSES),
+    allowed_methods=frozenset({"GET", "HEAD"}),
+    respect_retry_after_header=False,
+    raise_on_status=False,
+)
+
+
+class ApiError(Exception):
+    """Réponse d'erreur de l'API WaveSpeed"""
+    
+    def __init__(self, response):
+        super().__init__(f"API Error: {response.text}")
+        self.status_code = response.status_code
+        self.retry_after = retry_after_seconds(response.headers.get("Retry-After"))
+
+
+class HttpClient:
+    """Session HTTP partagée (keep-alive, pool de connexions par hôte, retries)
+
+    Une seule instance est partagée par tous les threads : les pools
+    urllib3 sont thread-safe et chaque hôte (api.wavespeed.ai, CDN des
+    images) garde ses connexions ouvertes entre les appels. Le limiter
+    optionnel (rate_limit.RateLimiter) règle débit et concurrence des
+    submits et des polls ; metrics (metrics.Metrics) compte requêtes,
+    octets envoyés/reçus et retries.
+    """
+    
+    def __init__(self, pool_size=10, retry=RETRY, timeouts=None, limiter=None, metrics=None):
+        self.timeouts = dict(TIMEOUTS, **(timeouts or {}))
+        self.limiter = limiter
+        self.metrics = metrics
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": "Mozilla/5.0"})
+        self.adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+        self._lock = threading.Lock()
+        self._calls = {}
+    
+    def request(self, method, url, kind, **kwargs):
+        """Envoie une requête avec le timeout du type d'appel ("submit", "poll", "download")"""
+        kwargs.setdefault("timeout", self.timeouts[kind])
+        host = urlsplit(url).netloc
+        with self._lock:
+            self._calls[host] = self._calls.get(host, 0) + 1
+        response = self.session.request(method, url, **kwargs)
+        if self.metrics is not None:
+            self._measure(kind, response, streamed=kwargs.get("stream", False))
+        return response
+    
+    def _measure(self, kind, response, streamed):
+        body = response.request.body
+        self.metrics.inc("http_requests_total", kind=kind, status=f"{response.status_code // 100}xx")
+        if body:
+            self.metrics.inc("http_bytes_total", len(body), direction="up")
+        if not streamed:
+            self.metrics.inc("http_bytes_total", len(response.content), direction="down")
+        retries = getattr(response.raw, "retries", None)
+        if retries is not None and retries.history:
+            self.metrics.inc("http_retries_total", len(retries.history), kind=kind, reason="transport")
+    
+    def count_retry(self, kind, reason):
+        if self.metrics is not None:
+            self.metrics.inc("http_retries_total", kind=kind, reason=reason)
+    
+    def submit(self, api_key, data, url=EDIT_ENDPOINT):
+        """Soumet une génération et renvoie l'URL de suivi de la tâche"""
+        if self.limiter is None:
+            return self._submit(api_key, data, url)
+        for attempt in itertools.count(1):
+            self.limiter.acquire_submit()
+            try:
+                task_url = self._submit(api_key, data, url)
+            except ApiError as e:
+                self.limiter.release_submit()
+                self.limiter.on_response(e.status_code, e.retry_after)
+                # 429/503 : la requête a été refusée, aucune génération lancée
+                if e.status_code in THROTTLE_STATUSES and attempt < self.limiter.max_attempts:
+                    self.count_retry("submit", "throttled")
+                    continue
+                raise
+            except BaseException:
+                self.limiter.release_submit()
+                raise
+            self.limiter.task_started(task_url)
+            self.limiter.on_response(200)
+            return task_url
+    
+    def _submit(self, api_key, data, url):
+        response = self.request(
+            "POST", url, "submit",
+            json=data,
+            headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+        )
+        if response.status_code != 200:
+            raise ApiError(response)
+        return response.json()['data']['urls']['get']
+    
+    def get_task(self, api_key, task_url):
+        """Renvoie le bloc 'data' de l'état d'une tâche"""
+        response = self.request(
+            "GET", task_url, "poll",
+            headers={"Authorization": f"Bearer {api_key}"}
+        )
+        if self.limiter is not None:
+            self.limiter.on_response(response.status_code, retry_after_seconds(response.headers.get("Retry-After")))
+        if response.status_code != 200:
+            raise ApiError(response)
+        return response.json()['data']
+    
+    def download(self, url):
+        """Télécharge une image générée"""
+        response = self.request("GET", url, "download")
+        response.raise_for_status()
+        return response.content
+    
+    def upload(self, api_key, path, url=f"{API_BASE}{UPLOAD_PATH}"):
+        """Envoie une image sur le stockage WaveSpeed ; renvoie son URL"""
+        with open(path, "rb") as f:
+            response = self.request(
+                "POST", url, "upload",
+                files={"file": (Path(path).name, f, "image/jpeg")},
+                headers={"Authorization": f"Bearer {api_key}"}
+            )
+        if response.status_code != 200:
+            raise ApiError(response)
+        return response.json()['data']['download_url']
+    
+    def download_to(self, url, dest, chunk_size=64 * 1024, attempts=3):
+        """Télécharge une image directement sur disque
+
+        Les morceaux sont écrits dans <dest>.part à côté du fichier final,
+        repris avec un en-tête Range si la connexion coupe, puis la taille
+        (et le MD5 si le serveur le donne via l'ETag) est vérifiée avant de
+        renommer atomiquement en <dest>. Un crash ne laisse donc jamais un
+        A.jpg à moitié écrit. Renvoie la taille et le sha256 du fichier.
+        """
+        dest = Path(dest)
+        part = dest.with_name(dest.name + ".part")
+        offset = 0
+        total = None
+        etag = None
+        last_error = None
+        
+        for attempt in range(attempts):
+            headers = {"Range": f"bytes={offset}-"} if offset else {}
+            if attempt:
+                self.count_retry("download", "resume")
+            try:
+                with self.request("GET", url, "download", headers=headers, stream=True) as response:
+                    if offset and response.status_code == 416:
+                        break           # déjà tout reçu
+                    response.raise_for_status()
+                    if offset and response.status_code != 206:
+                        offset = 0      # le serveur ignore Range : on repart de zéro
+                    total = _total_size(response, offset)
+                    etag = response.headers.get("ETag", etag)
+                    received = 0
+                    writing = 0.0
+                    try:
+                        with open(part, "ab" if offset else "wb") as f:
+                            for chunk in response.iter_content(chunk_size):
+                                started = time.perf_counter()
+                                f.write(chunk)
+                                writing += time.perf_counter() - started
+                                offset += len(chunk)
+                                received += len(chunk)
+                            started = time.perf_counter()
+                            f.flush()
+                            os.fsync(f.fileno())
+                            writing += time.perf_counter() - started
+                    finally:
+                        if self.metrics is not None:
+                            self.metrics.inc("http_bytes_total", received, direction="down")
+                            self.metrics.observe("disk_write_seconds", writing)
+                if total is None or offset >= total:
+                    break
+                last_error = Exception(f"Téléchargement incomplet ({offset}/{total} octets)")
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+                last_error = e
+                offset = part.stat().st_size if part.exists() else 0
+        else:
+            part.unlink(missing_ok=True)
+            raise Exception(f"Téléchargement échoué: {last_error}")
+        
+        try:
+            size, sha256 = _verify_download(part, total, etag)
+        except Exception:
+            part.unlink(missing_ok=True)
+            raise
+        os.replace(part, dest)
+        return {"path": dest, "size": size, "sha256": sha256}
+    
+    def stats(self):
+        """Appels et réutilisation des connexions, par hôte"""
+        with self._lock:
+            stats = {host: {"calls": calls, "connections": 0, "requests": 0, "reused": 0}
+                     for host, calls in self._calls.items()}
+        pools = self.adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host = pool.host if pool.port in (None, 80, 443) else f"{pool.host}:{pool.port}"
+            entry = stats.setdefault(host, {"calls": 0, "connections": 0, "requests": 0, "reused": 0})
+            entry["connections"] += pool.num_connections
+            entry["requests"] += pool.num_requests
+        for entry in stats.values():
+            entry["reused"] = max(0, entry["requests"] - entry["connections"])
+        return stats
+    
+    def close(self):
+        self.session.close()
+
+
+def _total_size(response, offset):
+    """Taille totale attendue (Content-Range si réponse partielle, sinon Content-Length)"""
+    content_range = response.headers.get("Content-Range", "")
+    match = re.search(r"/(\d+)$", content_range)
+    if match:
+        return int(match.group(1))
+    length = response.headers.get("Content-Length")
+    if length is None or response.headers.get("Content-Encoding"):
+        return None
+    return offset + int(length)
+
+
+def _verify_download(path, total, etag):
+    """Vérifie taille, marqueurs JPEG et MD5 (ETag) ; renvoie (taille, sha256)"""
+    sha256 = hashlib.sha256()
+    md5 = hashlib.md5()
+    size = 0
+    with open(path, "rb") as f:
+        head = f.read(2)
+        f.seek(0)
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha256.update(chunk)
+            md5.update(chunk)
+            size += len(chunk)
+        if size >= 2:
+            f.seek(-2, os.SEEK_END)
+        tail = f.read(2)
+    
+    if total is not None and size != total:
+        raise Exception(f"Taille invalide ({size} au lieu de {total} octets)")
+    if head == b"\xff\xd8" and tail != b"\xff\xd9":
+        raise Exception("Image JPEG tronquée")
+    etag = (etag or "").strip('"')
+    if re.fullmatch(r"[0-9a-f]{32}", etag) and md5.hexdigest() != etag:
+        raise Exception("Checksum invalide")
+    return size, sha256.hexdigest()
+
+
+class CompletionEstimator:
+    """Estime la durée d'une génération à partir des jobs passés
+
+    Moyenne et variance glissantes (EWMA) des temps de génération observés.
+    Sans historique, le premier poll part au plus tard après COLD_FIRST_POLL.
+    """
+    
+    def __init__(self, initial=COLD_FIRST_POLL, alpha=0.2):
+        self.alpha = alpha
+        self.mean = float(initial)
+        self.var = (self.mean / 4) ** 2
+        self.samples = 0
+        self._lock = threading.Lock()
+    
+    def observe(self, seconds):
+        """Ajoute la durée d'une génération terminée"""
+        with self._lock:
+            if self.samples == 0:
+                self.mean = seconds
+                self.var = (seconds / 4) ** 2
+            else:
+                diff = seconds - self.mean
+                self.mean += self.alpha * diff
+                self.var = (1 - self.alpha) * (self.var + self.alpha * diff * diff)
+            self.samples += 1
+    
+    @property
+    def std(self):
+        return math.sqrt(self.var)
+    
+    def first_poll_delay(self, min_interval):
+        """Délai avant le premier poll : un peu avant la fin attendue"""
+        with self._lock:
+            delay = max(min_interval, self.mean - self.std)
+            return min(delay, max(min_interval, COLD_FIRST_POLL)) if self.samples == 0 else delay
+
+
+class PollTask:
+    """Une tâche distante suivie par le PollScheduler"""
+    
+    def __init__(self, api_key, task_url, deadline, resumed=False):
+        self.api_key = api_key
+        self.task_url = task_url
+        self.resumed = resumed
+        self.future = Future()
+        self.started = time.monotonic()
+        self.deadline = self.started + deadline
+        self.polls = 0
+        self.late_polls = 0
+        self.errors = 0
+        self.last_pending = 0.0     # secondes écoulées au dernier poll "pas fini"
+
+
+class PollScheduler:
+    """Suit toutes les tâches en cours dans une seule boucle d'ordonnancement
+
+    Au lieu d'un thread qui dort 2 s par tâche, chaque tâche a une date de
+    prochain poll : le premier poll est calé sur la durée estimée (apprise
+    des jobs passés), puis backoff exponentiel avec jitter jusqu'à la
+    deadline. Les GET partent sur un petit pool de threads partagé.
+    """
+    
+    def __init__(self, http, estimator=None, deadline=120, min_interval=0.5, max_interval=5.0,
+                 backoff=1.6, max_errors=5, workers=4, stats_path=None):
+        self.http = http
+        self.estimator = estimator or CompletionEstimator()
+        self.deadline = deadline
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.max_errors = max_errors
+        self.stats_path = Path(stats_path) if stats_path else None
+        self._stats_lines = 0
+        self.records = deque(maxlen=MAX_RECORDS)
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._stats_lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="poll")
+        self._load_stats()
+        self._thread = threading.Thread(target=self._loop, name="poll-scheduler", daemon=True)
+        self._thread.start()
+    
+    def watch(self, api_key, task_url, deadline=None, resumed=False):
+        """Suit une tâche ; le Future renvoie la liste des URLs de sortie
+
+        resumed=True : tâche ré-attachée après un arrêt, soumise depuis
+        longtemps peut-être. Elle est pollée tout de suite, et sa durée
+        (inconnue) ne sert pas à l'estimation.
+        """
+        task = PollTask(api_key, task_url, deadline or self.deadline, resumed)
+        first = 0 if resumed else min(self.estimator.first_poll_delay(self.min_interval), deadline or self.deadline)
+        self._schedule(task, task.started + first)
+        return task.future
+    
+    def close(self):
+        """Arrête la boucle et le pool ; les tâches encore suivies sont annulées (places du limiteur rendues)"""
+        with self._cond:
+            self._closed = True
+            pending = [task for _, _, task in self._heap]
+            self._heap.clear()
+            self._cond.notify()
+        for task in pending:
+            self._cancel(task)
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._thread.join(timeout=1)
+    
+    def in_flight(self):
+        """Nombre de tâches suivies"""
+        with self._cond:
+            return len(self._heap)
+    
+    def summary(self):
+        """Statistiques des dernières tâches terminées (temps jusqu'au résultat, nombre de polls)"""
+        with self._stats_lock:
+            records = list(self.records)
+        done = [r for r in records if r["status"] == "completed"]
+        if not done:
+            return {"tasks": len(records), "completed": 0}
+        return {
+            "tasks": len(records),
+            "completed": len(done),
+            "mean_seconds": sum(r["seconds"] for r in done) / len(done),
+            "mean_polls": sum(r["polls"] for r in done) / len(done),
+            "estimate": self.estimator.mean,
+        }
+    
+    def _schedule(self, task, due):
+        with self._cond:
+            if not self._closed:
+                heapq.heappush(self._heap, (due, next(self._seq), task))
+                self._cond.notify()
+                return
+        self._cancel(task)
+    
+    def _cancel(self, task):
+        self._release(task)
+        task.future.cancel()
+    
+    def _next_delay(self, task):
+        """Backoff exponentiel avec jitter une fois la durée estimée dépassée"""
+        base = min(self.max_interval, self.min_interval * self.backoff ** task.late_polls)
+        task.late_polls += 1
+        return base / 2 + random.uniform(0, base / 2)
+    
+    def _loop(self):
+        while True:
+            with self._cond:
+                while not self._closed and (not self._heap or self._heap[0][0] > time.monotonic()):
+                    timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+                    self._cond.wait(timeout)
+                if self._closed:
+                    return
+                _, _, task = heapq.heappop(self._heap)
+            if task.future.cancelled():
+                self._release(task)
+                continue
+            if time.monotonic() >= task.deadline and task.polls:
+                # Polls décalés (débit, Retry-After) jusqu'au-delà de la deadline
+                self._finish(task, "timeout", error=Exception("Timeout"))
+                continue
+            limiter = self.http.limiter
+            wait = limiter.poll_delay() if limiter is not None else 0
+            if wait:
+                # Débit de polls atteint ou pause Retry-After : le poll est décalé
+                self._schedule(task, time.monotonic() + wait)
+                continue
+            try:
+                self._pool.submit(self._poll, task)
+            except RuntimeError:
+                self._cancel(task)     # pool arrêté par close() entre-temps
+                return
+    
+    def _poll(self, task):
+        task.polls += 1
+        try:
+            data = self.http.get_task(task.api_key, task.task_url)
+            task.errors = 0
+        except ApiError as e:
+            if e.status_code in THROTTLE_STATUSES:
+                # Limite de l'API : on ralentit sans compter d'erreur, mais la deadline court toujours
+                self.http.count_retry("poll", "throttled")
+                now = time.monotonic()
+                if now >= task.deadline:
+                    self._finish(task, "timeout", error=Exception("Timeout (API saturée)"))
+                    return
+                delay = e.retry_after if e.retry_after is not None else self._next_delay(task)
+                self._schedule(task, min(now + delay, task.deadline))
+                return
+            task.errors += 1
+            if task.errors >= self.max_errors:
+                self._finish(task, "error", error=e)
+                return
+            self.http.count_retry("poll", "error")
+            data = {"status": "pending"}
+        except Exception as e:
+            task.errors += 1
+            if task.errors >= self.max_errors:
+                self._finish(task, "error", error=e)
+                return
+            self.http.count_retry("poll", "error")
+            data = {"status": "pending"}
+        
+        if data.get('status') == 'completed' and data.get('outputs'):
+            self._finish(task, "completed", outputs=data['outputs'])
+        elif data.get('status') == 'failed':
+            self._finish(task, "failed", error=Exception(data.get('error') or "Génération échouée"))
+        else:
+            now = time.monotonic()
+            task.last_pending = now - task.started
+            if now >= task.deadline:
+                self._finish(task, "timeout", error=Exception("Timeout"))
+            else:
+                self._schedule(task, min(now + self._next_delay(task), task.deadline))
+    
+    def _release(self, task):
+        if self.http.limiter is not None:
+            self.http.limiter.task_finished(task.task_url)
+    
+    def _finish(self, task, status, outputs=None, error=None):
+        self._release(task)
+        seconds = time.monotonic() - task.started
+        if status == "completed" and not task.resumed:
+            # La tâche a fini entre le dernier poll "pas fini" et celui-ci
+            self.estimator.observe((task.last_pending + seconds) / 2)
+        record = {
+            "task_url": task.task_url,
+            "status": status,
+            "seconds": round(seconds, 3),
+            "polls": task.polls,
+            "last_pending": round(task.last_pending, 3),
+            "finished_at": time.time(),
+        }
+        with self._stats_lock:
+            self.records.append(record)
+        self._save_stat(record)
+        if self.http.metrics is not None:
+            self.http.metrics.observe("generation_seconds", seconds, status=status)
+            self.http.metrics.inc("tasks_total", status=status)
+        if task.future.cancelled():
+            return
+        if error is not None:
+            task.future.set_exception(error)
+        else:
+            task.future.set_result(outputs)
+    
+    def _load_stats(self):
+        """Initialise l'estimation avec les derniers jobs enregistrés"""
+        if not self.stats_path or not self.stats_path.exists():
+            return
+        try:
+            with self._stats_lock:
+                lines = self._compact_stats()
+            for line in lines:
+                record = json.loads(line)
+                if record.get("status") == "completed":
+                    self.estimator.observe((record.get("last_pending", 0) + record["seconds"]) / 2)
+        except Exception as e:
+            print(f"Erreur lecture stats polling: {e}")
+    
+    def _save_stat(self, record):
+        if not self.stats_path:
+            return
+        try:
+            with self._stats_lock:
+                self.stats_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.stats_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record) + "\n")
+                self._stats_lines += 1
+                if self._stats_lines > STATS_MAX_LINES:
+                    self._compact_stats()
+        except Exception as e:
+            print(f"Erreur écriture stats polling: {e}")
+    
+    def _compact_stats(self):
+        """Réduit poll_stats.jsonl à ses STATS_KEEP dernières lignes (remplacement atomique) ; les renvoie
+
+        Fichier borné à STATS_MAX_LINES lignes : le relire en entier reste
+        bon marché. Une ligne ajoutée au même moment par un autre processus
+        peut être perdue (ce ne sont que des statistiques).
+        """
+        with open(self.stats_path, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+        kept = lines[-STATS_KEEP:]
+        if len(lines) > STATS_MAX_LINES:
+            tmp = self.stats_path.with_name(f"{self.stats_path.name}.{os.getpid()}.tmp")
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.writelines(kept)
+            os.replace(tmp, self.stats_path)
+            lines = kept
+        self._stats_lines = len(lines)
+        return kept